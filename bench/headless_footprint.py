@@ -0,0 +1,121 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _LoopingVideoCamera:
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise SystemExit(f"cannot open recording: {path}")
+
+    def get_frame(self):
+        ok, frame = self.cap.read()
+        if not ok:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        return frame if ok else None
+
+    def close(self):
+        self.cap.release()
+
+
+def _patch_camera(recording):
+    if not recording:
+        return
+    import runtime
+
+    runtime.DoorbellRuntime._init_camera = lambda self, camera_index: _LoopingVideoCamera(recording)
+
+
+def _run_gui(seconds):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6 import QtCore, QtWidgets
+
+    from gui.app_window import AppWindow
+    from gui.qt_utils import apply_theme
+
+    app = QtWidgets.QApplication(sys.argv)
+    apply_theme(app)
+    win = AppWindow()
+    win.show()
+    QtCore.QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    frames = win.live_tab._frame_counter
+    win.shutdown()
+    return frames
+
+
+def _run_headless(seconds):
+    from service.headless import HeadlessDoorbell
+
+    doorbell = HeadlessDoorbell()
+    doorbell.start()
+    time.sleep(seconds)
+    frames = doorbell.frames
+    doorbell.stop()
+    return frames
+
+
+def _child(mode, seconds, recording):
+    _patch_camera(recording)
+    start_cpu = time.process_time()
+    frames = _run_gui(seconds) if mode == "gui" else _run_headless(seconds)
+    cpu = time.process_time() - start_cpu
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print(f"RESULT {mode} cpu={cpu:.3f} rss={rss_mb:.1f} frames={frames}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU and peak RSS of the GUI and the headless daemon.")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--recording", default="", help="replay a video instead of the camera")
+    parser.add_argument(
+        "--frame-interval",
+        type=float,
+        default=0.033,
+        help="headless camera interval; the default matches the Live tab 33 ms timer",
+    )
+    parser.add_argument("--child", choices=("gui", "headless"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.seconds, args.recording)
+        return
+
+    env = dict(
+        os.environ,
+        DOORBELL_TUNNEL_ENABLE="0",
+        DOORBELL_RING_ENABLED="0",
+        DOORBELL_HEADLESS_FRAME_INTERVAL_SEC=str(args.frame_interval),
+    )
+    stats = {}
+    for mode in ("gui", "headless"):
+        cmd = [sys.executable, "-m", "bench.headless_footprint", "--child", mode, "--seconds", str(args.seconds)]
+        if args.recording:
+            cmd += ["--recording", args.recording]
+        out = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        line = next((ln for ln in out.stdout.splitlines() if ln.startswith("RESULT")), None)
+        if line is None:
+            raise SystemExit(f"{mode} run failed:\n{out.stdout}\n{out.stderr}")
+        fields = dict(item.split("=") for item in line.split()[2:])
+        stats[mode] = {key: float(value) for key, value in fields.items()}
+        print(line[len("RESULT "):])
+
+    gui, headless = stats["gui"], stats["headless"]
+    if gui["cpu"] > 0 and gui["rss"] > 0:
+        print(
+            f"headless: cpu -{(1.0 - headless['cpu'] / gui['cpu']) * 100:.1f}%, "
+            f"peak rss -{(1.0 - headless['rss'] / gui['rss']) * 100:.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.media_index import MediaIndex
+
+
+def _populate(media_dir, count, size):
+    payload = b"\xff" * size
+    base = time.time() - count
+    for i in range(count):
+        path = os.path.join(media_dir, f"evt_{i:08x}_bench.jpg")
+        with open(path, "wb") as f:
+            f.write(payload)
+        os.utime(path, (base + i, base + i))
+
+
+def _legacy_prune(media_dir, max_files):
+    # The pre-index EventStore._prune_media_files: list + stat every file per event.
+    files = []
+    for name in os.listdir(media_dir):
+        path = os.path.join(media_dir, name)
+        if not os.path.isfile(path):
+            continue
+        if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        try:
+            mtime = os.path.getmtime(path)
+        except Exception:
+            mtime = 0
+        files.append((mtime, path))
+    if len(files) <= max_files:
+        return
+    files.sort(key=lambda item: item[0])
+    for _, path in files[: len(files) - max_files]:
+        try:
+            os.remove(path)
+        except Exception:
+            pass
+
+
+def _write_one(media_dir, i, size):
+    name = f"evt_new{i:06x}_bench.jpg"
+    with open(os.path.join(media_dir, name), "wb") as f:
+        f.write(b"\xff" * size)
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-event retention cost of the media index vs a full directory scan.")
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=20, help="new media files to add in each mode")
+    parser.add_argument("--size", type=int, default=512, help="bytes per synthetic media file")
+    parser.add_argument("--dir", default="", help="parent directory for the scratch media dir (default: temp)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="media_bench_", dir=args.dir or None)
+    media_dir = os.path.join(root, "media")
+    os.makedirs(media_dir)
+    try:
+        print(f"populating {args.files} files ...")
+        _populate(media_dir, args.files, args.size)
+
+        legacy = []
+        for i in range(args.events):
+            _write_one(media_dir, i, args.size)
+            start = time.perf_counter()
+            _legacy_prune(media_dir, args.files)
+            legacy.append(time.perf_counter() - start)
+
+        index = MediaIndex(media_dir, max_files=args.files)
+        print(f"index seed: {index.seed_sec * 1000.0:.0f} ms for {index.stats()['files']} files (once at startup)")
+        indexed = []
+        for i in range(args.events):
+            name = _write_one(media_dir, args.events + i, args.size)
+            start = time.perf_counter()
+            index.add(name, size=args.size)
+            indexed.append(time.perf_counter() - start)
+        index.flush(timeout=30.0)
+
+        legacy_ms = sum(legacy) / len(legacy) * 1000.0
+        indexed_us = sum(indexed) / len(indexed) * 1e6
+        print(f"full scan prune: {legacy_ms:.1f} ms per event")
+        print(f"media index add: {indexed_us:.1f} us per event")
+
+        start = time.perf_counter()
+        removed = index.clear()
+        caller_ms = (time.perf_counter() - start) * 1000.0
+        index.flush(timeout=300.0)
+        total_ms = (time.perf_counter() - start) * 1000.0
+        print(f"clear {removed} files: {caller_ms:.1f} ms on caller, {total_ms:.0f} ms until janitor finished")
+        print("stats", index.stats())
+        index.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import N_DETECTION_FRAMES
+from pipeline.motion_gate import MotionGate
+from runtime import DoorbellRuntime
+
+
+def _replay(path, runtime, gate, every_n, limit):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open recording: {path}")
+    frames = 0
+    inferences = 0
+    last_result = None
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if frames % every_n == 0:
+            allowed = True
+            if gate is not None:
+                face_present = bool(last_result and last_result.get("has_face"))
+                # Recorded frames have no real clock; use the nominal 30 fps timestamp.
+                allowed, _ = gate.evaluate(frame, face_present=face_present, now=frames / 30.0)
+            if allowed:
+                last_result = runtime.infer_frame(frame) if runtime is not None else None
+                inferences += 1
+        frames += 1
+        if limit and frames >= limit:
+            break
+    cap.release()
+    return {
+        "frames": frames,
+        "inferences": inferences,
+        "cpu_sec": time.process_time() - cpu_start,
+        "wall_sec": time.perf_counter() - wall_start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU time with and without the motion gate.")
+    parser.add_argument("recording", help="video file of the porch (e.g. idle.mp4)")
+    parser.add_argument("--every", type=int, default=int(N_DETECTION_FRAMES))
+    parser.add_argument("--limit", type=int, default=0, help="stop after N frames")
+    parser.add_argument("--gate-only", action="store_true", help="skip face models, measure gate cost only")
+    args = parser.parse_args()
+
+    runtime = None
+    if not args.gate_only:
+        runtime = DoorbellRuntime(enable_camera=False)
+        if runtime.face is None:
+            raise SystemExit(f"face backend unavailable: {runtime._face_import_error}")
+
+    every_n = max(1, args.every)
+    baseline = _replay(args.recording, runtime, None, every_n, args.limit)
+    gate = MotionGate(enabled=True)
+    gated = _replay(args.recording, runtime, gate, every_n, args.limit)
+
+    for name, stats in (("baseline", baseline), ("gated", gated)):
+        print(
+            f"{name:9s} frames={stats['frames']} inferences={stats['inferences']} "
+            f"cpu={stats['cpu_sec']:.2f}s wall={stats['wall_sec']:.2f}s"
+        )
+    if args.gate_only:
+        checks = max(1, gate.frames_checked)
+        overhead_ms = (gated["cpu_sec"] - baseline["cpu_sec"]) * 1000.0 / checks
+        print(f"gate overhead: {overhead_ms:.2f} ms/check, skipped {gate.skip_ratio() * 100:.1f}% of checks")
+        return
+    if baseline["cpu_sec"] > 0:
+        saving = 1.0 - gated["cpu_sec"] / baseline["cpu_sec"]
+        print(f"cpu saving: {saving * 100:.1f}% (gate skipped {gate.skip_ratio() * 100:.1f}% of checks)")
+
+
+if __name__ == "__main__":
+    main()
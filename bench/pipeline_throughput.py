@@ -0,0 +1,137 @@
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.pipelined import PipelinedInferenceService
+from runtime import DoorbellRuntime
+
+
+class _SyntheticFace:
+    """Stand-in face backend whose stages sleep like ONNX calls (GIL released)."""
+
+    def __init__(self, detect_ms, embed_ms):
+        self.detect_sec = detect_ms / 1000.0
+        self.embed_sec = embed_ms / 1000.0
+
+    def detect_faces(self, frame):
+        time.sleep(self.detect_sec)
+        box = SimpleNamespace(xmin=0.3, ymin=0.2, width=0.4, height=0.5)
+        points = [SimpleNamespace(x=0.45, y=0.4), SimpleNamespace(x=0.55, y=0.4), SimpleNamespace(x=0.5, y=0.5)]
+        location = SimpleNamespace(relative_bounding_box=box, relative_keypoints=points)
+        return SimpleNamespace(detections=[SimpleNamespace(location_data=location)])
+
+    def update_last_face(self, frame, detection):
+        time.sleep(self.embed_sec)
+        embedding = np.full((8,), float(frame[0, 0, 0]), dtype=np.float32)
+        return frame[:8, :8].copy(), embedding, (0, 0, 8, 8)
+
+    def recognize_embedding(self, embedding):
+        # Alternate identities in runs of three so the smoothing window matters.
+        person = int(embedding[0]) // 3 % 2
+        return f"p{person}", f"person {person}", 0.9
+
+    def reload_db(self):
+        pass
+
+
+def _load_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open recording: {path}")
+    frames = []
+    while not limit or len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _make_runtime(args):
+    if args.synthetic:
+        runtime = DoorbellRuntime(enable_face=False, enable_camera=False)
+        runtime.enable_face = True
+        runtime.face = _SyntheticFace(args.detect_ms, args.embed_ms)
+        return runtime
+    runtime = DoorbellRuntime(enable_camera=False)
+    if runtime.face is None:
+        raise SystemExit(f"face backend unavailable: {runtime._face_import_error}")
+    return runtime
+
+
+def _summary(results, wall_sec):
+    latencies = [item["latency_ms"] for item in results]
+    ids = [(item.get("id"), item.get("stabilizing")) for item in results]
+    return {
+        "fps": len(results) / wall_sec if wall_sec > 0 else 0.0,
+        "latency_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "ids": ids,
+    }
+
+
+def _run_serial(runtime, frames):
+    results = []
+    wall_start = time.perf_counter()
+    for frame in frames:
+        start = time.perf_counter()
+        result = runtime.infer_frame(frame)
+        result["latency_ms"] = (time.perf_counter() - start) * 1000.0
+        results.append(result)
+    return _summary(results, time.perf_counter() - wall_start)
+
+
+def _run_pipelined(runtime, frames):
+    results = []
+    service = PipelinedInferenceService(runtime, on_result=results.append)
+    wall_start = time.perf_counter()
+    for token, frame in enumerate(frames):
+        # Same admission rule as the Live tab: submit only when detection is free.
+        while not service.accepting():
+            time.sleep(0.0005)
+        service.submit(frame, token)
+    while len(results) < len(frames):
+        time.sleep(0.001)
+    wall_sec = time.perf_counter() - wall_start
+    service.stop()
+    tokens = [item["_token"] for item in results]
+    summary = _summary(results, wall_sec)
+    summary["ordered"] = tokens == sorted(tokens) and not any(item.get("dropped") for item in results)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and two-stage pipelined inference.")
+    parser.add_argument("recording", nargs="?", help="video file with faces")
+    parser.add_argument("--limit", type=int, default=200, help="frames to use")
+    parser.add_argument("--synthetic", action="store_true", help="use sleeping fake stages instead of models")
+    parser.add_argument("--detect-ms", type=float, default=60.0)
+    parser.add_argument("--embed-ms", type=float, default=80.0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        frames = [np.full((120, 160, 3), idx % 256, dtype=np.uint8) for idx in range(max(1, args.limit))]
+    elif args.recording:
+        frames = _load_frames(args.recording, args.limit)
+    else:
+        raise SystemExit("pass a recording or --synthetic")
+
+    serial = _run_serial(_make_runtime(args), frames)
+    pipelined = _run_pipelined(_make_runtime(args), frames)
+
+    for name, stats in (("serial", serial), ("pipelined", pipelined)):
+        print(f"{name:9s} frames={len(frames)} fps={stats['fps']:.2f} latency={stats['latency_ms']:.1f}ms")
+    if serial["fps"] > 0:
+        print(f"throughput gain: {pipelined['fps'] / serial['fps']:.2f}x")
+    print(f"ordered: {pipelined['ordered']}, smoothing identical: {serial['ids'] == pipelined['ids']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,8 +21,108 @@ try:
     EVENT_MEDIA_MAX_FILES = max(0, int(os.getenv("DOORBELL_EVENT_MEDIA_MAX_FILES", "200")))
 except ValueError:
     EVENT_MEDIA_MAX_FILES = 200
+try:
+    EVENT_MEDIA_MAX_BYTES = max(0, int(float(os.getenv("DOORBELL_EVENT_MEDIA_MAX_MB", "0")) * 1024 * 1024))
+except ValueError:
+    EVENT_MEDIA_MAX_BYTES = 0
+try:
+    EVENT_MEDIA_MAX_AGE_SEC = max(0.0, float(os.getenv("DOORBELL_EVENT_MEDIA_MAX_AGE_DAYS", "0")) * 86400.0)
+except ValueError:
+    EVENT_MEDIA_MAX_AGE_SEC = 0.0
+try:
+    EVENT_VARIANT_CACHE_BYTES = max(0, int(float(os.getenv("DOORBELL_EVENT_VARIANT_CACHE_MB", "64")) * 1024 * 1024))
+except ValueError:
+    EVENT_VARIANT_CACHE_BYTES = 64 * 1024 * 1024
+EVENT_VARIANT_THUMB_PX = 160
+EVENT_VARIANT_PREVIEW_PX = 640
+EVENT_VARIANT_FACE_PX = 256
+EVENT_VARIANT_EAGER_THUMB = os.getenv("DOORBELL_EVENT_VARIANT_EAGER_THUMB", "1").strip().lower() not in ("0", "false", "no")
+EVENT_DEDUP_ENABLED = os.getenv("DOORBELL_EVENT_DEDUP_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+EVENT_DEDUP_TYPES = ("KNOWN", "UNKNOWN")
+try:
+    EVENT_DEDUP_MAX_DISTANCE = max(0, int(os.getenv("DOORBELL_EVENT_DEDUP_MAX_DISTANCE", "6")))
+except ValueError:
+    EVENT_DEDUP_MAX_DISTANCE = 6
+try:
+    EVENT_DEDUP_WINDOW_SEC = max(0.0, float(os.getenv("DOORBELL_EVENT_DEDUP_WINDOW_SEC", "120")))
+except ValueError:
+    EVENT_DEDUP_WINDOW_SEC = 120.0
+EVENT_CLIP_ENABLED = os.getenv("DOORBELL_EVENT_CLIP_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+EVENT_CLIP_TYPES = ("RING", "KNOWN", "UNKNOWN")
+try:
+    EVENT_CLIP_PRE_SEC = max(0.0, float(os.getenv("DOORBELL_EVENT_CLIP_PRE_SEC", "4")))
+except ValueError:
+    EVENT_CLIP_PRE_SEC = 4.0
+try:
+    EVENT_CLIP_POST_SEC = max(0.0, float(os.getenv("DOORBELL_EVENT_CLIP_POST_SEC", "4")))
+except ValueError:
+    EVENT_CLIP_POST_SEC = 4.0
+try:
+    EVENT_CLIP_FPS = max(1.0, float(os.getenv("DOORBELL_EVENT_CLIP_FPS", "5")))
+except ValueError:
+    EVENT_CLIP_FPS = 5.0
+try:
+    EVENT_CLIP_BUFFER_BYTES = max(64 * 1024, int(float(os.getenv("DOORBELL_EVENT_CLIP_BUFFER_MB", "8")) * 1024 * 1024))
+except ValueError:
+    EVENT_CLIP_BUFFER_BYTES = 8 * 1024 * 1024
+EVENT_CLIP_WIDTH = 480
+EVENT_CLIP_JPEG_QUALITY = 70
+EVENT_CLIP_FORMAT = os.getenv("DOORBELL_EVENT_CLIP_FORMAT", "avi").strip().lower()
+try:
+    EVENT_CLIP_MAX_FILES = max(0, int(os.getenv("DOORBELL_EVENT_CLIP_MAX_FILES", "100")))
+except ValueError:
+    EVENT_CLIP_MAX_FILES = 100
 EVENT_LOG_ENABLED = True
 EVENT_LOG_PATH = os.path.join(BASE_DIR, "logs", "events.jsonl")
+try:
+    EVENT_LOG_SEGMENT_BYTES = max(4096, int(float(os.getenv("DOORBELL_EVENT_LOG_SEGMENT_KB", "256")) * 1024))
+except ValueError:
+    EVENT_LOG_SEGMENT_BYTES = 256 * 1024
+try:
+    EVENT_LOG_RETAIN_ITEMS = max(0, int(os.getenv("DOORBELL_EVENT_LOG_RETAIN_ITEMS", "5000")))
+except ValueError:
+    EVENT_LOG_RETAIN_ITEMS = 5000
+EVENT_LOG_GZIP = os.getenv("DOORBELL_EVENT_LOG_GZIP", "0").strip().lower() in ("1", "true", "yes")
+EVENT_INDEX_ENABLED = os.getenv("DOORBELL_EVENT_INDEX", "1").strip().lower() not in ("0", "false", "no")
+EVENT_INDEX_PATH = os.getenv("DOORBELL_EVENT_INDEX_PATH", os.path.join(BASE_DIR, "logs", "events.sqlite3"))
+try:
+    EVENT_INDEX_RETAIN_DAYS = max(0.0, float(os.getenv("DOORBELL_EVENT_INDEX_RETAIN_DAYS", "180")))
+except ValueError:
+    EVENT_INDEX_RETAIN_DAYS = 180.0
+try:
+    EVENT_STREAM_REPLAY = max(1, int(os.getenv("DOORBELL_EVENT_STREAM_REPLAY", "200")))
+except ValueError:
+    EVENT_STREAM_REPLAY = 200
+try:
+    EVENT_STREAM_CLIENT_BUFFER = max(1, int(os.getenv("DOORBELL_EVENT_STREAM_CLIENT_BUFFER", "32")))
+except ValueError:
+    EVENT_STREAM_CLIENT_BUFFER = 32
+try:
+    EVENT_STREAM_KEEPALIVE_SEC = max(1.0, float(os.getenv("DOORBELL_EVENT_STREAM_KEEPALIVE_SEC", "15")))
+except ValueError:
+    EVENT_STREAM_KEEPALIVE_SEC = 15.0
+try:
+    EVENT_QUERY_MAX_LIMIT = max(1, int(os.getenv("DOORBELL_EVENT_QUERY_MAX_LIMIT", "500")))
+except ValueError:
+    EVENT_QUERY_MAX_LIMIT = 500
+EVENT_WRITE_ASYNC = os.getenv("DOORBELL_EVENT_WRITE_ASYNC", "1").strip().lower() not in ("0", "false", "no")
+try:
+    EVENT_WRITE_QUEUE_SIZE = max(1, int(os.getenv("DOORBELL_EVENT_WRITE_QUEUE_SIZE", "16")))
+except ValueError:
+    EVENT_WRITE_QUEUE_SIZE = 16
+EVENT_WRITE_OVERFLOW = os.getenv("DOORBELL_EVENT_WRITE_OVERFLOW", "drop_oldest").strip().lower()
+try:
+    LIVE_VIEW_WIDTH = max(64, int(os.getenv("DOORBELL_LIVE_WIDTH", "640")))
+except ValueError:
+    LIVE_VIEW_WIDTH = 640
+try:
+    LIVE_VIEW_FPS = max(0.5, float(os.getenv("DOORBELL_LIVE_FPS", "10")))
+except ValueError:
+    LIVE_VIEW_FPS = 10.0
+try:
+    LIVE_VIEW_JPEG_QUALITY = min(100, max(10, int(os.getenv("DOORBELL_LIVE_JPEG_QUALITY", "70"))))
+except ValueError:
+    LIVE_VIEW_JPEG_QUALITY = 70
 
 # =========================================================
 # FIREBASE RTDB (optional)
@@ -39,6 +139,26 @@ FIREBASE_RTDB_ENABLE = os.getenv("DOORBELL_FIREBASE_ENABLE", "1").strip().lower(
     "no",
 )
 
+# =========================================================
+# HARDWARE SIMULATION (sim/)
+# =========================================================
+# Servo, LED, ring button, LCD, camera and face backend become simulated
+# devices that record what they were told to do (python -m sim.harness).
+HW_SIM = os.getenv("DOORBELL_HW_SIM", "0").strip().lower() not in ("0", "false", "no", "")
+# Video file, image folder or image replayed as the camera; empty = synthetic porch.
+SIM_CAMERA_SOURCE = os.getenv("DOORBELL_SIM_CAMERA_SOURCE", "").strip()
+try:
+    SIM_CAMERA_FPS = max(1.0, float(os.getenv("DOORBELL_SIM_CAMERA_FPS", "15")))
+except ValueError:
+    SIM_CAMERA_FPS = 15.0
+# Comma-separated press times (seconds after start) for the simulated ring button.
+SIM_BUTTON_SCRIPT = os.getenv("DOORBELL_SIM_BUTTON_SCRIPT", "").strip()
+SIM_FACE_NAME = os.getenv("DOORBELL_SIM_FACE_NAME", "Sim Person").strip() or "Sim Person"
+try:
+    SIM_HISTORY = max(16, int(os.getenv("DOORBELL_SIM_HISTORY", "10000")))
+except ValueError:
+    SIM_HISTORY = 10000
+
 # =========================================================
 # CAMERA CONFIG
 # =========================================================
@@ -59,7 +179,7 @@ FACE_ROI_MIN_COVERAGE = float(os.getenv("FACE_ROI_MIN_COVERAGE", "0.5"))
 FACE_ROI_CENTER_TOLERANCE_X = float(os.getenv("FACE_ROI_CENTER_TOLERANCE_X", "0.15"))
 
 # Face backend selection
-FACE_BACKEND = os.getenv("DOORBELL_FACE_BACKEND", "insightface").strip().lower()
+FACE_BACKEND = os.getenv("DOORBELL_FACE_BACKEND", "sim" if HW_SIM else "insightface").strip().lower()
 FACE_BACKEND_STRICT = os.getenv("DOORBELL_FACE_STRICT", "1").strip().lower() not in ("0", "false", "no")
 INSIGHTFACE_DET_MODEL_PATH = os.getenv(
     "DOORBELL_INSIGHTFACE_DET_MODEL",
@@ -98,6 +218,25 @@ try:
     GUI_INFER_TIMEOUT_SEC = max(2.0, float(os.getenv("DOORBELL_GUI_INFER_TIMEOUT_SEC", "8")))
 except ValueError:
     GUI_INFER_TIMEOUT_SEC = 8.0
+# Run the face pipeline in a separate process (frames passed via shared memory)
+GUI_INFER_PROCESS = os.getenv("DOORBELL_INFER_PROCESS", "0").strip().lower() not in ("0", "false", "no")
+GUI_INFER_PIPELINED = os.getenv("DOORBELL_INFER_PIPELINED", "0").strip().lower() not in ("0", "false", "no")
+try:
+    INFER_PROCESS_SLOTS = max(2, int(os.getenv("DOORBELL_INFER_PROCESS_SLOTS", "3")))
+except ValueError:
+    INFER_PROCESS_SLOTS = 3
+try:
+    INFER_PROCESS_HANG_SEC = max(1.0, float(os.getenv("DOORBELL_INFER_PROCESS_HANG_SEC", "15")))
+except ValueError:
+    INFER_PROCESS_HANG_SEC = 15.0
+try:
+    INFER_PROCESS_START_TIMEOUT_SEC = max(1.0, float(os.getenv("DOORBELL_INFER_PROCESS_START_TIMEOUT_SEC", "120")))
+except ValueError:
+    INFER_PROCESS_START_TIMEOUT_SEC = 120.0
+try:
+    GUI_INFER_WORKERS = max(1, int(os.getenv("DOORBELL_GUI_INFER_WORKERS", "1")))
+except ValueError:
+    GUI_INFER_WORKERS = 1
 
 FACE_DISTANCE_PROMPT_ENABLED = os.getenv("DOORBELL_FACE_DISTANCE_PROMPT", "1").strip().lower() not in ("0", "false", "no")
 try:
@@ -106,6 +245,36 @@ except ValueError:
     FACE_DISTANCE_PROMPT_COOLDOWN_SEC = 3.0
 FACE_DISTANCE_PROMPT_CMD = os.getenv("DOORBELL_FACE_DISTANCE_PROMPT_CMD", "")
 
+# =========================================================
+# RESULT BUS (door/alert/LCD/event consumers off the GUI thread)
+# =========================================================
+RESULT_BUS_ENABLED = os.getenv("DOORBELL_RESULT_BUS", "1").strip().lower() not in ("0", "false", "no")
+try:
+    RESULT_BUS_QUEUE_SIZE = max(1, int(os.getenv("DOORBELL_RESULT_BUS_QUEUE_SIZE", "8")))
+except ValueError:
+    RESULT_BUS_QUEUE_SIZE = 8
+
+# =========================================================
+# LATENCY TRACING (utils/tracing.py)
+# =========================================================
+# Spans from frame capture / ring press to door actuation and event storage,
+# kept in a ring buffer (GET /traces, GET /traces/chrome).
+TRACE_ENABLED = os.getenv("DOORBELL_TRACE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+try:
+    TRACE_BUFFER_SIZE = max(64, int(os.getenv("DOORBELL_TRACE_BUFFER_SIZE", "4096")))
+except ValueError:
+    TRACE_BUFFER_SIZE = 4096
+# Chrome trace-event JSON written when the headless daemon stops (empty = off).
+TRACE_EXPORT_PATH = os.getenv("DOORBELL_TRACE_EXPORT_PATH", "").strip()
+
+# =========================================================
+# HEADLESS DAEMON (run_headless.py)
+# =========================================================
+try:
+    HEADLESS_FRAME_INTERVAL_SEC = max(0.01, float(os.getenv("DOORBELL_HEADLESS_FRAME_INTERVAL_SEC", "0.1")))
+except ValueError:
+    HEADLESS_FRAME_INTERVAL_SEC = 0.1
+
 # =========================================================
 # ABOUT TAB ACCESS
 # =========================================================
@@ -145,7 +314,67 @@ MULTI_FRAME_COUNT = 3
 # GPIO
 # =========================================================
 BUTTON_PIN = 17
-MOTION_PIN = 27
+try:
+    MOTION_PIN = int(os.getenv("DOORBELL_MOTION_PIN", "27"))
+except ValueError:
+    MOTION_PIN = 27
+
+# =========================================================
+# MOTION GATE (skip inference on static scenes)
+# =========================================================
+MOTION_GATE_ENABLED = os.getenv("DOORBELL_MOTION_GATE", "1").strip().lower() not in ("0", "false", "no")
+try:
+    MOTION_GATE_DOWNSCALE_WIDTH = max(32, int(os.getenv("DOORBELL_MOTION_GATE_WIDTH", "160")))
+except ValueError:
+    MOTION_GATE_DOWNSCALE_WIDTH = 160
+try:
+    MOTION_GATE_PIXEL_THRESHOLD = max(1, int(os.getenv("DOORBELL_MOTION_GATE_PIXEL_THRESHOLD", "25")))
+except ValueError:
+    MOTION_GATE_PIXEL_THRESHOLD = 25
+try:
+    MOTION_GATE_MIN_AREA = max(0.0, float(os.getenv("DOORBELL_MOTION_GATE_MIN_AREA", "0.01")))
+except ValueError:
+    MOTION_GATE_MIN_AREA = 0.01
+try:
+    MOTION_GATE_BG_ALPHA = min(1.0, max(0.001, float(os.getenv("DOORBELL_MOTION_GATE_BG_ALPHA", "0.5"))))
+except ValueError:
+    MOTION_GATE_BG_ALPHA = 0.5
+try:
+    MOTION_GATE_HOLD_SEC = max(0.0, float(os.getenv("DOORBELL_MOTION_GATE_HOLD_SEC", "1.5")))
+except ValueError:
+    MOTION_GATE_HOLD_SEC = 1.5
+try:
+    MOTION_GATE_KEEPALIVE_SEC = max(0.0, float(os.getenv("DOORBELL_MOTION_GATE_KEEPALIVE_SEC", "3")))
+except ValueError:
+    MOTION_GATE_KEEPALIVE_SEC = 3.0
+# PIR combine mode: "off" (software only), "or", "and", "pir" (PIR only)
+MOTION_PIR_MODE = os.getenv("DOORBELL_MOTION_PIR_MODE", "off").strip().lower()
+
+# =========================================================
+# INFERENCE SCHEDULER (replaces fixed N_DETECTION_FRAMES cadence)
+# =========================================================
+INFER_SCHED_ENABLED = os.getenv("DOORBELL_INFER_SCHED", "1").strip().lower() not in ("0", "false", "no")
+try:
+    INFER_SCHED_IDLE_INTERVAL_SEC = max(0.0, float(os.getenv("DOORBELL_INFER_SCHED_IDLE_SEC", "0.5")))
+except ValueError:
+    INFER_SCHED_IDLE_INTERVAL_SEC = 0.5
+try:
+    INFER_SCHED_ACTIVE_INTERVAL_SEC = max(0.0, float(os.getenv("DOORBELL_INFER_SCHED_ACTIVE_SEC", "0.1")))
+except ValueError:
+    INFER_SCHED_ACTIVE_INTERVAL_SEC = 0.1
+try:
+    INFER_SCHED_CPU_BUDGET = min(1.0, max(0.05, float(os.getenv("DOORBELL_INFER_SCHED_CPU_BUDGET", "0.6"))))
+except ValueError:
+    INFER_SCHED_CPU_BUDGET = 0.6
+try:
+    INFER_SCHED_LATENCY_SLO_MS = max(0, int(os.getenv("DOORBELL_INFER_SCHED_LATENCY_SLO_MS", "0")))
+except ValueError:
+    INFER_SCHED_LATENCY_SLO_MS = 0
+try:
+    INFER_SCHED_BACKOFF = max(1.0, float(os.getenv("DOORBELL_INFER_SCHED_BACKOFF", "1.5")))
+except ValueError:
+    INFER_SCHED_BACKOFF = 1.5
+INFER_SCHED_LOG = os.getenv("DOORBELL_INFER_SCHED_LOG", "0").strip().lower() not in ("0", "false", "no")
 
 # =========================================================
 # DOORBELL BUTTON
@@ -160,6 +389,14 @@ RING_SOUND_MP3 = os.getenv(
 )
 RING_SOUND_PLAYER = os.getenv("DOORBELL_RING_SOUND_PLAYER", "cvlc --play-and-exit --quiet {path}")
 RING_COOLDOWN_SEC = float(os.getenv("DOORBELL_RING_COOLDOWN_SEC", "1.5"))
+try:
+    RING_RESULT_MAX_AGE_SEC = max(0.0, float(os.getenv("DOORBELL_RING_RESULT_MAX_AGE_SEC", "1.0")))
+except ValueError:
+    RING_RESULT_MAX_AGE_SEC = 1.0
+try:
+    RING_INFER_TIMEOUT_SEC = max(0.1, float(os.getenv("DOORBELL_RING_INFER_TIMEOUT_SEC", "1.5")))
+except ValueError:
+    RING_INFER_TIMEOUT_SEC = 1.5
 
 
 # =========================================================
@@ -180,6 +417,8 @@ LCD_COLS = int(os.getenv("DOORBELL_LCD_COLS", "16"))
 LCD_ROWS = int(os.getenv("DOORBELL_LCD_ROWS", "2"))
 LCD_BACKLIGHT = os.getenv("DOORBELL_LCD_BACKLIGHT", "1").strip().lower() not in ("0", "false", "no")
 LCD_UPDATE_MIN_INTERVAL_SEC = float(os.getenv("DOORBELL_LCD_UPDATE_MIN_INTERVAL_SEC", "0.2"))
+# Send changed characters as smbus block writes (disable for adapters without i2c block support).
+LCD_I2C_BLOCK_WRITES = os.getenv("DOORBELL_LCD_I2C_BLOCK_WRITES", "1").strip().lower() not in ("0", "false", "no")
 
 
 # =========================================================
@@ -214,6 +453,18 @@ except ValueError:
     DOOR_CLOSE_DELAY_SEC = 2.0
 DOOR_REQUIRE_KNOWN = True
 DOOR_REQUIRE_REAL = False
+try:
+    DOOR_COMMAND_MIN_MOVE_SEC = max(0.0, float(os.getenv("DOORBELL_DOOR_COMMAND_MIN_MOVE_SEC", "0.3")))
+except ValueError:
+    DOOR_COMMAND_MIN_MOVE_SEC = 0.3
+try:
+    DOOR_COMMAND_IDEMPOTENCY_SEC = max(0.0, float(os.getenv("DOORBELL_DOOR_COMMAND_IDEMPOTENCY_SEC", "10.0")))
+except ValueError:
+    DOOR_COMMAND_IDEMPOTENCY_SEC = 10.0
+try:
+    DOOR_COMMAND_TIMEOUT_SEC = max(0.1, float(os.getenv("DOORBELL_DOOR_COMMAND_TIMEOUT_SEC", "5.0")))
+except ValueError:
+    DOOR_COMMAND_TIMEOUT_SEC = 5.0
 
 
 
@@ -228,6 +479,37 @@ DOOR_CLOSE_SOUND_ENABLED = os.getenv("DOORBELL_DOOR_CLOSE_SOUND_ENABLED", "1").s
 DOOR_CLOSE_SOUND_MP3 = os.getenv("DOORBELL_DOOR_CLOSE_SOUND_MP3", os.path.join(BASE_DIR, "sounds", "Am_thanh_tieng_Dong_cua-www_tiengdong_com.mp3"))
 DOOR_CLOSE_SOUND_PLAYER = os.getenv("DOORBELL_DOOR_CLOSE_SOUND_PLAYER", "cvlc --play-and-exit --quiet {path}")
 
+# =========================================================
+# AUDIO SERVICE
+# =========================================================
+# Sounds are decoded once and mixed into one open output stream; the *_PLAYER
+# commands above are only used when the service is disabled or has no output.
+AUDIO_ENABLED = os.getenv("DOORBELL_AUDIO_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+# auto | sounddevice | aplay | null | file:/path/out.wav
+AUDIO_SINK = os.getenv("DOORBELL_AUDIO_SINK", "auto").strip() or "auto"
+AUDIO_DEVICE = os.getenv("DOORBELL_AUDIO_DEVICE", "").strip()
+AUDIO_PRELOAD_DIR = os.getenv("DOORBELL_AUDIO_PRELOAD_DIR", os.path.join(BASE_DIR, "sounds"))
+try:
+    AUDIO_SAMPLE_RATE = max(8000, int(os.getenv("DOORBELL_AUDIO_SAMPLE_RATE", "22050")))
+except ValueError:
+    AUDIO_SAMPLE_RATE = 22050
+try:
+    AUDIO_CHANNELS = min(2, max(1, int(os.getenv("DOORBELL_AUDIO_CHANNELS", "1"))))
+except ValueError:
+    AUDIO_CHANNELS = 1
+try:
+    AUDIO_BLOCK_MS = min(100, max(5, int(os.getenv("DOORBELL_AUDIO_BLOCK_MS", "20"))))
+except ValueError:
+    AUDIO_BLOCK_MS = 20
+try:
+    AUDIO_MAX_VOICES = max(1, int(os.getenv("DOORBELL_AUDIO_MAX_VOICES", "4")))
+except ValueError:
+    AUDIO_MAX_VOICES = 4
+try:
+    AUDIO_DUCK_GAIN = min(1.0, max(0.0, float(os.getenv("DOORBELL_AUDIO_DUCK_GAIN", "0.3"))))
+except ValueError:
+    AUDIO_DUCK_GAIN = 0.3
+
 # =========================================================
 # TELEGRAM CONFIG
 # =========================================================
@@ -3,6 +3,10 @@ from config import FACE_BACKEND, FACE_BACKEND_STRICT
 
 def create_face_recognition():
     backend = str(FACE_BACKEND or "").strip().lower()
+    if backend == "sim":
+        from sim.face import SimFaceRecognition
+
+        return SimFaceRecognition()
     if backend in ("insightface", "arcface", "onnx"):
         try:
             from face.insightface_recognition import InsightFaceRecognition
@@ -2,9 +2,12 @@ import os
 import shlex
 import shutil
 import subprocess
-import threading
 import time
 
+from sim.devices import SimLED, register, sim_enabled
+from utils.audio_service import PRIORITY_ALERT, get_audio_service
+from utils.scheduler import get_scheduler
+
 try:
     import config as _config
 except Exception:
@@ -56,10 +59,11 @@ def _env_str(key, default=""):
 
 class LightController:
     _shared_devices = {}
-    def __init__(self, pin, active_high=True, on_sec=2.0):
+    def __init__(self, pin, active_high=True, on_sec=2.0, scheduler=None):
         self.pin = int(pin) if pin else 0
         self.active_high = bool(active_high)
         self.on_sec = float(on_sec) if on_sec is not None else 0.0
+        self._scheduler = scheduler
         self._device = None
         self._off_timer = None
         self._state = False
@@ -69,21 +73,32 @@ class LightController:
                 self._device = LightController._shared_devices[key]
             else:
                 try:
-                    from gpiozero import LED
+                    if sim_enabled():
+                        self._device = register(f"led:{self.pin}", SimLED(self.pin, active_high=self.active_high))
+                    else:
+                        from gpiozero import LED
 
-                    self._device = LED(self.pin, active_high=self.active_high)
+                        self._device = LED(self.pin, active_high=self.active_high)
                     LightController._shared_devices[key] = self._device
                 except Exception:
                     self._device = None
 
     def _cancel_timer(self):
         if self._off_timer is not None:
-            try:
-                self._off_timer.cancel()
-            except Exception:
-                pass
+            self._off_timer.cancel()
             self._off_timer = None
 
+    def _timed_off(self, handle):
+        # A set_state()/trigger() after this timer was due supersedes it.
+        if self._off_timer is not handle:
+            return
+        self._off_timer = None
+        try:
+            self._device.off()
+            self._state = False
+        except Exception:
+            pass
+
     def set_state(self, on):
         if self._device is None:
             return False
@@ -107,9 +122,9 @@ class LightController:
             self._device.on()
             self._state = True
             if self.on_sec and self.on_sec > 0:
-                self._off_timer = threading.Timer(self.on_sec, self._device.off)
-                self._off_timer.daemon = True
-                self._off_timer.start()
+                scheduler = self._scheduler or get_scheduler()
+                handle = scheduler.call_later(self.on_sec, lambda: self._timed_off(handle), name="led-off")
+                self._off_timer = handle
             return True
         except Exception:
             return False
@@ -124,9 +139,10 @@ class LightController:
 
 
 class SoundPlayer:
-    def __init__(self, path, cmd=""):
+    def __init__(self, path, cmd="", priority=PRIORITY_ALERT):
         self.path = path
         self.cmd = cmd
+        self.priority = priority
         self._resolved_cmd = None
         self._enabled = False
 
@@ -142,6 +158,11 @@ class SoundPlayer:
                         break
 
     def play(self):
+        # Shared mixer first (no process start per play), command as fallback.
+        if self.path and os.path.isfile(self.path):
+            audio = get_audio_service()
+            if audio is not None and audio.play(self.path, priority=self.priority):
+                return True
         if not self._enabled or not self._resolved_cmd:
             return False
         try:
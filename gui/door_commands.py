@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_DOOR_COMMAND_MIN_MOVE_SEC = _get_cfg("DOOR_COMMAND_MIN_MOVE_SEC", 0.3)
+CONFIG_DOOR_COMMAND_IDEMPOTENCY_SEC = _get_cfg("DOOR_COMMAND_IDEMPOTENCY_SEC", 10.0)
+CONFIG_DOOR_COMMAND_TIMEOUT_SEC = _get_cfg("DOOR_COMMAND_TIMEOUT_SEC", 5.0)
+
+OPEN = "open"
+CLOSE = "close"
+FACE = "face"
+
+
+class DoorCommand:
+    """One queued request; ``wait()`` returns the outcome dict, ``add_done_callback()`` delivers it."""
+
+    def __init__(self, kind, event_id=None, source=None, result=None, require_known=None):
+        self.kind = kind
+        self.event_id = event_id
+        self.source = source
+        self.result = result
+        self.require_known = require_known
+        self.submit_ts = time.monotonic()
+        self.outcome = None
+        self.followers = []
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def key(self):
+        return (self.kind, self.event_id) if self.event_id else None
+
+    def resolve(self, outcome, coalesced=False):
+        with self._lock:
+            self.outcome = dict(outcome, coalesced=coalesced)
+            callbacks, self._callbacks = self._callbacks, []
+        self._done.set()
+        for callback in callbacks:
+            self._call(callback)
+        for follower in self.followers:
+            follower.resolve(outcome, coalesced=True)
+
+    def add_done_callback(self, callback):
+        """``callback(outcome)`` on the resolving thread, or right away if already resolved."""
+        with self._lock:
+            if self.outcome is None:
+                self._callbacks.append(callback)
+                return
+        self._call(callback)
+
+    def _call(self, callback):
+        try:
+            callback(self.outcome)
+        except Exception as exc:
+            print(f"DoorCommandQueue: callback failed ({exc})")
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            return None
+        return self.outcome
+
+
+class DoorCommandQueue:
+    """Serializes every door/light command onto one ``door-commands`` thread.
+
+    API taps (``open``/``close``) and face-hold updates (``face``) used to
+    call ``DoorController`` from whichever thread produced them. Here they
+    are queued and applied in order, and:
+
+    - a pending open/close is replaced by a newer open/close (last wanted
+      state wins) and a pending face update by a newer one; replaced
+      requests get the outcome of the command that superseded them;
+    - a servo transition within ``min_move_sec`` of the previous one waits
+      out the gap, so open/close flapping collapses instead of moving the
+      servo back and forth;
+    - an open/close repeating the ``eventId`` of one applied in the last
+      ``idempotency_sec`` returns the first outcome (``duplicate``) without
+      touching the door, as long as the door is still in that state.
+
+    Outcomes report the state after coalescing (``doorOpen``).
+    """
+
+    def __init__(
+        self,
+        door,
+        min_move_sec=CONFIG_DOOR_COMMAND_MIN_MOVE_SEC,
+        idempotency_sec=CONFIG_DOOR_COMMAND_IDEMPOTENCY_SEC,
+        timeout_sec=CONFIG_DOOR_COMMAND_TIMEOUT_SEC,
+        clock=time.monotonic,
+    ):
+        self.door = door
+        self.min_move_sec = max(0.0, float(min_move_sec))
+        self.idempotency_sec = max(0.0, float(idempotency_sec))
+        self.timeout_sec = max(0.1, float(timeout_sec))
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._recent = OrderedDict()
+        self._thread = None
+        self._closing = False
+        self._last_move_ts = None
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.duplicates = 0
+        self._latency_ms = deque(maxlen=200)
+
+    # ----- submit -----
+    def submit(self, kind, event_id=None, source=None, result=None, require_known=None):
+        command = DoorCommand(kind, event_id, source, result, require_known)
+        with self._cond:
+            self.submitted += 1
+            if self._closing:
+                command.resolve(self._outcome(False, "door commands stopped"))
+                return command
+            key = command.key
+            if key is not None:
+                recent = self._recent.get(key)
+                if (
+                    recent is not None
+                    and self.clock() - recent[0] <= self.idempotency_sec
+                    and self._is_open() == (kind == OPEN)
+                ):
+                    self.duplicates += 1
+                    command.resolve(dict(recent[1], duplicate=True, doorOpen=self._is_open()))
+                    return command
+                for queued in self._pending:
+                    if queued.key == key:
+                        self.duplicates += 1
+                        queued.followers.append(command)
+                        return command
+            same = (OPEN, CLOSE) if kind in (OPEN, CLOSE) else (FACE,)
+            for queued in [c for c in self._pending if c.kind in same]:
+                self._pending.remove(queued)
+                command.followers.append(queued)
+                self.coalesced += 1
+            self._pending.append(command)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="door-commands", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return command
+
+    def _run_and_wait(self, command, timeout):
+        outcome = command.wait(self.timeout_sec if timeout is None else timeout)
+        if outcome is None:
+            return self._outcome(False, "door command timed out")
+        return outcome
+
+    def open(self, event_id=None, source=None, timeout=None):
+        """Open (auto-close) and light on; blocks until applied or coalesced."""
+        return self._run_and_wait(self.submit(OPEN, event_id=event_id, source=source), timeout)
+
+    def close(self, event_id=None, source=None, timeout=None):
+        return self._run_and_wait(self.submit(CLOSE, event_id=event_id, source=source), timeout)
+
+    def face(self, result, require_known=None, timeout=None):
+        """Face-hold update (``DoorController.handle_result``)."""
+        return self._run_and_wait(self.submit(FACE, result=result, require_known=require_known), timeout)
+
+    # ----- worker -----
+    def _is_open(self):
+        return bool(getattr(self.door, "_is_open", False))
+
+    def _outcome(self, ok, message="", light_ok=False):
+        return {
+            "ok": bool(ok),
+            "message": message,
+            "lightOk": bool(light_ok),
+            "doorOpen": self._is_open(),
+            "duplicate": False,
+        }
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                command = self._pending[0]
+                moves = command.kind in (OPEN, CLOSE) and self._is_open() != (command.kind == OPEN)
+                if moves and self._last_move_ts is not None and not self._closing:
+                    remaining = self.min_move_sec - (self.clock() - self._last_move_ts)
+                    if remaining > 0:
+                        # A newer open/close arriving meanwhile replaces this one.
+                        self._cond.wait(remaining)
+                        continue
+                self._pending.popleft()
+            trace = command.result.get("trace") if command.result else None
+            if trace is not None:
+                trace.record("door.queue", command.submit_ts, kind=command.kind)
+            was_open = self._is_open()
+            try:
+                outcome = self._execute(command)
+            except Exception as exc:
+                outcome = self._outcome(False, f"door command failed: {exc}")
+            now = self.clock()
+            with self._cond:
+                self.executed += 1
+                if self._is_open() != was_open:
+                    self._last_move_ts = now
+                if command.key is not None and outcome.get("ok"):
+                    self._recent[command.key] = (now, outcome)
+                    self._recent.move_to_end(command.key)
+                    while len(self._recent) > 256:
+                        self._recent.popitem(last=False)
+                self._latency_ms.append((time.monotonic() - command.submit_ts) * 1000.0)
+            command.resolve(outcome)
+
+    def _execute(self, command):
+        door = self.door
+        if command.kind == OPEN:
+            ok, message = door.open_and_close()
+            try:
+                light_ok = door.set_light_state(True)
+            except Exception:
+                light_ok = False
+            return self._outcome(ok, message, light_ok)
+        if command.kind == CLOSE:
+            door.close()
+            try:
+                light_ok = door.set_light_state(False)
+            except Exception:
+                light_ok = False
+            return self._outcome(True, "door closed", light_ok)
+        held = door.handle_result(command.result, require_known=command.require_known)
+        return self._outcome(held)
+
+    def stats(self):
+        with self._cond:
+            samples = sorted(self._latency_ms)
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "duplicates": self.duplicates,
+                "servoMoves": getattr(self.door, "servo_moves", None),
+                "p50Ms": round(samples[len(samples) // 2], 2) if samples else None,
+                "maxMs": round(samples[-1], 2) if samples else None,
+            }
+
+    def close_queue(self, timeout=2.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
@@ -1,12 +1,16 @@
 import os
 import threading
-import time
 import shlex
 import shutil
 import subprocess
 
 from gui.alert import LightController
+from gui.door_commands import DoorCommandQueue
+from sim.devices import SimServo, register, sim_enabled
+from utils.audio_service import PRIORITY_ALERT, get_audio_service
 from utils.lcd_i2c import get_lcd_display
+from utils.scheduler import get_scheduler
+from utils.tracing import span
 
 try:
     import config as _config
@@ -119,7 +123,9 @@ def _env_str(key, default=""):
 
 
 class DoorController:
-    def __init__(self):
+    def __init__(self, scheduler=None):
+        # Auto-close and detach timers share one scheduler thread (and its clock).
+        self._scheduler = scheduler if scheduler is not None else get_scheduler()
         self.pin = _env_int("DOORBELL_SERVO_PIN", CONFIG_SERVO_PIN)
         self.open_angle = _env_float(
             "DOORBELL_SERVO_OPEN_ANGLE",
@@ -182,6 +188,7 @@ class DoorController:
             light_pin,
             active_high=light_active_high,
             on_sec=0.0,
+            scheduler=self._scheduler,
         )
         self._lcd = get_lcd_display()
         self.open_sound_enabled = _env_bool(
@@ -231,6 +238,16 @@ class DoorController:
         self._last_seen_ts = 0.0
         self._is_open = False
         self._light_on = False
+        self._last_angle = None
+        self.servo_moves = 0
+        # API taps and face-hold updates are applied one at a time from here.
+        self.commands = DoorCommandQueue(self)
+
+        if sim_enabled():
+            servo = SimServo(self.pin, min_angle=self.min_angle, max_angle=self.max_angle)
+            self._servo = register("servo", servo)
+            self.available = True
+            return
 
         if self.pin <= 0:
             self._error = "Servo pin not set"
@@ -272,6 +289,9 @@ class DoorController:
         path = str(self.open_sound_mp3).strip()
         if not path or not os.path.isfile(path):
             return False
+        audio = get_audio_service()
+        if audio is not None and audio.play(path, priority=PRIORITY_ALERT, key="door"):
+            return True
         cmd = str(self.open_sound_player).strip()
         args = None
         if cmd:
@@ -309,6 +329,9 @@ class DoorController:
         path = str(self.close_sound_mp3).strip()
         if not path or not os.path.isfile(path):
             return False
+        audio = get_audio_service()
+        if audio is not None and audio.play(path, priority=PRIORITY_ALERT, key="door"):
+            return True
         cmd = str(self.close_sound_player).strip()
         args = None
         if cmd:
@@ -342,59 +365,65 @@ class DoorController:
 
     def _cancel_detach_timer(self):
         if self._detach_timer is not None:
-            try:
-                self._detach_timer.cancel()
-            except Exception:
-                pass
+            self._detach_timer.cancel()
             self._detach_timer = None
 
     def _cancel_timer(self):
         if self._timer is not None:
-            try:
-                self._timer.cancel()
-            except Exception:
-                pass
+            self._timer.cancel()
             self._timer = None
 
-    def _schedule_detach_after_open(self):
-        if not self.detach_after_open:
-            return
-        delay = max(0.0, float(self.detach_open_delay_sec))
+    def _schedule_detach(self, delay, only_if_open):
+        # Called under _lock. The callback re-checks under _lock that it is still
+        # the current timer, so a detach that fired while the door was being
+        # re-opened cannot cut power to the servo.
         self._cancel_detach_timer()
+        handle = None
 
         def _do_detach():
-            try:
-                if self._servo is not None and self._is_open:
-                    self._servo.detach()
-            except Exception:
-                pass
+            with self._lock:
+                if self._detach_timer is not handle:
+                    return
+                self._detach_timer = None
+                self._detach_servo(only_if_open)
 
         if delay == 0.0:
-            _do_detach()
+            self._detach_servo(only_if_open)
         else:
-            self._detach_timer = threading.Timer(delay, _do_detach)
-            self._detach_timer.daemon = True
-            self._detach_timer.start()
+            handle = self._scheduler.call_later(delay, _do_detach, name="servo-detach")
+            self._detach_timer = handle
+
+    def _detach_servo(self, only_if_open):
+        try:
+            if self._servo is not None and (self._is_open or not only_if_open):
+                self._servo.detach()
+        except Exception:
+            pass
+
+    def _schedule_detach_after_open(self):
+        if not self.detach_after_open:
+            return
+        self._schedule_detach(max(0.0, float(self.detach_open_delay_sec)), only_if_open=True)
 
     def _schedule_detach_after_close(self):
         if not self.detach_after_close:
             return
-        delay = max(0.0, float(self.detach_delay_sec))
-        self._cancel_detach_timer()
+        self._schedule_detach(max(0.0, float(self.detach_delay_sec)), only_if_open=False)
 
-        def _do_detach():
-            try:
-                if self._servo is not None:
-                    self._servo.detach()
-            except Exception:
-                pass
+    def _schedule_auto_close(self, delay):
+        handle = None
 
-        if delay == 0.0:
-            _do_detach()
-        else:
-            self._detach_timer = threading.Timer(delay, _do_detach)
-            self._detach_timer.daemon = True
-            self._detach_timer.start()
+        def _auto_close():
+            with self._lock:
+                if self._timer is not handle:
+                    return
+                self._timer = None
+                was_open = self._close_locked()
+            if was_open:
+                self._play_close_sound()
+
+        handle = self._scheduler.call_later(delay, _auto_close, name="door-auto-close")
+        self._timer = handle
 
     def _set_light(self, on):
         if not self.light_follow or self.light is None:
@@ -424,29 +453,40 @@ class DoorController:
     def _set_angle(self, angle):
         if self._servo is None:
             return False
+        angle = float(angle)
+        if angle == self._last_angle:
+            # Already commanded there (possibly detached since): no servo pulse.
+            return True
         try:
-            self._servo.angle = float(angle)
+            self._servo.angle = angle
+            self._last_angle = angle
+            self.servo_moves += 1
             return True
         except Exception:
             return False
 
-    def _open_hold(self):
-        self._cancel_detach_timer()
-        self._cancel_timer()
-        if not self._set_angle(self.open_angle):
-            return False
-        self._is_open = True
-        self._set_light(True)
-        self._update_lcd_state(True)
-        self._schedule_detach_after_open()
-        return True
+    def _open_hold(self, trace=None):
+        with span(trace, "door.open_hold", angle=self.open_angle) as info:
+            self._cancel_detach_timer()
+            self._cancel_timer()
+            if not self._set_angle(self.open_angle):
+                info["ok"] = False
+                return False
+            if trace is not None:
+                # Servo commanded: the end of the capture -> door critical path.
+                info["sinceCaptureMs"] = trace.elapsed_ms()
+            self._is_open = True
+            self._set_light(True)
+            self._update_lcd_state(True)
+            self._schedule_detach_after_open()
+            return True
 
     def open_and_close(self):
         if not self.available:
             return False, self._error or "Servo unavailable"
         with self._lock:
             if self.hold_on_face:
-                self._last_seen_ts = time.time()
+                self._last_seen_ts = self._scheduler.now()
                 if not self._open_hold():
                     return False, "Failed to set open angle"
                 return True, "Door opened"
@@ -459,42 +499,52 @@ class DoorController:
             self._update_lcd_state(True)
             self._schedule_detach_after_open()
             if self.open_sec and self.open_sec > 0:
-                self._timer = threading.Timer(self.open_sec, self.close)
-                self._timer.daemon = True
-                self._timer.start()
+                self._schedule_auto_close(self.open_sec)
         return True, "Door opened"
 
+    def _close_locked(self):
+        was_open = bool(self._is_open)
+        self._cancel_detach_timer()
+        self._cancel_timer()
+        self._set_angle(self.close_angle)
+        self._is_open = False
+        self._set_light(False)
+        self._update_lcd_state(False)
+        self._schedule_detach_after_close()
+        return was_open
+
     def close(self):
         with self._lock:
-            was_open = bool(self._is_open)
-            self._cancel_detach_timer()
-            self._cancel_timer()
-            self._set_angle(self.close_angle)
-            self._is_open = False
-            self._set_light(False)
-            self._update_lcd_state(False)
-            self._schedule_detach_after_close()
+            was_open = self._close_locked()
         if was_open:
             self._play_close_sound()
 
-    def handle_result(self, result):
+    def handle_result(self, result, require_known=None):
         if not self.available or not self.hold_on_face or not result:
             return False
-
+        trace = result.get("trace")
+        with span(trace, "door.handle_result") as info:
+            held = self._handle_present(result, require_known, trace)
+            info["present"] = held
+            return held
+
+    def _handle_present(self, result, require_known, trace):
+        if require_known is None:
+            require_known = self.require_known
         present = bool(result.get("has_face"))
-        if present and self.require_known:
+        if present and require_known:
             present = bool(result.get("id") and result.get("name"))
             if present and result.get("stabilizing") is True:
                 present = False
         if present and self.require_real:
             present = result.get("is_real") is True
 
-        now = time.time()
+        now = self._scheduler.now()
         if present:
             self._last_seen_ts = now
             if not self._is_open:
                 with self._lock:
-                    opened = self._open_hold()
+                    opened = self._open_hold(trace)
                 if opened:
                     self._play_open_sound()
             return True
@@ -505,6 +555,7 @@ class DoorController:
         return False
 
     def shutdown(self):
+        self.commands.close_queue()
         with self._lock:
             self._cancel_detach_timer()
             self._cancel_timer()
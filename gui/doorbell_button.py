@@ -7,6 +7,8 @@ except Exception:
     _config = None
 
 from gui.alert import SoundPlayer
+from sim.devices import SimButton, register, sim_enabled
+from utils.audio_service import PRIORITY_RING
 
 CONFIG_RING_ENABLED = getattr(_config, "RING_ENABLED", True) if _config else True
 CONFIG_RING_BUTTON_PIN = getattr(_config, "RING_BUTTON_PIN", 23) if _config else 23
@@ -23,6 +25,7 @@ CONFIG_RING_SOUND_PLAYER = (
 CONFIG_RING_COOLDOWN_SEC = (
     getattr(_config, "RING_COOLDOWN_SEC", 1.5) if _config else 1.5
 )
+CONFIG_SIM_BUTTON_SCRIPT = getattr(_config, "SIM_BUTTON_SCRIPT", "") if _config else ""
 
 
 def _env_bool(key, default=False):
@@ -74,7 +77,7 @@ class DoorbellRingButton:
             "DOORBELL_RING_SOUND_PLAYER",
             CONFIG_RING_SOUND_PLAYER,
         )
-        self.sound = SoundPlayer(self.sound_mp3, cmd=self.sound_player)
+        self.sound = SoundPlayer(self.sound_mp3, cmd=self.sound_player, priority=PRIORITY_RING)
         self._on_press_cb = on_press
         self._last_ring_ts = 0.0
         self.available = False
@@ -85,6 +88,12 @@ class DoorbellRingButton:
             return
 
         try:
+            if sim_enabled():
+                self._button = register("button", SimButton(self.pin, script=CONFIG_SIM_BUTTON_SCRIPT))
+                self._button.when_pressed = self._on_pressed
+                self.available = True
+                return
+
             from gpiozero import Button
 
             self._button = Button(
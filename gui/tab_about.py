@@ -118,6 +118,9 @@ class AboutTab(QtWidgets.QWidget):
         add_row(2, "Inference", self._live_label("latency_value", "n/a"))
         add_row(3, "API", self._live_label("api_value", "n/a"))
         add_row(4, "Capture", self._live_label("capture_value", "n/a"))
+        add_row(5, "Motion gate", self._live_label("motion_value", "n/a"))
+        add_row(6, "Scheduler", self._live_label("scheduler_value", "n/a"))
+        add_row(7, "Result bus", self._live_label("bus_value", "n/a"))
 
         return card
 
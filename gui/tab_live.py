@@ -4,17 +4,16 @@ import json
 
 import cv2
 import math
-import shlex
-import shutil
-import subprocess
 from PySide6 import QtCore, QtWidgets
 
-from gui.alert import KnownPersonAlert
-from gui.door_control import DoorController
-from gui.doorbell_button import DoorbellRingButton
 from gui.qt_utils import frame_to_pixmap
-from utils.lcd_i2c import get_lcd_display
+from pipeline.inference_service import InferenceService
+from pipeline.motion_gate import MotionGate
+from pipeline.pipelined import PipelinedInferenceService
+from pipeline.process_engine import ProcessInferenceEngine
+from pipeline.scheduler import InferenceScheduler
 from runtime import DoorbellRuntime
+from service.controller import DoorbellController
 
 try:
     from config import N_DETECTION_FRAMES
@@ -22,9 +21,8 @@ except Exception:
     N_DETECTION_FRAMES = 3
 
 try:
-    from config import EVENT_CAPTURE_INTERVAL_SEC, EVENT_CAPTURE_ENABLED
+    from config import EVENT_CAPTURE_ENABLED
 except Exception:
-    EVENT_CAPTURE_INTERVAL_SEC = 5.0
     EVENT_CAPTURE_ENABLED = False
 
 try:
@@ -40,15 +38,12 @@ try:
         FACE_ROI_RELATIVE_W,
         FACE_ROI_RELATIVE_H,
         FACE_ROI_ROTATE_DEG,
-        FACE_DISTANCE_PROMPT_NEAR_MP3,
-        FACE_DISTANCE_PROMPT_FAR_MP3,
-        FACE_DISTANCE_PROMPT_PLAYER,
-        FACE_DISTANCE_PROMPT_ENABLED,
-        FACE_DISTANCE_PROMPT_COOLDOWN_SEC,
-        FACE_DISTANCE_PROMPT_CMD,
         GUI_AUTO_INFER,
         GUI_THREAD_INFER,
         GUI_INFER_TIMEOUT_SEC,
+        GUI_INFER_WORKERS,
+        GUI_INFER_PROCESS,
+        GUI_INFER_PIPELINED,
         DOOR_REQUIRE_KNOWN,
     )
 except Exception:
@@ -56,46 +51,22 @@ except Exception:
     FACE_ROI_RELATIVE_W = 0.5
     FACE_ROI_RELATIVE_H = 0.5
     FACE_ROI_ROTATE_DEG = 90.0
-    FACE_DISTANCE_PROMPT_NEAR_MP3 = ""
-    FACE_DISTANCE_PROMPT_FAR_MP3 = ""
-    FACE_DISTANCE_PROMPT_PLAYER = ""
-    FACE_DISTANCE_PROMPT_ENABLED = True
-    FACE_DISTANCE_PROMPT_COOLDOWN_SEC = 3.0
-    FACE_DISTANCE_PROMPT_CMD = ""
     GUI_AUTO_INFER = True
     GUI_THREAD_INFER = False
     GUI_INFER_TIMEOUT_SEC = 8.0
+    GUI_INFER_WORKERS = 1
+    GUI_INFER_PROCESS = False
+    GUI_INFER_PIPELINED = False
     DOOR_REQUIRE_KNOWN = False
 
 
-class InferenceWorker(QtCore.QObject):
+class InferenceResultBridge(QtCore.QObject):
     finished = QtCore.Signal(dict)
 
-    def __init__(self, runtime, frame, token):
-        super().__init__()
-        self.runtime = runtime
-        self.frame = frame
-        self.token = token
 
-    @QtCore.Slot()
-    def run(self):
-        start = time.perf_counter()
-        try:
-            result = self.runtime.infer_frame(self.frame)
-        except Exception as exc:
-            result = {
-                "has_face": False,
-                "bbox": None,
-                "embedding": None,
-                "is_real": None,
-                "id": None,
-                "name": None,
-                "score": None,
-                "error": f"infer failed: {exc}",
-            }
-        result["_token"] = self.token
-        result["latency_ms"] = int((time.perf_counter() - start) * 1000)
-        self.finished.emit(result)
+class ControllerEventBridge(QtCore.QObject):
+    event_added = QtCore.Signal(dict)
+    door_done = QtCore.Signal(str, dict)
 
 
 class LiveTab(QtWidgets.QWidget):
@@ -106,11 +77,22 @@ class LiveTab(QtWidgets.QWidget):
         self.runtime = runtime
         self.latest_frame = None
         self.latest_result = None
-        self._alert = KnownPersonAlert()
-        self._door = DoorController()
-        self._ring_button = DoorbellRingButton(on_press=self._on_ring_pressed)
+        self._event_bridge = ControllerEventBridge(self)
+        self._event_bridge.event_added.connect(self._on_event_added)
+        self._event_bridge.door_done.connect(self._on_door_command_done)
+        self._control = DoorbellController(
+            runtime,
+            frame_provider=lambda: self.latest_frame,
+            result_provider=lambda: self.latest_result,
+            on_event=self._event_bridge.event_added.emit,
+        )
+        self._alert = self._control.alert
+        self._door = self._control.door
+        self._ring_button = self._control.ring_button
         self.auto_infer = bool(GUI_AUTO_INFER)
-        self.thread_infer = bool(GUI_THREAD_INFER)
+        self.process_infer = bool(GUI_INFER_PROCESS)
+        self.pipelined_infer = bool(GUI_INFER_PIPELINED) and not self.process_infer
+        self.thread_infer = bool(GUI_THREAD_INFER) or self.process_infer or self.pipelined_infer
         try:
             self._infer_timeout_sec = max(2.0, float(GUI_INFER_TIMEOUT_SEC))
         except (TypeError, ValueError):
@@ -119,34 +101,41 @@ class LiveTab(QtWidgets.QWidget):
         self._closing = False
         self._frame_counter = 0
         self._inference_running = False
-        self._active_thread = None
-        self._active_worker = None
+        # token -> submit time; the pipelined service keeps one frame per stage.
+        self._infer_outstanding = {}
+        self._max_in_flight = 2 if self.pipelined_infer else 1
+        self._infer_service = None
+        self._infer_bridge = None
+        if self.thread_infer:
+            self._infer_bridge = InferenceResultBridge(self)
+            self._infer_bridge.finished.connect(self._on_inference_done)
+            if self.process_infer:
+                self._infer_service = ProcessInferenceEngine(
+                    runtime,
+                    on_result=self._infer_bridge.finished.emit,
+                )
+            elif self.pipelined_infer:
+                self._infer_service = PipelinedInferenceService(
+                    runtime,
+                    on_result=self._infer_bridge.finished.emit,
+                )
+            else:
+                self._infer_service = InferenceService(
+                    runtime,
+                    on_result=self._infer_bridge.finished.emit,
+                    workers=GUI_INFER_WORKERS,
+                )
         self._shown_live_status = False
         self._infer_token = 0
         self._infer_start_ts = 0.0
         self._timeout_count = 0
-        self._event_interval = float(EVENT_CAPTURE_INTERVAL_SEC)
-        self._last_event_ts = 0.0
         self._last_event_sync_ts = 0.0
         self._last_event_sync_id = None
-        self._event_capture_enabled = bool(EVENT_CAPTURE_ENABLED)
-        self._known_event_id = None
-        self._known_event_active = False
-        self._door_open_state = False
-
-        self._prompt_enabled = bool(FACE_DISTANCE_PROMPT_ENABLED)
-        try:
-            self._prompt_cooldown_sec = max(0.5, float(FACE_DISTANCE_PROMPT_COOLDOWN_SEC))
-        except (TypeError, ValueError):
-            self._prompt_cooldown_sec = 3.0
-        self._prompt_last_ts = 0.0
-        self._prompt_cmd = str(FACE_DISTANCE_PROMPT_CMD).strip()
-        self._prompt_near_mp3 = str(FACE_DISTANCE_PROMPT_NEAR_MP3).strip()
-        self._prompt_far_mp3 = str(FACE_DISTANCE_PROMPT_FAR_MP3).strip()
-        self._prompt_player = str(FACE_DISTANCE_PROMPT_PLAYER).strip()
 
         self.roi_rotate_deg = float(FACE_ROI_ROTATE_DEG)
-        self._lcd = get_lcd_display()
+        self._lcd = self._control.lcd
+        self._motion_gate = MotionGate()
+        self._scheduler = InferenceScheduler(max_in_flight=self._max_in_flight)
 
         self.preview_label = QtWidgets.QLabel("No frame")
         self.preview_label.setAlignment(QtCore.Qt.AlignCenter)
@@ -169,6 +158,10 @@ class LiveTab(QtWidgets.QWidget):
         self.score_value = QtWidgets.QLabel("n/a")
         self.stability_value = QtWidgets.QLabel("Stable")
         self.latency_value = QtWidgets.QLabel("n/a")
+        self.motion_value = QtWidgets.QLabel(self._motion_gate.describe())
+        self.scheduler_value = QtWidgets.QLabel(self._scheduler.describe())
+        self.bus_value = QtWidgets.QLabel(self._control.describe_bus())
+        self._bus_label_ts = 0.0
         self.door_state_value = QtWidgets.QLabel("Closed")
         self.api_value = QtWidgets.QLabel(f"{API_HOST}:{API_PORT}")
         self.capture_value = QtWidgets.QLabel("")
@@ -216,7 +209,7 @@ class LiveTab(QtWidgets.QWidget):
         self.toggle_auto_infer.toggled.connect(self._on_auto_infer_toggled)
 
         self.toggle_event_capture = QtWidgets.QCheckBox("Auto capture")
-        self.toggle_event_capture.setChecked(self._event_capture_enabled)
+        self.toggle_event_capture.setChecked(self._control.event_capture_enabled)
         self.toggle_event_capture.setEnabled(bool(EVENT_CAPTURE_ENABLED))
         self.toggle_event_capture.toggled.connect(self._on_capture_toggled)
 
@@ -281,93 +274,6 @@ class LiveTab(QtWidgets.QWidget):
         self.timer.timeout.connect(self._on_timer)
         self.timer.start()
 
-    def _play_prompt_mp3(self, path):
-        if not self._prompt_enabled or not path:
-            return False
-        if not os.path.isfile(path):
-            return False
-        now = time.time()
-        if now - self._prompt_last_ts < self._prompt_cooldown_sec:
-            return False
-
-        cmd = self._prompt_player
-        args = None
-        if cmd:
-            try:
-                args = shlex.split(cmd.format(path=path))
-            except Exception:
-                args = shlex.split(cmd) + [path]
-        else:
-            if shutil.which("mpg123"):
-                args = ["mpg123", "-q", path]
-            elif shutil.which("ffplay"):
-                args = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", path]
-            elif shutil.which("omxplayer"):
-                args = ["omxplayer", "-o", "local", path]
-            elif shutil.which("mpv"):
-                args = ["mpv", "--no-video", "--really-quiet", path]
-            elif shutil.which("cvlc"):
-                args = ["cvlc", "--play-and-exit", "--quiet", path]
-
-        if not args:
-            return False
-
-        try:
-            subprocess.Popen(
-                args,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            self._prompt_last_ts = now
-            return True
-        except Exception:
-            return False
-
-    def _speak_prompt(self, text):
-        if not self._prompt_enabled or not text:
-            return False
-        now = time.time()
-        if now - self._prompt_last_ts < self._prompt_cooldown_sec:
-            return False
-
-        cmd = self._prompt_cmd
-        if cmd:
-            try:
-                args = shlex.split(cmd.format(text=text))
-            except Exception:
-                args = shlex.split(cmd) + [text]
-        else:
-            args = None
-            if shutil.which("espeak-ng"):
-                args = ["espeak-ng", "-v", "vi", text]
-            elif shutil.which("espeak"):
-                args = ["espeak", "-v", "vi", text]
-
-        if not args:
-            return False
-
-        try:
-            subprocess.Popen(
-                args,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            self._prompt_last_ts = now
-            return True
-        except Exception:
-            return False
-
-    def _maybe_prompt_distance(self, size_status):
-        if size_status == "too_small":
-            if self._play_prompt_mp3(self._prompt_near_mp3):
-                return True
-            return self._speak_prompt("dua khuon mat gan hon")
-        if size_status == "too_large":
-            if self._play_prompt_mp3(self._prompt_far_mp3):
-                return True
-            return self._speak_prompt("dua khuon mat ra xa")
-        return False
-
     def _roi_bounds_px(self, shape):
         if not FACE_ROI_ENABLED:
             return None
@@ -475,8 +381,8 @@ class LiveTab(QtWidgets.QWidget):
         return overlay
 
     def _update_capture_label(self):
-        if self._event_capture_enabled:
-            self.capture_value.setText(f"On ({self._event_interval:.1f}s)")
+        if self._control.event_capture_enabled:
+            self.capture_value.setText(f"On ({self._control.event_interval:.1f}s)")
         else:
             self.capture_value.setText("Off")
 
@@ -528,37 +434,7 @@ class LiveTab(QtWidgets.QWidget):
         )
 
     def _update_lcd_status(self, result):
-        lcd = getattr(self, "_lcd", None)
-        if lcd is None:
-            return
-        door = getattr(self, "_door", None)
-        door_open = bool(door and getattr(door, "_is_open", False))
-
-        person_type = "NONE"
-        person_name = ""
-        if result and result.get("has_face"):
-            size_status = result.get("size_status")
-            if size_status == "too_small":
-                person_type = "MOVE_CLOSE"
-            elif size_status == "too_large":
-                person_type = "MOVE_FAR"
-            else:
-                is_real = result.get("is_real")
-                if is_real is False:
-                    person_type = "SPOOF"
-                else:
-                    rid = result.get("id")
-                    name = result.get("name")
-                    score = result.get("score")
-                    if rid and name and score is not None:
-                        person_type = "KNOWN"
-                        person_name = str(name)
-                    else:
-                        person_type = "UNKNOWN"
-        try:
-            lcd.set_status(door_open=door_open, person_type=person_type, person_name=person_name)
-        except Exception:
-            return
+        self._control.post_lcd(result)
 
     def _refresh_door_state(self):
         door = getattr(self, "_door", None)
@@ -572,11 +448,7 @@ class LiveTab(QtWidgets.QWidget):
         self.toggle_hold_on_face.setEnabled(available)
         self.toggle_require_known.setEnabled(available)
         self.toggle_require_real.setEnabled(available)
-        if getattr(self, "_lcd", None) is not None:
-            try:
-                self._lcd.set_status(door_open=is_open)
-            except Exception:
-                pass
+        self._control.refresh_lcd_door()
 
     def _on_auto_infer_toggled(self, checked):
         self.auto_infer = bool(checked)
@@ -586,9 +458,9 @@ class LiveTab(QtWidgets.QWidget):
             self.status_label.setText("Status: auto recognition disabled")
 
     def _on_capture_toggled(self, checked):
-        self._event_capture_enabled = bool(checked)
+        self._control.event_capture_enabled = bool(checked)
         self._update_capture_label()
-        if self._event_capture_enabled:
+        if self._control.event_capture_enabled:
             self.status_label.setText("Status: auto capture enabled")
         else:
             self.status_label.setText("Status: auto capture disabled")
@@ -640,24 +512,63 @@ class LiveTab(QtWidgets.QWidget):
                 self.system_value.setText("Live")
             self._shown_live_status = True
 
-        if self.auto_infer:
-            if self._frame_counter % max(1, int(N_DETECTION_FRAMES)) == 0:
-                self._start_inference(frame, reason="auto")
+        if self.auto_infer and self._can_start_inference():
+            if self._scheduler.enabled:
+                due = self._scheduler.due()
+            else:
+                due = self._frame_counter % max(1, int(N_DETECTION_FRAMES)) == 0
+            if due:
+                allowed, gate_reason = self._motion_gate_allows(frame)
+                if allowed:
+                    self._start_inference(frame, reason=gate_reason)
+                else:
+                    self._scheduler.on_skip(gate_reason)
+                self.scheduler_value.setText(self._scheduler.describe())
 
         self._frame_counter += 1
 
-        if self.thread_infer and self._inference_running:
+        if self.thread_infer and self._infer_outstanding:
             now = time.time()
-            if self._infer_start_ts and now - self._infer_start_ts > self._infer_timeout_sec:
-                self._on_infer_timeout(self._infer_token)
+            token, start_ts = next(iter(self._infer_outstanding.items()))
+            if now - start_ts > self._infer_timeout_sec:
+                self._on_infer_timeout(token)
 
         self._refresh_door_state()
+        self._refresh_bus_label()
+
+    def _refresh_bus_label(self):
+        now = time.monotonic()
+        if now - self._bus_label_ts < 1.0:
+            return
+        self._bus_label_ts = now
+        self.bus_value.setText(self._control.describe_bus())
+
+    def _motion_gate_allows(self, frame):
+        gate = getattr(self, "_motion_gate", None)
+        if gate is None:
+            return True, "auto"
+        face_present = bool(self.latest_result and self.latest_result.get("has_face"))
+        allowed, reason = gate.evaluate(frame, face_present=face_present)
+        self.motion_value.setText(gate.describe())
+        if not allowed:
+            # Static scene: no new result, but the door still needs its close timeout.
+            self._control.handle_static(self.latest_result)
+        return allowed, reason
+
+    def _can_start_inference(self):
+        if not self._inference_running:
+            return True
+        if not self.pipelined_infer or len(self._infer_outstanding) >= self._max_in_flight:
+            return False
+        # Detection of the next frame may start while the previous one is in recognition.
+        return self._infer_service.accepting()
 
     def _start_inference(self, frame, reason="auto"):
-        if self._closing or self._inference_running or frame is None:
+        if self._closing or frame is None or not self._can_start_inference():
             return
 
         self._inference_running = True
+        self._scheduler.on_start(reason)
         self.status_label.setText("Status: inferring...")
         self.system_value.setText("Inferring")
         self._shown_live_status = False
@@ -679,6 +590,7 @@ class LiveTab(QtWidgets.QWidget):
                 }
             result["latency_ms"] = int((time.perf_counter() - start) * 1000)
             self._inference_running = False
+            self._scheduler.on_result(result)
             self._infer_start_ts = 0.0
             self._timeout_count = 0
             self.latest_result = result
@@ -689,19 +601,13 @@ class LiveTab(QtWidgets.QWidget):
         self._infer_token += 1
         token = self._infer_token
         self._infer_start_ts = time.time()
-
-        worker = InferenceWorker(self.runtime, frame.copy(), token)
-        thread = QtCore.QThread(self)
-        worker.moveToThread(thread)
-        thread.started.connect(worker.run)
-        worker.finished.connect(self._on_inference_done)
-        worker.finished.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        thread.finished.connect(self._on_thread_finished)
-        thread.finished.connect(thread.deleteLater)
-        self._active_thread = thread
-        self._active_worker = worker
-        thread.start()
+        self._infer_outstanding[token] = self._infer_start_ts
+        job = self._infer_service.submit(frame.copy(), token, timeout_sec=self._infer_timeout_sec)
+        if job is None:
+            self._infer_outstanding.pop(token, None)
+            self._inference_running = bool(self._infer_outstanding)
+            self._scheduler.on_cancel("rejected")
+            self._infer_start_ts = 0.0
 
     def _on_inference_done(self, result):
         if self._closing:
@@ -709,30 +615,38 @@ class LiveTab(QtWidgets.QWidget):
         if not self.thread_infer:
             return
         token = result.get("_token")
-        if token != self._infer_token:
+        if token not in self._infer_outstanding:
             return
-        self._inference_running = False
+        if result.get("dropped"):
+            self._infer_outstanding.pop(token, None)
+            self._inference_running = bool(self._infer_outstanding)
+            self._scheduler.on_cancel("dropped")
+            return
+        if result.get("cancelled"):
+            self._on_infer_timeout(token)
+            return
+        self._infer_outstanding.pop(token, None)
+        self._inference_running = bool(self._infer_outstanding)
+        self._scheduler.on_result(result)
         self._infer_start_ts = 0.0
         self._timeout_count = 0
         self.latest_result = result
         self._update_status_text(result)
         self.btn_add.setEnabled(bool(result and result.get("has_face")))
-        self._active_worker = None
-        if self._active_thread is not None and not self._active_thread.isRunning():
-            self._active_thread = None
-
-    def _on_thread_finished(self):
-        self._active_thread = None
 
     def _on_infer_timeout(self, token):
         if self._closing:
             return
         if not self.thread_infer:
             return
-        if not self._inference_running or token != self._infer_token:
+        if token not in self._infer_outstanding:
             return
-        self._inference_running = False
-        self._active_worker = None
+        # Cooperative: the worker stops at its next stage boundary and its
+        # late result is ignored by the token check.
+        self._infer_service.cancel(token)
+        self._infer_outstanding.pop(token, None)
+        self._inference_running = bool(self._infer_outstanding)
+        self._scheduler.on_cancel("timeout")
         self._infer_start_ts = 0.0
         self._timeout_count += 1
         self.system_value.setText("Timeout")
@@ -745,12 +659,6 @@ class LiveTab(QtWidgets.QWidget):
         else:
             self.status_label.setText("Status: inference timeout")
 
-        thread = self._active_thread
-        if thread is not None and thread.isRunning():
-            thread.terminate()
-            thread.wait(1000)
-        self._active_thread = None
-
     def _update_status_text(self, result):
         if not result:
             self.status_label.setText("Status: no result")
@@ -778,11 +686,9 @@ class LiveTab(QtWidgets.QWidget):
         if size_status == "too_small":
             self.status_label.setText("Status: move closer")
             self.system_value.setText("Move closer")
-            self._maybe_prompt_distance(size_status)
         elif size_status == "too_large":
             self.status_label.setText("Status: move farther")
             self.system_value.setText("Move farther")
-            self._maybe_prompt_distance(size_status)
 
         rid = result.get("id")
         name = result.get("name")
@@ -807,174 +713,20 @@ class LiveTab(QtWidgets.QWidget):
         else:
             self.latency_value.setText(f"{latency_ms} ms")
 
-        size_status = result.get("size_status")
-        if size_status not in ("too_small", "too_large"):
-            door = getattr(self, "_door", None)
-            door_open_before = bool(door and getattr(door, "_is_open", False))
-            if self._alert is not None:
-                self._alert.handle_result(result)
-            if door is not None:
-                db_empty = True
-                face = getattr(self.runtime, "face", None)
-                if face is not None:
-                    try:
-                        db_empty = len(getattr(face, "DB", {}) or {}) == 0
-                    except Exception:
-                        db_empty = True
-                original_require_known = getattr(door, "require_known", False)
-                if db_empty:
-                    door.require_known = True
-                door.handle_result(result)
-                if db_empty:
-                    door.require_known = original_require_known
-            door_open_after = bool(door and getattr(door, "_is_open", False))
-            force_event = bool(door_open_after and not door_open_before)
-            self._maybe_capture_event(result, door_open=door_open_after, force=force_event)
-            if self._door_open_state and not door_open_after:
-                self._known_event_active = False
-                self._known_event_id = None
-            self._door_open_state = door_open_after
+        self._control.handle_result(result)
         self._refresh_door_state()
-        self._update_lcd_status(result)
         self._sync_last_event_label()
 
 
-    def _on_ring_pressed(self):
-        frame = None
-        if self.latest_frame is not None:
-            frame = self.latest_frame.copy()
-        elif getattr(self.runtime, "last_frame", None) is not None:
-            frame = self.runtime.last_frame.copy()
-        if frame is None:
-            try:
-                frame = self.runtime.read_frame()
-            except Exception:
-                frame = None
-        if frame is None:
-            return
-
-        result = self.latest_result
-        if result is None:
-            result = getattr(self.runtime, "last_result", None)
-
-        if result is None or result.get("size_status") is None:
-            try:
-                result = self.runtime.infer_frame(frame)
-            except Exception:
-                result = result or {}
-
-        event_type = "RING"
-        person_name = None
-        meta = {"type": "doorbell"}
-        if result and result.get("has_face"):
-            rid = result.get("id")
-            name = result.get("name")
-            score = result.get("score")
-            if rid and name and score is not None:
-                event_type = "KNOWN"
-                person_name = name
-            else:
-                event_type = "UNKNOWN"
-            meta.update({
-                "id": rid,
-                "name": name,
-                "score": score,
-                "is_real": result.get("is_real"),
-                "bbox": result.get("bbox"),
-            })
-
-        try:
-            from server.event_store import get_event_store
-            store = get_event_store()
-            event = store.add_event(
-                event_type,
-                frame,
-                person_name=person_name,
-                source="button",
-                meta=meta,
-            )
-        except Exception:
-            return
+    def _on_event_added(self, event):
         if not event:
             return
-        def _update():
-            self.last_event_value.setText(
-                f"{event.get('type')} {event.get('eventId')} @ {event.get('timestamp')}"
-            )
+        self.last_event_value.setText(
+            f"{event.get('type')} {event.get('eventId')} @ {event.get('timestamp')}"
+        )
+        if event.get("source") == "button":
             self.status_label.setText("Status: doorbell pressed")
             self.system_value.setText("Ring")
-        QtCore.QTimer.singleShot(0, _update)
-
-    def _maybe_capture_event(self, result, door_open=None, force=False):
-        if not result or not result.get("has_face"):
-            return
-        if result.get("size_status") in ("too_small", "too_large"):
-            return
-        rid = result.get("id")
-        name = result.get("name")
-        score = result.get("score")
-        event_type = "KNOWN" if rid and name and score is not None else "UNKNOWN"
-        if event_type != "KNOWN":
-            return
-
-        if door_open is None:
-            door = getattr(self, "_door", None)
-            door_open = bool(door and getattr(door, "_is_open", False))
-
-        if not door_open:
-            self._known_event_active = False
-            self._known_event_id = None
-            if not force:
-                return
-
-        if door_open and self._known_event_active and not force:
-            return
-
-        if not force and not self._event_capture_enabled:
-            return
-
-        now = time.time()
-        if not force and now - self._last_event_ts < self._event_interval:
-            return
-        frame = None
-        if self.latest_frame is not None:
-            frame = self.latest_frame.copy()
-        elif getattr(self.runtime, "last_frame", None) is not None:
-            frame = self.runtime.last_frame.copy()
-        if frame is None:
-            try:
-                frame = self.runtime.read_frame()
-            except Exception:
-                frame = None
-        if frame is None:
-            return
-        person_name = name if event_type == "KNOWN" else None
-        meta = {
-            "id": rid,
-            "name": name,
-            "score": score,
-            "is_real": result.get("is_real"),
-            "bbox": result.get("bbox"),
-        }
-        try:
-            from server.event_store import get_event_store
-            store = get_event_store()
-            event = store.add_event(
-                event_type,
-                frame,
-                person_name=person_name,
-                source="gui",
-                meta=meta,
-            )
-            if event:
-                self.last_event_value.setText(
-                    f"{event.get('type')} {event.get('eventId')} @ {event.get('timestamp')}"
-                )
-                self._last_event_ts = now
-                self._known_event_active = True
-                self._known_event_id = rid
-        except Exception:
-            return
 
     def on_force_recognize(self):
         frame = self.runtime.read_frame()
@@ -985,41 +737,31 @@ class LiveTab(QtWidgets.QWidget):
         self._start_inference(frame, reason="manual")
 
     def on_open_door(self):
-        door = getattr(self, "_door", None)
-        if door is None or not getattr(door, "available", False):
+        # Queued without waiting: the servo gap or a busy queue must not freeze the GUI.
+        if not self._control.open_door(on_done=lambda outcome: self._event_bridge.door_done.emit("open", outcome)):
             self.status_label.setText("Status: door control unavailable")
             return
-        ok, message = door.open_and_close()
-        light_ok = False
-        try:
-            light_ok = door.set_light_state(True)
-        except Exception:
-            light_ok = False
-        if ok:
-            status = "Status: door opened"
-            self.system_value.setText("Door action")
-        else:
-            status = f"Status: door error: {message}"
-            self.system_value.setText("Door error")
-        if not light_ok:
-            status += " (light unavailable)"
-        self.status_label.setText(status)
-        self._refresh_door_state()
+        self.status_label.setText("Status: opening door...")
 
     def on_close_door(self):
-        door = getattr(self, "_door", None)
-        if door is None or not getattr(door, "available", False):
+        if not self._control.close_door(on_done=lambda outcome: self._event_bridge.door_done.emit("close", outcome)):
             self.status_label.setText("Status: door control unavailable")
             return
-        door.close()
-        light_ok = False
-        try:
-            light_ok = door.set_light_state(False)
-        except Exception:
-            light_ok = False
-        status = "Status: door closed"
-        self.system_value.setText("Door action")
-        if not light_ok:
+        self.status_label.setText("Status: closing door...")
+
+    def _on_door_command_done(self, kind, outcome):
+        if self._closing:
+            return
+        if kind == "close":
+            status = "Status: door closed"
+            self.system_value.setText("Door action")
+        elif outcome.get("ok"):
+            status = "Status: door opened"
+            self.system_value.setText("Door action")
+        else:
+            status = f"Status: door error: {outcome.get('message')}"
+            self.system_value.setText("Door error")
+        if not outcome.get("lightOk"):
             status += " (light unavailable)"
         self.status_label.setText(status)
         self._refresh_door_state()
@@ -1031,18 +773,9 @@ class LiveTab(QtWidgets.QWidget):
         self._closing = True
         if self.timer is not None:
             self.timer.stop()
-        if self._alert is not None:
-            self._alert.close()
-        if getattr(self, "_door", None) is not None:
-            self._door.shutdown()
-        if getattr(self, "_ring_button", None) is not None:
-            self._ring_button.close()
-        thread = self._active_thread
-        if thread is not None and thread.isRunning():
-            thread.quit()
-            thread.wait(5000)
-            if thread.isRunning():
-                thread.terminate()
-                thread.wait(1000)
-        self._active_thread = None
-        self._active_worker = None
+        if getattr(self, "_control", None) is not None:
+            self._control.shutdown()
+        if getattr(self, "_motion_gate", None) is not None:
+            self._motion_gate.close()
+        if self._infer_service is not None:
+            self._infer_service.stop(timeout=5.0)
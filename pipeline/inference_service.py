@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import deque
+
+
+def _error_result(message):
+    return {
+        "has_face": False,
+        "bbox": None,
+        "embedding": None,
+        "is_real": None,
+        "id": None,
+        "name": None,
+        "score": None,
+        "error": message,
+    }
+
+
+class InferenceJob:
+    def __init__(self, frame, token, deadline=None, meta=None):
+        self.frame = frame
+        self.token = token
+        self.deadline = deadline
+        self.meta = meta or {}
+        self.submit_ts = time.monotonic()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def expired(self, now=None):
+        if self.cancel_event.is_set():
+            return True
+        if self.deadline is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        return now > self.deadline
+
+
+class InferenceService:
+    """Long-lived inference workers fed by a size-1, drop-oldest slot.
+
+    ``submit()`` never blocks: a job that has not been picked up yet is
+    replaced by the newer one. Cancellation is cooperative; the job's cancel
+    event and deadline are passed to ``runtime.infer_frame`` which checks them
+    between pipeline stages, so a worker is never killed while it holds
+    ``infer_lock`` or is inside ONNX Runtime.
+    """
+
+    def __init__(self, runtime, on_result=None, workers=1, name="infer"):
+        self.runtime = runtime
+        self._on_result = on_result
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running = {}
+        self._stopping = False
+        self._threads = []
+
+        self.submitted = 0
+        self.dropped = 0
+        self.expired = 0
+        self.completed = 0
+        self.failed = 0
+        self._busy_sec = 0.0
+        self._started_ts = time.monotonic()
+        self._recent = deque(maxlen=100)
+
+        for idx in range(max(1, int(workers))):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"{name}-{idx}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, frame, token, timeout_sec=None, meta=None):
+        deadline = None
+        if timeout_sec is not None and timeout_sec > 0:
+            deadline = time.monotonic() + float(timeout_sec)
+        job = InferenceJob(frame, token, deadline=deadline, meta=meta)
+        # Callers submit the frame they just read, so it carries the runtime's newest capture trace.
+        job.meta.setdefault("trace", getattr(self.runtime, "frame_trace", None))
+        job.meta.setdefault("frame_seq", getattr(self.runtime, "frame_seq", None))
+        dropped = None
+        with self._cond:
+            if self._stopping:
+                return None
+            if self._pending is not None:
+                dropped = self._pending
+                dropped.cancel()
+                self.dropped += 1
+            self._pending = job
+            self.submitted += 1
+            self._cond.notify()
+        if dropped is not None:
+            self._emit_dropped(dropped, "inference dropped for a newer frame")
+        return job
+
+    def cancel(self, token=None):
+        dropped = None
+        with self._cond:
+            if self._pending is not None and (token is None or self._pending.token == token):
+                dropped = self._pending
+                dropped.cancel()
+                self._pending = None
+                self.dropped += 1
+            for job in self._running.values():
+                if token is None or job.token == token:
+                    job.cancel()
+        if dropped is not None:
+            self._emit_dropped(dropped, "inference cancelled")
+
+    def _emit_dropped(self, job, message):
+        # Same as PipelinedInferenceService: a job that never ran still reports back to its token.
+        result = _error_result(message)
+        result["cancelled"] = True
+        result["dropped"] = True
+        result["_token"] = job.token
+        if self._on_result is not None:
+            try:
+                self._on_result(result)
+            except Exception:
+                pass
+
+    def busy(self):
+        with self._cond:
+            return self._pending is not None or bool(self._running)
+
+    def _take(self):
+        with self._cond:
+            while self._pending is None and not self._stopping:
+                self._cond.wait()
+            if self._stopping:
+                return None
+            job = self._pending
+            self._pending = None
+            self._running[threading.get_ident()] = job
+            return job
+
+    def _finish(self, job, result, busy_sec):
+        with self._cond:
+            self._running.pop(threading.get_ident(), None)
+            self._busy_sec += busy_sec
+            if result.get("cancelled"):
+                self.expired += 1
+            elif result.get("error"):
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._recent.append((time.monotonic(), busy_sec))
+
+    def _worker_loop(self):
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            start = time.monotonic()
+            queue_ms = int((start - job.submit_ts) * 1000)
+            trace = job.meta.get("trace")
+            if trace is not None:
+                trace.record("infer.queue", job.submit_ts, start, token=job.token)
+            if job.expired(start):
+                result = _error_result("inference deadline exceeded before start")
+                result["cancelled"] = True
+            else:
+                try:
+                    result = self.runtime.infer_frame(
+                        job.frame,
+                        deadline=job.deadline,
+                        cancel_event=job.cancel_event,
+                        trace=trace,
+                        frame_seq=job.meta.get("frame_seq"),
+                    )
+                except Exception as exc:
+                    result = _error_result(f"infer failed: {exc}")
+            busy_sec = time.monotonic() - start
+            result["_token"] = job.token
+            result["latency_ms"] = int(busy_sec * 1000)
+            result["queue_ms"] = queue_ms
+            self._finish(job, result, busy_sec)
+            if self._on_result is not None:
+                try:
+                    self._on_result(result)
+                except Exception:
+                    pass
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            window = [item for item in self._recent if now - item[0] <= 10.0]
+            uptime = max(1e-6, now - self._started_ts)
+            return {
+                "workers": len(self._threads),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "expired": self.expired,
+                "completed": self.completed,
+                "failed": self.failed,
+                "inFlight": len(self._running),
+                "pending": self._pending is not None,
+                "throughputPerSec": round(len(window) / 10.0, 2),
+                "avgLatencyMs": int(sum(item[1] for item in window) / len(window) * 1000) if window else None,
+                "utilization": round(self._busy_sec / (uptime * len(self._threads)), 3),
+            }
+
+    def stop(self, timeout=5.0):
+        dropped = None
+        with self._cond:
+            self._stopping = True
+            if self._pending is not None:
+                dropped = self._pending
+                dropped.cancel()
+                self._pending = None
+            for job in self._running.values():
+                job.cancel()
+            self._cond.notify_all()
+        if dropped is not None:
+            self._emit_dropped(dropped, "inference service stopped")
+        end = time.monotonic() + max(0.0, float(timeout))
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, end - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
@@ -0,0 +1,229 @@
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_MOTION_GATE_ENABLED = _get_cfg("MOTION_GATE_ENABLED", True)
+CONFIG_MOTION_GATE_DOWNSCALE_WIDTH = _get_cfg("MOTION_GATE_DOWNSCALE_WIDTH", 160)
+CONFIG_MOTION_GATE_PIXEL_THRESHOLD = _get_cfg("MOTION_GATE_PIXEL_THRESHOLD", 25)
+CONFIG_MOTION_GATE_MIN_AREA = _get_cfg("MOTION_GATE_MIN_AREA", 0.01)
+CONFIG_MOTION_GATE_BG_ALPHA = _get_cfg("MOTION_GATE_BG_ALPHA", 0.5)
+CONFIG_MOTION_GATE_HOLD_SEC = _get_cfg("MOTION_GATE_HOLD_SEC", 1.5)
+CONFIG_MOTION_GATE_KEEPALIVE_SEC = _get_cfg("MOTION_GATE_KEEPALIVE_SEC", 3.0)
+CONFIG_MOTION_PIR_MODE = _get_cfg("MOTION_PIR_MODE", "off")
+CONFIG_MOTION_PIN = _get_cfg("MOTION_PIN", 0)
+CONFIG_FACE_ROI_ENABLED = _get_cfg("FACE_ROI_ENABLED", False)
+CONFIG_FACE_ROI_RELATIVE_W = _get_cfg("FACE_ROI_RELATIVE_W", 0.5)
+CONFIG_FACE_ROI_RELATIVE_H = _get_cfg("FACE_ROI_RELATIVE_H", 0.8)
+CONFIG_FACE_ROI_ROTATE_DEG = _get_cfg("FACE_ROI_ROTATE_DEG", 90.0)
+
+PIR_MODES = ("off", "or", "and", "pir")
+
+
+class _PirSensor:
+    def __init__(self, pin):
+        self.pin = int(pin) if pin else 0
+        self.available = False
+        self._error = None
+        self._sensor = None
+        if self.pin <= 0:
+            self._error = "PIR pin not set"
+            return
+        try:
+            from gpiozero import MotionSensor
+
+            self._sensor = MotionSensor(self.pin)
+            self.available = True
+        except Exception as exc:
+            self._error = f"PIR init failed: {exc}"
+            self._sensor = None
+
+    def motion_detected(self):
+        if self._sensor is None:
+            return False
+        try:
+            return bool(self._sensor.motion_detected)
+        except Exception:
+            return False
+
+    def close(self):
+        if self._sensor is not None:
+            try:
+                self._sensor.close()
+            except Exception:
+                pass
+
+
+class MotionGate:
+    """Cheap motion check run before face inference.
+
+    The frame is downscaled, converted to gray and compared against a running
+    background model inside the face ROI ellipse. Inference is allowed while
+    motion is seen, for ``hold_sec`` after it stops, while a face is still
+    reported, and once every ``keepalive_sec`` on a static scene.
+    """
+
+    def __init__(
+        self,
+        enabled=CONFIG_MOTION_GATE_ENABLED,
+        downscale_width=CONFIG_MOTION_GATE_DOWNSCALE_WIDTH,
+        pixel_threshold=CONFIG_MOTION_GATE_PIXEL_THRESHOLD,
+        min_area=CONFIG_MOTION_GATE_MIN_AREA,
+        bg_alpha=CONFIG_MOTION_GATE_BG_ALPHA,
+        hold_sec=CONFIG_MOTION_GATE_HOLD_SEC,
+        keepalive_sec=CONFIG_MOTION_GATE_KEEPALIVE_SEC,
+        pir_mode=CONFIG_MOTION_PIR_MODE,
+        pir_pin=CONFIG_MOTION_PIN,
+        roi_enabled=CONFIG_FACE_ROI_ENABLED,
+        roi_w=CONFIG_FACE_ROI_RELATIVE_W,
+        roi_h=CONFIG_FACE_ROI_RELATIVE_H,
+        roi_angle=CONFIG_FACE_ROI_ROTATE_DEG,
+    ):
+        self.enabled = bool(enabled)
+        self.downscale_width = max(32, int(downscale_width))
+        self.pixel_threshold = max(1, int(pixel_threshold))
+        self.min_area = max(0.0, float(min_area))
+        self.bg_alpha = min(1.0, max(0.001, float(bg_alpha)))
+        self.hold_sec = max(0.0, float(hold_sec))
+        self.keepalive_sec = max(0.0, float(keepalive_sec))
+        mode = str(pir_mode or "off").strip().lower()
+        self.pir_mode = mode if mode in PIR_MODES else "off"
+        self.roi_enabled = bool(roi_enabled)
+        self.roi_w = max(0.1, min(1.0, float(roi_w)))
+        self.roi_h = max(0.1, min(1.0, float(roi_h)))
+        self.roi_angle = float(roi_angle) % 360.0
+
+        self._pir = None
+        if self.enabled and self.pir_mode != "off":
+            self._pir = _PirSensor(pir_pin)
+            if not self._pir.available:
+                # Without a working sensor fall back to the software detector.
+                self.pir_mode = "off"
+
+        self._background = None
+        self._mask = None
+        self._mask_pixels = 0
+        self._last_motion_ts = 0.0
+        self._last_allow_ts = 0.0
+
+        self.frames_checked = 0
+        self.frames_allowed = 0
+        self.last_ratio = 0.0
+        self.last_reason = "init"
+
+    def reset(self):
+        self._background = None
+        self._last_motion_ts = 0.0
+        self._last_allow_ts = 0.0
+
+    def _build_mask(self, shape):
+        h, w = shape[:2]
+        mask = np.zeros((h, w), dtype=np.uint8)
+        if not self.roi_enabled:
+            mask[:] = 255
+        else:
+            center = (int(w / 2), int(h / 2))
+            axes = (max(1, int(self.roi_w * w / 2)), max(1, int(self.roi_h * h / 2)))
+            cv2.ellipse(mask, center, axes, self.roi_angle, 0, 360, 255, -1)
+        self._mask = mask
+        self._mask_pixels = max(1, int(cv2.countNonZero(mask)))
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        if w <= 0 or h <= 0:
+            return None
+        scale = self.downscale_width / float(w)
+        size = (self.downscale_width, max(1, int(round(h * scale))))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def motion_ratio(self, frame):
+        gray = self._prepare(frame)
+        if gray is None:
+            return 0.0
+        if self._mask is None or self._mask.shape != gray.shape:
+            self._build_mask(gray.shape)
+            self._background = None
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            return 1.0
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        _, moving = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        moving = cv2.bitwise_and(moving, self._mask)
+        cv2.accumulateWeighted(gray, self._background, self.bg_alpha)
+        return cv2.countNonZero(moving) / float(self._mask_pixels)
+
+    def _software_motion(self, frame):
+        if self.pir_mode == "pir":
+            return False
+        self.last_ratio = self.motion_ratio(frame)
+        return self.last_ratio >= self.min_area
+
+    def _pir_motion(self):
+        if self._pir is None or self.pir_mode == "off":
+            return False
+        return self._pir.motion_detected()
+
+    def _has_motion(self, frame):
+        if self.pir_mode == "pir":
+            return self._pir_motion()
+        software = self._software_motion(frame)
+        if self.pir_mode == "and":
+            return software and self._pir_motion()
+        if self.pir_mode == "or":
+            return software or self._pir_motion()
+        return software
+
+    def evaluate(self, frame, face_present=False, now=None):
+        if now is None:
+            now = time.time()
+        self.frames_checked += 1
+        if not self.enabled or frame is None:
+            reason = "disabled" if not self.enabled else "no_frame"
+        elif self._has_motion(frame):
+            self._last_motion_ts = now
+            reason = "motion"
+        elif face_present:
+            reason = "face"
+        elif self.hold_sec and now - self._last_motion_ts <= self.hold_sec:
+            reason = "hold"
+        elif self.keepalive_sec and now - self._last_allow_ts >= self.keepalive_sec:
+            reason = "keepalive"
+        else:
+            self.last_reason = "static"
+            return False, "static"
+
+        self.frames_allowed += 1
+        self._last_allow_ts = now
+        self.last_reason = reason
+        return True, reason
+
+    def skip_ratio(self):
+        if not self.frames_checked:
+            return 0.0
+        return 1.0 - self.frames_allowed / float(self.frames_checked)
+
+    def describe(self):
+        if not self.enabled:
+            return "Off"
+        mode = "" if self.pir_mode == "off" else f", PIR {self.pir_mode}"
+        return f"{self.last_reason} ({self.skip_ratio() * 100:.0f}% skipped{mode})"
+
+    def close(self):
+        if self._pir is not None:
+            self._pir.close()
+            self._pir = None
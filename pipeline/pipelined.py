@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+
+from pipeline.inference_service import InferenceJob, _error_result
+
+
+def _ewma(current, value, alpha=0.2):
+    if current is None:
+        return value
+    return (1.0 - alpha) * current + alpha * value
+
+
+class PipelinedInferenceService:
+    """Two-stage inference: detection of frame N+1 overlaps recognition of frame N.
+
+    Stage 1 (``runtime.detect_stage``) and stage 2 (``runtime.recognize_stage``:
+    align/embed, liveness, matching) run on their own worker threads joined
+    by a one-slot hand-off. Stage 2 is a single FIFO worker, so results are
+    emitted and ``_smooth_recognition`` is fed in submission order; frames
+    that end in stage 1 (no face, size status) also pass through the hand-off
+    to keep that order. At most one job sits in each stage, and
+    ``accepting()`` only admits a frame when its detection is expected to end
+    after recognition of the previous one, so a frame never waits between
+    stages: latency stays that of the serial path while throughput
+    approaches 1 / max(stage time). The interface matches
+    ``InferenceService`` plus ``accepting()``.
+    """
+
+    def __init__(self, runtime, on_result=None, name="infer-pipe"):
+        self.runtime = runtime
+        self._on_result = on_result
+        self._cond = threading.Condition()
+        self._pending = None
+        self._detecting = None
+        self._recognizing = None
+        self._recognize_start = 0.0
+        self._handoff = None
+        self._detect_done = False
+        self._stopping = False
+        self._detect_ewma = None
+        self._recognize_ewma = None
+
+        self.submitted = 0
+        self.dropped = 0
+        self.expired = 0
+        self.completed = 0
+        self.failed = 0
+        self._stage_sec = [0.0, 0.0]
+        self._started_ts = time.monotonic()
+        self._recent = deque(maxlen=100)
+
+        self._threads = [
+            threading.Thread(target=self._detect_loop, name=f"{name}-detect", daemon=True),
+            threading.Thread(target=self._recognize_loop, name=f"{name}-recognize", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, frame, token, timeout_sec=None, meta=None):
+        deadline = None
+        if timeout_sec is not None and timeout_sec > 0:
+            deadline = time.monotonic() + float(timeout_sec)
+        job = InferenceJob(frame, token, deadline=deadline, meta=meta)
+        job.meta.setdefault("frame_seq", getattr(self.runtime, "frame_seq", None))
+        job.meta.setdefault("trace", getattr(self.runtime, "frame_trace", None))
+        dropped = None
+        with self._cond:
+            if self._stopping:
+                return None
+            if self._pending is not None:
+                dropped = self._pending
+                dropped.cancel()
+                self.dropped += 1
+            self._pending = job
+            self.submitted += 1
+            self._cond.notify_all()
+        if dropped is not None:
+            self._emit_dropped(dropped)
+        return job
+
+    def accepting(self):
+        """True when a new frame can start detection without queueing between stages."""
+        with self._cond:
+            if self._stopping or self._pending is not None or self._detecting is not None:
+                return False
+            if self._handoff is not None:
+                return False
+            if self._recognizing is None or self._detect_ewma is None or self._recognize_ewma is None:
+                return True
+            remaining = self._recognize_ewma - (time.monotonic() - self._recognize_start)
+            return remaining <= self._detect_ewma
+
+    def cancel(self, token=None):
+        dropped = None
+        with self._cond:
+            if self._pending is not None and (token is None or self._pending.token == token):
+                dropped = self._pending
+                dropped.cancel()
+                self._pending = None
+                self.dropped += 1
+            for job in (self._detecting, self._recognizing):
+                if job is not None and (token is None or job.token == token):
+                    job.cancel()
+        if dropped is not None:
+            self._emit_dropped(dropped)
+
+    def busy(self):
+        with self._cond:
+            return (
+                self._pending is not None
+                or self._detecting is not None
+                or self._recognizing is not None
+            )
+
+    def _emit_dropped(self, job):
+        # Callers may count outstanding tokens, so a replaced job still reports back.
+        result = _error_result("inference dropped for a newer frame")
+        result["cancelled"] = True
+        result["dropped"] = True
+        result["_token"] = job.token
+        self._deliver(result)
+
+    def _deliver(self, result):
+        if self._on_result is not None:
+            try:
+                self._on_result(result)
+            except Exception:
+                pass
+
+    def _detect_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    break
+                job = self._pending
+                self._pending = None
+                self._detecting = job
+            start = time.monotonic()
+            job.meta["queue_ms"] = int((start - job.submit_ts) * 1000)
+            trace = job.meta.get("trace")
+            if trace is not None:
+                trace.record("infer.queue", job.submit_ts, start, token=job.token)
+            if job.expired(start):
+                result = _error_result("inference deadline exceeded before start")
+                result["cancelled"] = True
+                best = None
+            else:
+                try:
+                    result, best = self.runtime.detect_stage(
+                        job.frame, deadline=job.deadline, cancel_event=job.cancel_event, trace=trace
+                    )
+                except Exception as exc:
+                    result, best = _error_result(f"infer failed: {exc}"), None
+            with self._cond:
+                elapsed = time.monotonic() - start
+                self._stage_sec[0] += elapsed
+                self._detect_ewma = _ewma(self._detect_ewma, elapsed)
+                # Waits while stage 2 still holds the previous frame (back-pressure).
+                while self._handoff is not None:
+                    self._cond.wait()
+                self._handoff = (job, result, best, start)
+                self._detecting = None
+                self._cond.notify_all()
+        with self._cond:
+            self._detect_done = True
+            self._cond.notify_all()
+
+    def _recognize_loop(self):
+        while True:
+            with self._cond:
+                while self._handoff is None and not self._detect_done:
+                    self._cond.wait()
+                if self._handoff is None:
+                    return
+                job, result, best, start = self._handoff
+                self._handoff = None
+                self._recognizing = job
+                stage_start = time.monotonic()
+                self._recognize_start = stage_start
+                self._cond.notify_all()
+            if best is not None:
+                try:
+                    result = self.runtime.recognize_stage(
+                        job.frame,
+                        best,
+                        result,
+                        deadline=job.deadline,
+                        cancel_event=job.cancel_event,
+                        trace=job.meta.get("trace"),
+                    )
+                except Exception as exc:
+                    result = _error_result(f"infer failed: {exc}")
+            end = time.monotonic()
+            self.runtime.publish_result(result, frame_seq=job.meta.get("frame_seq"))
+            result["_token"] = job.token
+            result["latency_ms"] = int((end - start) * 1000)
+            result["queue_ms"] = job.meta.get("queue_ms", 0)
+            with self._cond:
+                self._recognizing = None
+                self._stage_sec[1] += end - stage_start
+                if best is not None:
+                    self._recognize_ewma = _ewma(self._recognize_ewma, end - stage_start)
+                if result.get("cancelled"):
+                    self.expired += 1
+                elif result.get("error"):
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self._recent.append((end, end - start))
+                self._cond.notify_all()
+            self._deliver(result)
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            window = [item for item in self._recent if now - item[0] <= 10.0]
+            uptime = max(1e-6, now - self._started_ts)
+            return {
+                "workers": 2,
+                "mode": "pipelined",
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "expired": self.expired,
+                "completed": self.completed,
+                "failed": self.failed,
+                "inFlight": int(self._detecting is not None) + int(self._recognizing is not None),
+                "pending": self._pending is not None,
+                "throughputPerSec": round(len(window) / 10.0, 2),
+                "avgLatencyMs": int(sum(item[1] for item in window) / len(window) * 1000) if window else None,
+                "detectUtilization": round(self._stage_sec[0] / uptime, 3),
+                "recognizeUtilization": round(self._stage_sec[1] / uptime, 3),
+            }
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stopping = True
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+            for job in (self._detecting, self._recognizing):
+                if job is not None:
+                    job.cancel()
+            self._cond.notify_all()
+        end = time.monotonic() + max(0.0, float(timeout))
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, end - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
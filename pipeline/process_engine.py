@@ -0,0 +1,402 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_FRAME_WIDTH = _get_cfg("FRAME_WIDTH", 1280)
+CONFIG_FRAME_HEIGHT = _get_cfg("FRAME_HEIGHT", 960)
+CONFIG_INFER_PROCESS_SLOTS = _get_cfg("INFER_PROCESS_SLOTS", 3)
+CONFIG_INFER_PROCESS_HANG_SEC = _get_cfg("INFER_PROCESS_HANG_SEC", 15.0)
+CONFIG_INFER_PROCESS_START_TIMEOUT_SEC = _get_cfg("INFER_PROCESS_START_TIMEOUT_SEC", 120.0)
+
+
+def _error_result(message):
+    return {
+        "has_face": False,
+        "bbox": None,
+        "embedding": None,
+        "is_real": None,
+        "id": None,
+        "name": None,
+        "score": None,
+        "error": message,
+    }
+
+
+def _child_main(shm_name, slot_bytes, req_q, res_q, cancel_event, enable_face, enable_liveness):
+    # Runs in the spawned engine process: owns its own DoorbellRuntime without camera.
+    from runtime import DoorbellRuntime
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    runtime = DoorbellRuntime(
+        enable_liveness=enable_liveness,
+        enable_face=enable_face,
+        enable_camera=False,
+    )
+    error = None if runtime.face is not None else str(runtime._face_import_error)
+    res_q.put(("ready", error))
+    frame = None
+    try:
+        while True:
+            msg = req_q.get()
+            if msg is None:
+                return
+            kind = msg[0]
+            if kind == "reload":
+                runtime.reload_db()
+                continue
+            if kind != "infer":
+                continue
+            _, job_id, token, slot, shape, dtype, deadline = msg
+            frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=slot * slot_bytes)
+            start = time.monotonic()
+            try:
+                result = runtime.infer_frame(frame, deadline=deadline, cancel_event=cancel_event)
+            except Exception as exc:
+                result = _error_result(f"infer failed: {exc}")
+            result["latency_ms"] = int((time.monotonic() - start) * 1000)
+            # The slot is reused by the parent; never send views into shared memory back.
+            for key in ("face_crop", "embedding"):
+                value = result.get(key)
+                if isinstance(value, np.ndarray) and value.base is not None:
+                    result[key] = value.copy()
+            frame = None
+            res_q.put(("result", job_id, token, result))
+    finally:
+        frame = None
+        shm.close()
+
+
+class ProcessInferenceEngine:
+    """Runs the face pipeline of ``DoorbellRuntime`` in a separate process.
+
+    Frames are copied into ``multiprocessing.shared_memory`` ring slots and
+    only the slot index travels over the request queue; results come back on
+    a small result queue. A supervisor thread in the parent restarts the child
+    when it dies or an inference exceeds ``hang_sec``. The interface matches
+    ``InferenceService`` (submit/cancel/busy/stats/stop).
+    """
+
+    def __init__(
+        self,
+        runtime,
+        on_result=None,
+        slots=CONFIG_INFER_PROCESS_SLOTS,
+        hang_sec=CONFIG_INFER_PROCESS_HANG_SEC,
+        start_timeout_sec=CONFIG_INFER_PROCESS_START_TIMEOUT_SEC,
+        frame_shape=None,
+    ):
+        self.runtime = runtime
+        self._on_result = on_result
+        self.slots = max(2, int(slots))
+        self.hang_sec = max(1.0, float(hang_sec))
+        self.start_timeout_sec = max(1.0, float(start_timeout_sec))
+        if frame_shape is None:
+            frame_shape = (int(CONFIG_FRAME_HEIGHT), int(CONFIG_FRAME_WIDTH), 3)
+        self.slot_bytes = int(np.prod(frame_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+
+        self._ctx = mp.get_context("spawn")
+        self._cancel_event = self._ctx.Event()
+        self._lock = threading.Lock()
+        self._proc = None
+        self._req_q = None
+        self._res_q = None
+        self._ready = False
+        self._spawn_ts = 0.0
+        self._next_slot = 0
+        self._next_job_id = 0
+        self._pending = None
+        self._in_flight = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.expired = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.last_error = None
+        self._crash_streak = 0
+
+        if hasattr(runtime, "add_reload_listener"):
+            runtime.add_reload_listener(self.reload_db)
+
+        self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, name="infer-proc-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self):
+        self._req_q = self._ctx.Queue()
+        self._res_q = self._ctx.Queue()
+        self._cancel_event.clear()
+        self._proc = self._ctx.Process(
+            target=_child_main,
+            args=(
+                self._shm.name,
+                self.slot_bytes,
+                self._req_q,
+                self._res_q,
+                self._cancel_event,
+                bool(getattr(self.runtime, "enable_face", True)),
+                bool(getattr(self.runtime, "enable_liveness", False)),
+            ),
+            name="doorbell-infer",
+            daemon=True,
+        )
+        self._ready = False
+        self._spawn_ts = time.monotonic()
+        self._proc.start()
+
+    def _kill(self):
+        proc = self._proc
+        if proc is None:
+            return
+        try:
+            proc.terminate()
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.kill()
+                proc.join(timeout=1.0)
+        except Exception:
+            pass
+
+    def _restart(self, reason):
+        self.restarts += 1
+        self.last_error = reason
+        # Not ready until the new child says so: submit() must not feed the dead child's queue.
+        with self._lock:
+            was_ready = self._ready
+            self._ready = False
+        self._kill()
+        lost = None
+        with self._lock:
+            lost = self._in_flight
+            self._in_flight = None
+        if lost is not None:
+            result = _error_result(f"inference process restarted: {reason}")
+            result["cancelled"] = True
+            self._emit(lost, result)
+        # Back off when the child keeps dying before it becomes ready.
+        if not was_ready:
+            self._crash_streak += 1
+        delay = min(30.0, 0.5 * (2 ** max(0, self._crash_streak - 1))) if self._crash_streak else 0.0
+        end = time.monotonic() + delay
+        while not self._stopping and time.monotonic() < end:
+            time.sleep(0.1)
+        if not self._stopping:
+            self._spawn()
+
+    def _alloc_slot_locked(self):
+        busy = set()
+        if self._in_flight is not None:
+            busy.add(self._in_flight["slot"])
+        if self._pending is not None:
+            busy.add(self._pending["slot"])
+        for _ in range(self.slots):
+            slot = self._next_slot
+            self._next_slot = (self._next_slot + 1) % self.slots
+            if slot not in busy:
+                return slot
+        return None
+
+    def submit(self, frame, token, timeout_sec=None, meta=None):
+        if frame is None or frame.nbytes > self.slot_bytes:
+            return None
+        deadline = None
+        if timeout_sec is not None and timeout_sec > 0:
+            deadline = time.monotonic() + float(timeout_sec)
+        with self._lock:
+            if self._stopping:
+                return None
+            if self._pending is not None:
+                self.dropped += 1
+                self._pending = None
+            slot = self._alloc_slot_locked()
+            if slot is None:
+                self.dropped += 1
+                return None
+            view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+            view[...] = frame
+            self._next_job_id += 1
+            job = {
+                "id": self._next_job_id,
+                "token": token,
+                "slot": slot,
+                "shape": tuple(frame.shape),
+                "dtype": frame.dtype.str,
+                "deadline": deadline,
+                "meta": meta or {},
+                "submit_ts": time.monotonic(),
+                "frame_seq": getattr(self.runtime, "frame_seq", None),
+                "trace": getattr(self.runtime, "frame_trace", None),
+            }
+            self._pending = job
+            self.submitted += 1
+            expired = self._dispatch_locked()
+        self._emit_expired(expired)
+        return job
+
+    def _dispatch_locked(self):
+        """Send the pending job to the child; returns it instead when its deadline already passed."""
+        if not self._ready or self._in_flight is not None or self._pending is None:
+            return None
+        job = self._pending
+        self._pending = None
+        job["dispatch_ts"] = time.monotonic()
+        if job["deadline"] is not None and job["dispatch_ts"] > job["deadline"]:
+            return job
+        self._cancel_event.clear()
+        self._in_flight = job
+        self._req_q.put(
+            ("infer", job["id"], job["token"], job["slot"], job["shape"], job["dtype"], job["deadline"])
+        )
+        return None
+
+    def cancel(self, token=None):
+        with self._lock:
+            if self._pending is not None and (token is None or self._pending["token"] == token):
+                self._pending = None
+                self.dropped += 1
+            if self._in_flight is not None and (token is None or self._in_flight["token"] == token):
+                self._cancel_event.set()
+
+    def busy(self):
+        with self._lock:
+            return self._pending is not None or self._in_flight is not None
+
+    def reload_db(self):
+        with self._lock:
+            if self._req_q is not None and not self._stopping:
+                self._req_q.put(("reload",))
+
+    def _emit(self, job, result):
+        result["_token"] = job["token"]
+        result["queue_ms"] = int((job.get("dispatch_ts", job["submit_ts"]) - job["submit_ts"]) * 1000)
+        trace = job.get("trace")
+        if trace is not None:
+            # The child has its own tracer; the parent records the round trip.
+            dispatch_ts = job.get("dispatch_ts", job["submit_ts"])
+            trace.record("infer.queue", job["submit_ts"], dispatch_ts, token=job["token"])
+            trace.record("infer_frame", dispatch_ts, engine="process", childMs=result.get("latency_ms"))
+            result["trace"] = trace
+        if result.get("cancelled"):
+            self.expired += 1
+        elif result.get("error"):
+            self.failed += 1
+        else:
+            self.completed += 1
+        if not result.get("cancelled") and self.runtime is not None:
+            with self.runtime.lock:
+                self.runtime.last_result = result
+                self.runtime.last_infer_ts = time.time()
+            self.runtime.remember_result(result, frame_seq=job.get("frame_seq"))
+        if self._on_result is not None:
+            try:
+                self._on_result(result)
+            except Exception:
+                pass
+
+    def _emit_expired(self, job):
+        # Same as InferenceService: waiters get a cancelled result instead of only their own timeout.
+        if job is None:
+            return
+        result = _error_result("inference deadline exceeded before start")
+        result["cancelled"] = True
+        self._emit(job, result)
+
+    def _supervise(self):
+        while not self._stopping:
+            try:
+                msg = self._res_q.get(timeout=0.2)
+            except queue.Empty:
+                msg = None
+            except Exception:
+                msg = None
+            if self._stopping:
+                return
+            if msg is not None:
+                if msg[0] == "ready":
+                    self.last_error = msg[1]
+                    self._crash_streak = 0
+                    with self._lock:
+                        self._ready = True
+                        expired = self._dispatch_locked()
+                    self._emit_expired(expired)
+                elif msg[0] == "result":
+                    _, job_id, _, result = msg
+                    expired = None
+                    with self._lock:
+                        job = self._in_flight
+                        if job is None or job["id"] != job_id:
+                            job = None
+                        else:
+                            self._in_flight = None
+                            expired = self._dispatch_locked()
+                    if job is not None:
+                        self._emit(job, result)
+                    self._emit_expired(expired)
+                continue
+
+            now = time.monotonic()
+            if self._proc is not None and not self._proc.is_alive():
+                self._restart(f"exit code {self._proc.exitcode}")
+                continue
+            if not self._ready and now - self._spawn_ts > self.start_timeout_sec:
+                self._restart("startup timeout")
+                continue
+            with self._lock:
+                job = self._in_flight
+            if job is not None and now - job["dispatch_ts"] > self.hang_sec:
+                self._restart(f"hang > {self.hang_sec:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "process",
+                "pid": self._proc.pid if self._proc is not None else None,
+                "ready": self._ready,
+                "slots": self.slots,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "expired": self.expired,
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "inFlight": self._in_flight is not None,
+                "pending": self._pending is not None,
+                "lastError": self.last_error,
+            }
+
+    def stop(self, timeout=5.0):
+        self._stopping = True
+        try:
+            self._req_q.put(None)
+        except Exception:
+            pass
+        proc = self._proc
+        if proc is not None:
+            proc.join(timeout=max(0.0, float(timeout)))
+        self._kill()
+        self._supervisor.join(timeout=1.0)
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except Exception:
+            pass
+        return True
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import deque
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_INFER_SCHED_ENABLED = _get_cfg("INFER_SCHED_ENABLED", True)
+CONFIG_INFER_SCHED_IDLE_INTERVAL_SEC = _get_cfg("INFER_SCHED_IDLE_INTERVAL_SEC", 0.5)
+CONFIG_INFER_SCHED_ACTIVE_INTERVAL_SEC = _get_cfg("INFER_SCHED_ACTIVE_INTERVAL_SEC", 0.1)
+CONFIG_INFER_SCHED_CPU_BUDGET = _get_cfg("INFER_SCHED_CPU_BUDGET", 0.6)
+CONFIG_INFER_SCHED_LATENCY_SLO_MS = _get_cfg("INFER_SCHED_LATENCY_SLO_MS", 0)
+CONFIG_INFER_SCHED_BACKOFF = _get_cfg("INFER_SCHED_BACKOFF", 1.5)
+CONFIG_INFER_SCHED_LOG = _get_cfg("INFER_SCHED_LOG", False)
+
+# Reasons from MotionGate that mean "something is moving in the ROI".
+_MOTION_REASONS = ("motion", "hold")
+
+
+class InferenceScheduler:
+    """Decides when the next inference may start.
+
+    Single-flight: nothing is due while an inference is running, so work never
+    queues behind work (``max_in_flight=2`` lets a pipelined service keep one
+    frame in each stage). The gap after each result depends on the mode derived
+    from that result (stabilizing/face/motion -> active interval, empty porch
+    -> geometric back-off up to the idle interval), then is stretched so that
+    inference stays within ``cpu_budget`` of one core. With a latency SLO the
+    idle interval is capped so a new visitor is seen within the SLO.
+    """
+
+    def __init__(
+        self,
+        enabled=CONFIG_INFER_SCHED_ENABLED,
+        idle_interval_sec=CONFIG_INFER_SCHED_IDLE_INTERVAL_SEC,
+        active_interval_sec=CONFIG_INFER_SCHED_ACTIVE_INTERVAL_SEC,
+        cpu_budget=CONFIG_INFER_SCHED_CPU_BUDGET,
+        latency_slo_ms=CONFIG_INFER_SCHED_LATENCY_SLO_MS,
+        backoff=CONFIG_INFER_SCHED_BACKOFF,
+        log_decisions=CONFIG_INFER_SCHED_LOG,
+        history=200,
+        max_in_flight=1,
+    ):
+        self.enabled = bool(enabled)
+        self.active_interval_sec = max(0.0, float(active_interval_sec))
+        self.idle_interval_sec = max(self.active_interval_sec, float(idle_interval_sec))
+        self.cpu_budget = min(1.0, max(0.05, float(cpu_budget)))
+        self.latency_slo_sec = max(0.0, float(latency_slo_ms) / 1000.0)
+        self.backoff = max(1.0, float(backoff))
+        self.log_decisions = bool(log_decisions)
+        self.max_in_flight = max(1, int(max_in_flight))
+
+        self._lock = threading.Lock()
+        self._mode = "idle"
+        self._interval = self.idle_interval_sec
+        self._next_ts = 0.0
+        self._in_flight = 0
+        self._start_reason = None
+        self._latency_ewma = None
+
+        self.started = 0
+        self.completed = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self.decisions = deque(maxlen=max(1, int(history)))
+
+    def _record(self, now, event, reason):
+        decision = {
+            "ts": now,
+            "event": event,
+            "reason": reason,
+            "mode": self._mode,
+            "interval_ms": int(self._interval * 1000),
+            "latency_ms": None if self._latency_ewma is None else int(self._latency_ewma * 1000),
+        }
+        self.decisions.append(decision)
+        if self.log_decisions:
+            print(
+                f"[sched] {event} reason={reason} mode={self._mode} "
+                f"interval={decision['interval_ms']}ms latency={decision['latency_ms']}ms"
+            )
+
+    def _mode_for(self, result, start_reason):
+        if result and result.get("has_face"):
+            if result.get("stabilizing") or result.get("size_status"):
+                return "stabilizing"
+            return "face"
+        if start_reason in _MOTION_REASONS:
+            return "motion"
+        return "idle"
+
+    def _budget_interval(self):
+        if self._latency_ewma is None:
+            return 0.0
+        # busy / (busy + gap) <= budget
+        return self._latency_ewma * (1.0 - self.cpu_budget) / self.cpu_budget
+
+    def _idle_cap(self):
+        if not self.latency_slo_sec or self._latency_ewma is None:
+            return self.idle_interval_sec
+        cap = self.latency_slo_sec - self._latency_ewma
+        return min(self.idle_interval_sec, max(self.active_interval_sec, cap))
+
+    def _next_interval(self, mode):
+        if mode == "idle":
+            interval = min(self._idle_cap(), max(self.active_interval_sec, self._interval * self.backoff))
+        else:
+            interval = self.active_interval_sec
+        return max(interval, self._budget_interval())
+
+    def due(self, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            return self._in_flight < self.max_in_flight and now >= self._next_ts
+
+    def on_start(self, reason="auto", now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._in_flight += 1
+            self._start_reason = reason
+            self.started += 1
+            self._record(now, "start", reason)
+
+    def on_skip(self, reason="static", now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._mode = "idle"
+            self._interval = self._next_interval("idle")
+            self._next_ts = now + self._interval
+            self.skipped += 1
+            self._record(now, "skip", reason)
+
+    def on_result(self, result, latency_sec=None, now=None):
+        if now is None:
+            now = time.time()
+        if latency_sec is None and result:
+            latency_ms = result.get("latency_ms")
+            latency_sec = None if latency_ms is None else float(latency_ms) / 1000.0
+        with self._lock:
+            if latency_sec is not None:
+                if self._latency_ewma is None:
+                    self._latency_ewma = float(latency_sec)
+                else:
+                    self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * float(latency_sec)
+            self._mode = self._mode_for(result, self._start_reason)
+            self._interval = self._next_interval(self._mode)
+            self._next_ts = now + self._interval
+            self._in_flight = max(0, self._in_flight - 1)
+            self.completed += 1
+            self._record(now, "result", self._start_reason)
+
+    def on_cancel(self, reason="timeout", now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._interval = self._next_interval("idle")
+            self._next_ts = now + self._interval
+            self.cancelled += 1
+            self._record(now, "cancel", reason)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "mode": self._mode,
+                "intervalMs": int(self._interval * 1000),
+                "latencyMs": None if self._latency_ewma is None else int(self._latency_ewma * 1000),
+                "cpuBudget": self.cpu_budget,
+                "latencySloMs": int(self.latency_slo_sec * 1000),
+                "inFlight": self._in_flight,
+                "started": self.started,
+                "completed": self.completed,
+                "skipped": self.skipped,
+                "cancelled": self.cancelled,
+                "recent": list(self.decisions)[-20:],
+            }
+
+    def describe(self):
+        if not self.enabled:
+            return "Fixed cadence"
+        with self._lock:
+            return f"{self._mode} every {int(self._interval * 1000)} ms"
@@ -5,12 +5,14 @@ from PySide6 import QtWidgets
 from gui.qt_utils import apply_theme
 
 from gui.app_window import AppWindow
+from server.control import set_frame_source
 
 
 def main():
     app = QtWidgets.QApplication(sys.argv)
     apply_theme(app)
     win = AppWindow()
+    set_frame_source(win.runtime)
     app.aboutToQuit.connect(win.shutdown)
     win.show()
     return app.exec()
@@ -0,0 +1,39 @@
+import signal
+import sys
+import threading
+
+from server.launcher import force_venv_packages
+
+force_venv_packages()
+
+from server.control import set_door_controller, set_frame_source
+from server.launcher import start_services, stop_services
+from service.headless import HeadlessDoorbell
+
+
+def main():
+    services = start_services()
+
+    doorbell = HeadlessDoorbell()
+    set_door_controller(doorbell.door)
+    set_frame_source(doorbell.runtime)
+    doorbell.start()
+    print("Headless doorbell running (Ctrl+C to stop)")
+
+    stop_event = threading.Event()
+
+    def _request_stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    while not stop_event.wait(1.0):
+        pass
+
+    doorbell.stop()
+    stop_services(services)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
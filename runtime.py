@@ -14,7 +14,11 @@ from config import (
     RECOGNITION_STABLE_MIN_SCORE,
     FACE_SIZE_MIN_RELATIVE_AREA,
     FACE_SIZE_MAX_RELATIVE_AREA,
+    SIM_CAMERA_SOURCE,
+    SIM_CAMERA_FPS,
 )
+from sim.devices import register, sim_enabled
+from utils.tracing import get_tracer, span
 from utils.utils import normalize_face_crop
 
 
@@ -43,6 +47,12 @@ def _estimate_yaw_from_detection(detection):
         return None
 
 
+def _should_abort(deadline, cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        return True
+    return deadline is not None and time.monotonic() > deadline
+
+
 class OpenCVCamera:
     def __init__(self, index=0, width=None, height=None):
         self.cap = cv2.VideoCapture(index)
@@ -65,9 +75,11 @@ class OpenCVCamera:
 
 
 class DoorbellRuntime:
-    def __init__(self, camera_index=0, enable_liveness=False, enable_face=True):
+    def __init__(self, camera_index=0, enable_liveness=False, enable_face=True, enable_camera=True):
         self.lock = threading.Lock()
         self.infer_lock = threading.Lock()
+        self.detect_lock = threading.Lock()
+        self.recognize_lock = threading.Lock()
         self.enable_face = enable_face
         self.enable_liveness = bool(enable_liveness and enable_face)
         self._camera_import_error = None
@@ -75,7 +87,7 @@ class DoorbellRuntime:
         self._face_import_error = "not initialized"
         self._liveness_import_error = "not initialized"
 
-        self.camera = self._init_camera(camera_index)
+        self.camera = self._init_camera(camera_index) if enable_camera else None
         self.face = self._init_face()
         self.liveness = self._init_liveness(self.enable_liveness)
 
@@ -92,13 +104,31 @@ class DoorbellRuntime:
         self._stable_ts = 0.0
 
         self.last_frame = None
+        self.frame_seq = 0
+        self.frame_ts = 0.0
+        # Trace context of ``last_frame`` (capture timestamp + trace ID); engines pick it up on submit.
+        self.frame_trace = None
+        self._tracer = get_tracer()
+        # Newest finished result: (frame_seq, monotonic finish time, result).
+        self._cached_result = None
+        # Callers of ``infer_frame(priority=True)`` waiting or running; auto inference yields to them.
+        self._priority_cond = threading.Condition()
+        self._priority_pending = 0
         self.last_face_crop = None
         self.last_embedding = None
         self.last_bbox = None
         self.last_result = None
         self.last_infer_ts = 0.0
+        self._reload_listeners = []
 
     def _init_camera(self, camera_index):
+        if sim_enabled():
+            from sim.camera import ReplayCamera
+
+            self._camera_is_rgb = False
+            camera = ReplayCamera(SIM_CAMERA_SOURCE, FRAME_WIDTH, FRAME_HEIGHT, SIM_CAMERA_FPS)
+            return register("camera", camera)
+
         try:
             from camera.camera_manager import CameraManager as PiCameraManager
         except Exception as exc:
@@ -150,7 +180,14 @@ class DoorbellRuntime:
             self._liveness_import_error = exc
             return None
 
-    def _smooth_recognition(self, rid, name, score):
+    def _smooth_recognition(self, rid, name, score, trace=None):
+        with span(trace, "smooth") as info:
+            out = self._smooth_window_update(rid, name, score)
+            info["stable"] = not out[3]
+            info["id"] = out[0]
+            return out
+
+    def _smooth_window_update(self, rid, name, score):
         if self._smooth_window <= 1 or self._stable_count <= 1:
             return rid, name, score, False
 
@@ -190,8 +227,8 @@ class DoorbellRuntime:
         self._stable_score = None
         return None, None, score, True
 
-
     def read_frame(self):
+        start = time.monotonic()
         frame = self.camera.get_frame() if self.camera else None
         if frame is None:
             return None
@@ -199,10 +236,18 @@ class DoorbellRuntime:
             frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
         with self.lock:
             self.last_frame = frame
+            self.frame_seq += 1
+            self.frame_ts = time.monotonic()
+            self.frame_trace = self._tracer.start("capture", start, self.frame_ts, frameSeq=self.frame_seq)
         return frame
 
-    def infer_frame(self, frame):
-        result = {
+    def latest_frame(self):
+        """``(frame_seq, last_frame)``; the sequence changes once per camera read."""
+        with self.lock:
+            return self.frame_seq, self.last_frame
+
+    def _empty_result(self):
+        return {
             "has_face": False,
             "bbox": None,
             "face_crop": None,
@@ -215,65 +260,109 @@ class DoorbellRuntime:
             "error": None,
         }
 
+    def _yield_to_priority(self, max_wait_sec=2.0):
+        """Hold back auto inference while a priority (ring) inference is queued or running."""
+        deadline = time.monotonic() + max_wait_sec
+        with self._priority_cond:
+            while self._priority_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._priority_cond.wait(remaining)
+
+    def detect_stage(self, frame, deadline=None, cancel_event=None, trace=None):
+        """First half of ``infer_frame``: detection and face size checks.
+
+        Returns ``(result, best)``. When ``best`` is None the result is final
+        and ``recognize_stage`` must not be called for this frame.
+        """
+        self._yield_to_priority()
+        return self._detect(frame, deadline=deadline, cancel_event=cancel_event, trace=trace)
+
+    def _detect(self, frame, deadline=None, cancel_event=None, trace=None):
+        with span(trace, "detect") as info:
+            result, best = self._detect_faces(frame, deadline=deadline, cancel_event=cancel_event)
+            info["face"] = best is not None
+        if trace is not None:
+            result["trace"] = trace
+        return result, best
+
+    def _detect_faces(self, frame, deadline=None, cancel_event=None):
+        result = self._empty_result()
+
         if not self.enable_face:
             result["error"] = "Face module disabled"
-            return result
+            return result, None
 
         if self.face is None:
             result["error"] = f"Face module unavailable: {self._face_import_error}"
-            return result
+            return result, None
 
-        with self.infer_lock:
+        if _should_abort(deadline, cancel_event):
+            result["error"] = "inference cancelled"
+            result["cancelled"] = True
+            return result, None
+
+        with self.detect_lock:
             try:
                 detections = self.face.detect_faces(frame)
             except Exception as exc:
                 result["error"] = f"detect_faces failed: {exc}"
-                return result
-
-            if not detections or not detections.detections:
-                return result
-
-            try:
-                best = max(
-                    detections.detections,
-                    key=lambda d: d.location_data.relative_bounding_box.width
-                    * d.location_data.relative_bounding_box.height,
-                )
-            except Exception as exc:
-                result["error"] = f"select best detection failed: {exc}"
-                return result
-
-            result["yaw"] = _estimate_yaw_from_detection(best)
+                return result, None
 
-            bbox_rel = best.location_data.relative_bounding_box
-            rel_area = float(bbox_rel.width) * float(bbox_rel.height)
-            h, w = frame.shape[:2]
-            x1 = max(0, int(bbox_rel.xmin * w))
-            y1 = max(0, int(bbox_rel.ymin * h))
-            x2 = min(w, x1 + int(bbox_rel.width * w))
-            y2 = min(h, y1 + int(bbox_rel.height * h))
-            bbox = (x1, y1, x2, y2)
-
-            result["has_face"] = True
-            result["bbox"] = bbox
-            result["size_area"] = rel_area
-
-            if self._face_min_area and rel_area < self._face_min_area:
-                result["size_status"] = "too_small"
-                with self.lock:
-                    self.last_bbox = bbox
-                    self.last_result = result
-                    self.last_infer_ts = time.time()
-                return result
+        if not detections or not detections.detections:
+            return result, None
 
-            if self._face_max_area and rel_area > self._face_max_area:
-                result["size_status"] = "too_large"
-                with self.lock:
-                    self.last_bbox = bbox
-                    self.last_result = result
-                    self.last_infer_ts = time.time()
-                return result
+        try:
+            best = max(
+                detections.detections,
+                key=lambda d: d.location_data.relative_bounding_box.width
+                * d.location_data.relative_bounding_box.height,
+            )
+        except Exception as exc:
+            result["error"] = f"select best detection failed: {exc}"
+            return result, None
+
+        result["yaw"] = _estimate_yaw_from_detection(best)
+
+        bbox_rel = best.location_data.relative_bounding_box
+        rel_area = float(bbox_rel.width) * float(bbox_rel.height)
+        h, w = frame.shape[:2]
+        x1 = max(0, int(bbox_rel.xmin * w))
+        y1 = max(0, int(bbox_rel.ymin * h))
+        x2 = min(w, x1 + int(bbox_rel.width * w))
+        y2 = min(h, y1 + int(bbox_rel.height * h))
+
+        result["has_face"] = True
+        result["bbox"] = (x1, y1, x2, y2)
+        result["size_area"] = rel_area
+
+        if self._face_min_area and rel_area < self._face_min_area:
+            result["size_status"] = "too_small"
+            return result, None
+
+        if self._face_max_area and rel_area > self._face_max_area:
+            result["size_status"] = "too_large"
+            return result, None
+
+        return result, best
+
+    def recognize_stage(self, frame, best, result, deadline=None, cancel_event=None, trace=None):
+        """Second half of ``infer_frame``: align/embed, liveness and matching.
+
+        Calls must be made in frame order because ``_smooth_recognition``
+        keeps a sliding window of recent ids.
+        """
+        with span(trace, "recognize"):
+            return self._recognize(frame, best, result, deadline, cancel_event, trace)
+
+    def _recognize(self, frame, best, result, deadline, cancel_event, trace):
+        if _should_abort(deadline, cancel_event):
+            result["error"] = "inference cancelled"
+            result["cancelled"] = True
+            return result
 
+        with self.recognize_lock:
             try:
                 face_crop, embedding, bbox = self.face.update_last_face(frame, best)
             except Exception as exc:
@@ -285,6 +374,11 @@ class DoorbellRuntime:
             result["embedding"] = embedding
             result["bbox"] = bbox
 
+            if _should_abort(deadline, cancel_event):
+                result["error"] = "inference cancelled"
+                result["cancelled"] = True
+                return result
+
             if self.liveness is not None:
                 try:
                     normalized = normalize_face_crop(face_crop)
@@ -295,7 +389,7 @@ class DoorbellRuntime:
             try:
                 rid, name, score = self.face.recognize_embedding(embedding)
                 rid, name, score, stabilizing = self._smooth_recognition(
-                    rid, name, score
+                    rid, name, score, trace=trace
                 )
                 result["id"] = rid
                 result["name"] = name
@@ -304,13 +398,81 @@ class DoorbellRuntime:
             except Exception as exc:
                 result["error"] = f"recognize failed: {exc}"
 
+        return result
+
+    def remember_result(self, result, frame_seq=None):
+        """Cache a finished result (any outcome but cancelled/error) for ``fresh_result``."""
+        if not result or result.get("cancelled") or result.get("error"):
+            return
         with self.lock:
-            self.last_face_crop = face_crop
-            self.last_embedding = embedding
-            self.last_bbox = bbox
-            self.last_result = result
-            self.last_infer_ts = time.time()
+            seq = self.frame_seq if frame_seq is None else frame_seq
+            self._cached_result = (seq, time.monotonic(), result)
 
+    def fresh_result(self, max_age_sec, min_frame_seq=None):
+        """Cached result finished less than ``max_age_sec`` ago (and on ``min_frame_seq`` or newer).
+
+        Returns ``(result, age_sec)`` or ``(None, None)``; the result dict is shared, do not mutate it.
+        """
+        with self.lock:
+            cached = self._cached_result
+        if cached is None:
+            return None, None
+        seq, done_ts, result = cached
+        age = time.monotonic() - done_ts
+        if age > max_age_sec or (min_frame_seq is not None and seq < min_frame_seq):
+            return None, None
+        return result, age
+
+    def publish_result(self, result, frame_seq=None):
+        """Store a finished result as the runtime's latest (same rules as ``infer_frame``)."""
+        if not result or result.get("cancelled"):
+            return
+        self.remember_result(result, frame_seq=frame_seq)
+        if result.get("embedding") is not None:
+            with self.lock:
+                self.last_face_crop = result.get("face_crop")
+                self.last_embedding = result.get("embedding")
+                self.last_bbox = result.get("bbox")
+                self.last_result = result
+                self.last_infer_ts = time.time()
+        elif result.get("size_status"):
+            with self.lock:
+                self.last_bbox = result.get("bbox")
+                self.last_result = result
+                self.last_infer_ts = time.time()
+
+    def infer_frame(self, frame, deadline=None, cancel_event=None, priority=False, trace=None, frame_seq=None):
+        """Detect + recognize one frame under ``infer_lock``.
+
+        ``priority=True`` (ring button) makes auto inference that has not
+        started yet wait until this call is done, so it only queues behind
+        an inference already in progress. ``trace`` (``utils.tracing``) gets
+        the ``infer_frame``/``detect``/``recognize``/``smooth`` spans and is
+        returned in ``result["trace"]``. ``frame_seq`` is the sequence of
+        ``frame`` for ``fresh_result``; by default the newest read at call
+        time, before any wait for a priority inference.
+        """
+        if frame_seq is None:
+            frame_seq = self.frame_seq
+        with span(trace, "infer_frame", priority=bool(priority)):
+            if priority:
+                with self._priority_cond:
+                    self._priority_pending += 1
+            else:
+                self._yield_to_priority()
+            try:
+                with self.infer_lock:
+                    result, best = self._detect(frame, deadline=deadline, cancel_event=cancel_event, trace=trace)
+                    if best is not None:
+                        result = self.recognize_stage(
+                            frame, best, result, deadline=deadline, cancel_event=cancel_event, trace=trace
+                        )
+            finally:
+                if priority:
+                    with self._priority_cond:
+                        self._priority_pending -= 1
+                        self._priority_cond.notify_all()
+            self.publish_result(result, frame_seq=frame_seq)
         return result
 
     def force_recognize(self, frame):
@@ -361,9 +523,17 @@ class DoorbellRuntime:
         pid, pname, state = self.face.add_new_person(name, emb)
         return {"ok": True, "id": pid, "name": pname, "state": state}
 
+    def add_reload_listener(self, callback):
+        self._reload_listeners.append(callback)
+
     def reload_db(self):
         if self.face is not None:
             self.face.reload_db()
+        for callback in list(self._reload_listeners):
+            try:
+                callback()
+            except Exception:
+                pass
 
     def close(self):
         if hasattr(self.camera, "close"):
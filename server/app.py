@@ -1,7 +1,11 @@
+import asyncio
+from collections import OrderedDict
 from datetime import datetime
 import importlib.util
+import json
 import os
 import sys
+import threading
 from typing import List, Optional
 
 
@@ -26,17 +30,24 @@ def _force_typing_extensions():
 
 _force_typing_extensions()
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from config import EVENT_MEDIA_DIR
-from server.control import get_door_controller
+from config import EVENT_MAX_ITEMS, EVENT_MEDIA_DIR, EVENT_QUERY_MAX_LIMIT
+from server.control import get_door_controller, get_frame_source
 from server.event_store import get_event_store
+from server.event_stream import get_event_broadcaster, parse_last_event_id, sse_messages
+from server.live_view import BOUNDARY, get_live_view, mjpeg_parts
+from utils.tracing import get_tracer
 
 app = FastAPI(title="SmartDoorbell Server")
 
-app.mount("/media", StaticFiles(directory=EVENT_MEDIA_DIR), name="media")
+_broadcaster = get_event_broadcaster()
+_live_view = get_live_view()
+get_event_store().add_listener(_broadcaster.publish)
+
+_IMMUTABLE = {"Cache-Control": "public, max-age=31536000, immutable"}
 
 
 class DoorEvent(BaseModel):
@@ -44,6 +55,10 @@ class DoorEvent(BaseModel):
     timestamp: str
     type: str  # "KNOWN" | "UNKNOWN" | "RING"
     imageUrl: str
+    mediaState: Optional[str] = None  # "pending" | "ready" | "failed" | "dropped"
+    thumbUrl: Optional[str] = None  # imageUrl + "?variant=thumb"
+    clipUrl: Optional[str] = None  # pre/post-roll clip (RING/KNOWN/UNKNOWN)
+    clipState: Optional[str] = None  # "pending" | "ready" | "failed"
     personName: Optional[str] = None
 
 
@@ -62,11 +77,233 @@ def health():
     return {"ok": True}
 
 
+_PUBLIC_EVENT_FIELDS = ("eventId", "timestamp", "type", "imageUrl", "mediaState", "clipUrl", "clipState", "personName")
+_json_cache_lock = threading.Lock()
+_json_cache_version = None
+_json_cache = OrderedDict()
+
+
+def _public_event(event):
+    item = {name: event.get(name) for name in _PUBLIC_EVENT_FIELDS}
+    item["imageUrl"] = item["imageUrl"] or ""
+    item["thumbUrl"] = f"{item['imageUrl']}?variant=thumb" if item["imageUrl"] else None
+    return item
+
+
+def _cached_json(version, key, build):
+    """Serialized body for ``key`` at ``version``; rebuilt only after the store changes."""
+    global _json_cache_version
+    with _json_cache_lock:
+        if _json_cache_version != version:
+            _json_cache.clear()
+            _json_cache_version = version
+        body = _json_cache.get(key)
+        if body is not None:
+            _json_cache.move_to_end(key)
+            return body
+    body = json.dumps(build(), ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+    with _json_cache_lock:
+        if _json_cache_version == version:
+            _json_cache[key] = body
+            while len(_json_cache) > 32:
+                _json_cache.popitem(last=False)
+    return body
+
+
+def _versioned_response(request, version, key, build):
+    etag = f'"{version}"'
+    if_none_match = request.headers.get("if-none-match") or ""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if etag in tags or f"W/{etag}" in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=_cached_json(version, key, build),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
 @app.get("/events", response_model=List[DoorEvent])
-def events():
+def events(
+    request: Request,
+    limit: int = EVENT_MAX_ITEMS,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    type: Optional[str] = None,
+    person: Optional[str] = None,
+    since: Optional[int] = None,
+):
+    """Newest first. Page with ``before=<last eventId>``; poll new ones with ``after=<newest eventId>``.
+
+    Responses carry ``ETag`` = store version (``If-None-Match`` gives 304).
+    ``since=<version>`` returns a delta object instead of a list.
+    """
+    store = get_event_store()
+    if store is None:
+        return []
+    version = store.version
+    if since is not None:
+        def build_delta():
+            delta = store.changes_since(int(since))
+            delta["events"] = [_public_event(e) for e in delta["events"]]
+            return delta
+
+        return _versioned_response(request, version, ("since", int(since)), build_delta)
+
+    limit = max(1, min(int(limit), EVENT_QUERY_MAX_LIMIT))
+
+    def build_page():
+        items = store.query_events(limit=limit, before=before, after=after, event_type=type, person=person)
+        return [_public_event(e) for e in items]
+
+    key = ("page", limit, before, after, type, person)
+    return _versioned_response(request, version, key, build_page)
+
+
+@app.get("/events/stream")
+async def events_stream(request: Request, lastEventId: Optional[str] = None):
+    """Server-Sent Events: ``event`` (new), ``update`` (image landed), ``clear``."""
+    last_id = parse_last_event_id(request.headers.get("last-event-id") or lastEventId)
+    return StreamingResponse(
+        sse_messages(_broadcaster, last_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/events/ws")
+async def events_ws(websocket: WebSocket, lastEventId: Optional[str] = None):
+    """Same messages as the SSE stream, as JSON ``{id, kind, event}``."""
+    await websocket.accept()
+    client, backlog = _broadcaster.subscribe(parse_last_event_id(lastEventId))
+    # On a quiet doorbell nothing is sent for hours; reading notices a gone client right away.
+    closed = asyncio.ensure_future(_wait_ws_closed(websocket))
+    try:
+        for message in backlog:
+            await websocket.send_json(message)
+        while not closed.done():
+            getter = asyncio.ensure_future(client.queue.get())
+            done, _ = await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            await websocket.send_json(getter.result())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        closed.cancel()
+        _broadcaster.unsubscribe(client)
+
+
+async def _wait_ws_closed(websocket):
+    """Discard client messages until the socket closes."""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        return
+
+
+@app.get("/events/{event_id}", response_model=DoorEvent)
+def event_detail(event_id: str):
+    """Poll one event until its ``mediaState`` leaves ``pending``."""
+    store = get_event_store()
+    event = store.get_event(event_id) if store is not None else None
+    if event is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    return event
+
+
+@app.get("/media/clips/{name}")
+def media_clip(name: str):
+    """Event clip (MJPEG-in-AVI or MP4); exists once ``clipState`` is ``ready``."""
+    store = get_event_store()
+    name = os.path.basename(name)
+    if store is None or store.clips is None or not name.lower().endswith((".avi", ".mp4")):
+        raise HTTPException(status_code=404, detail="clip not found")
+    path = os.path.join(store.clips.clip_dir, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="clip not found")
+    media_type = "video/mp4" if name.lower().endswith(".mp4") else "video/x-msvideo"
+    return FileResponse(path, media_type=media_type, headers=_IMMUTABLE)
+
+
+@app.get("/media/{name}")
+def media(name: str, variant: Optional[str] = None):
+    """Event image by file name (or eventId); ``variant`` = thumb | preview | face."""
     store = get_event_store()
-    items = store.list_events() if store is not None else []
-    return items
+    name = os.path.basename(name)
+    event = None
+    if "." not in name and store is not None:
+        event = store.get_event(name)
+        image_url = (event or {}).get("imageUrl") or ""
+        name = os.path.basename(image_url.split("?", 1)[0])
+    if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+        raise HTTPException(status_code=404, detail="media not found")
+    if not variant:
+        path = os.path.join(EVENT_MEDIA_DIR, name)
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="media not found")
+        return FileResponse(path, headers=_IMMUTABLE)
+    if store is None:
+        raise HTTPException(status_code=404, detail="media not found")
+    bbox = None
+    if variant == "face":
+        if event is None:
+            event = store.get_event("_".join(name.split("_")[:2]))
+        bbox = ((event or {}).get("meta") or {}).get("bbox")
+    try:
+        path = store.variants.get(name, variant, bbox=bbox)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if path is None:
+        raise HTTPException(status_code=404, detail="media not found")
+    return FileResponse(path, media_type="image/jpeg", headers=_IMMUTABLE)
+
+
+@app.get("/snapshot.jpg")
+def snapshot():
+    """Newest camera frame as one JPEG (shares the live view encoder)."""
+    jpeg = _live_view.snapshot()
+    if jpeg is None:
+        raise HTTPException(status_code=503, detail="no camera frame")
+    return Response(content=jpeg, media_type="image/jpeg", headers={"Cache-Control": "no-store"})
+
+
+@app.get("/live.mjpg")
+async def live_mjpeg(request: Request):
+    """MJPEG live view; every viewer gets the same encoded frames, slow ones skip."""
+    if get_frame_source() is None:
+        raise HTTPException(status_code=503, detail="camera unavailable")
+    return StreamingResponse(
+        mjpeg_parts(_live_view, request.is_disconnected),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/traces")
+def traces(limit: int = 50, traceId: Optional[str] = None, contains: Optional[str] = None):
+    """Newest latency traces (frame capture / ring press -> door, event), spans in ms from the trace start.
+
+    ``contains=door.open_hold`` keeps only traces that opened the door.
+    """
+    tracer = get_tracer()
+    limit = max(1, min(int(limit), 500))
+    return {"stats": tracer.stats(), "traces": tracer.traces(limit=limit, trace_id=traceId, contains=contains)}
+
+
+@app.get("/traces/chrome")
+def traces_chrome(traceId: Optional[str] = None, contains: Optional[str] = None):
+    """Buffered spans as a Chrome trace-event file (open in chrome://tracing or ui.perfetto.dev)."""
+    data = get_tracer().chrome_trace(trace_id=traceId, contains=contains)
+    return Response(
+        content=json.dumps(data, default=str),
+        media_type="application/json",
+        headers={"Content-Disposition": 'attachment; filename="doorbell-trace.json"', "Cache-Control": "no-store"},
+    )
 
 
 @app.post("/events/clear")
@@ -86,63 +323,42 @@ def clear_events(req: Optional[ClearEventsRequest] = None):
     return {"ok": True, **result}
 
 
-@app.post("/unlock")
-def unlock(req: UnlockRequest):
+def _door_command(action, req):
+    # All door/light changes go through the door's command queue: concurrent taps
+    # coalesce, and a retried eventId returns the first outcome without moving the servo.
     door = get_door_controller()
-    ok = False
-    message = "door unavailable"
-    light_ok = False
-    if door is not None:
-        ok, message = door.open_and_close()
-        try:
-            light_ok = door.set_light_state(True)
-        except Exception:
-            light_ok = False
+    if door is None:
+        outcome = {"ok": False, "message": "door unavailable", "lightOk": False, "doorOpen": False}
+    elif action == "UNLOCK":
+        outcome = door.commands.open(event_id=req.eventId, source=req.source or "api")
+    else:
+        outcome = door.commands.close(event_id=req.eventId, source=req.source or "api")
     store = get_event_store()
-    if store is not None:
+    if store is not None and not outcome.get("duplicate"):
         store.log_action(
-            "UNLOCK",
-            ok,
-            message=message,
+            action,
+            outcome["ok"],
+            message=outcome["message"],
             source=req.source or "api",
             request_event_id=req.eventId,
         )
     return {
-        "ok": ok,
+        "ok": outcome["ok"],
         "eventId": req.eventId,
-        "message": message,
-        "lightOk": light_ok,
+        "message": outcome["message"],
+        "lightOk": outcome["lightOk"],
+        "doorOpen": outcome["doorOpen"],
+        "coalesced": bool(outcome.get("coalesced")),
+        "duplicate": bool(outcome.get("duplicate")),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
+@app.post("/unlock")
+def unlock(req: UnlockRequest):
+    return _door_command("UNLOCK", req)
+
+
 @app.post("/lock")
 def lock(req: UnlockRequest):
-    door = get_door_controller()
-    ok = False
-    message = "door unavailable"
-    light_ok = False
-    if door is not None:
-        door.close()
-        ok = True
-        message = "door closed"
-        try:
-            light_ok = door.set_light_state(False)
-        except Exception:
-            light_ok = False
-    store = get_event_store()
-    if store is not None:
-        store.log_action(
-            "LOCK",
-            ok,
-            message=message,
-            source=req.source or "api",
-            request_event_id=req.eventId,
-        )
-    return {
-        "ok": ok,
-        "eventId": req.eventId,
-        "message": message,
-        "lightOk": light_ok,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+    return _door_command("LOCK", req)
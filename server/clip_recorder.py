@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from server.control import get_frame_source
+from server.media_index import MediaIndex
+
+CLIP_FORMATS = {"avi": "MJPG", "mp4": "mp4v"}
+
+
+class ClipRecorder:
+    """Pre-roll ring of JPEG frames and background clip encoding for events.
+
+    A ``clip-ring`` thread samples the frame source at ``fps``, downscales
+    to ``width`` and keeps the JPEG bytes of the last ``pre_sec + post_sec``
+    seconds, capped at ``buffer_max_bytes`` (oldest frames go first). It
+    never touches the camera or inference threads: it only reads
+    ``latest_frame()``. ``request()`` schedules a clip around "now"; the
+    ``clip-encoder`` thread waits for the post-roll, writes the frames to
+    ``clips/`` (MJPEG-in-AVI or MP4) and reports through ``on_done``.
+    """
+
+    def __init__(
+        self,
+        clip_dir,
+        pre_sec=5.0,
+        post_sec=5.0,
+        fps=5.0,
+        width=480,
+        quality=70,
+        buffer_max_bytes=8 * 1024 * 1024,
+        fmt="avi",
+        max_files=100,
+        queue_size=4,
+        source=get_frame_source,
+        on_done=None,
+    ):
+        self.clip_dir = clip_dir
+        os.makedirs(clip_dir, exist_ok=True)
+        self.pre_sec = max(0.0, float(pre_sec))
+        self.post_sec = max(0.0, float(post_sec))
+        self.fps = max(1.0, float(fps))
+        self.width = max(64, int(width))
+        self.quality = int(quality)
+        self.buffer_max_bytes = max(64 * 1024, int(buffer_max_bytes))
+        self.fmt = fmt if fmt in CLIP_FORMATS else "avi"
+        self.queue_size = max(1, int(queue_size))
+        self.on_done = on_done
+        self._source = source
+        self._cond = threading.Condition()
+        self._ring = deque()
+        self._ring_bytes = 0
+        self._jobs = deque()
+        self._closing = False
+        self._stop = threading.Event()
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.capture_ms = 0.0
+        self.encode_ms = 0.0
+        self.clips = MediaIndex(clip_dir, max_files=max_files, extensions=(".avi", ".mp4"))
+        self._capture = threading.Thread(target=self._capture_loop, name="clip-ring", daemon=True)
+        self._capture.start()
+        self._encoder = None
+
+    @property
+    def extension(self):
+        return "." + self.fmt
+
+    # ----- ring -----
+    def _capture_loop(self):
+        interval = 1.0 / self.fps
+        last_seq = None
+        while not self._stop.is_set():
+            start = time.monotonic()
+            source = self._source()
+            if source is None:
+                self._stop.wait(1.0)
+                continue
+            try:
+                seq, frame = source.latest_frame()
+            except Exception:
+                seq, frame = None, None
+            if frame is not None and seq != last_seq:
+                last_seq = seq
+                jpeg = self._encode(frame)
+                if jpeg is not None:
+                    self._push(start, jpeg)
+                self.capture_ms = (time.monotonic() - start) * 1000.0
+            self._stop.wait(max(0.0, interval - (time.monotonic() - start)))
+
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, max(1, int(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        return buf.tobytes() if ok else None
+
+    def _push(self, ts, jpeg):
+        horizon = ts - (self.pre_sec + self.post_sec + 1.0)
+        with self._cond:
+            self._ring.append((ts, jpeg))
+            self._ring_bytes += len(jpeg)
+            while self._ring and (self._ring_bytes > self.buffer_max_bytes or self._ring[0][0] < horizon):
+                _, old = self._ring.popleft()
+                self._ring_bytes -= len(old)
+
+    # ----- clips -----
+    def request(self, event_id, filename):
+        """Schedule a clip of ``[now - pre_sec, now + post_sec]``; False if the queue is full."""
+        now = time.monotonic()
+        with self._cond:
+            if self._closing:
+                return False
+            if len(self._jobs) >= self.queue_size:
+                self.dropped += 1
+                return False
+            self._jobs.append((event_id, filename, now - self.pre_sec, now + self.post_sec))
+            if self._encoder is None:
+                self._encoder = threading.Thread(target=self._encoder_loop, name="clip-encoder", daemon=True)
+                self._encoder.start()
+            self._cond.notify_all()
+        return True
+
+    def _encoder_loop(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closing:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                event_id, filename, start, end = self._jobs[0]
+                # Wait for the post-roll (close() cuts it short).
+                while not self._closing:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                frames = [jpeg for ts, jpeg in self._ring if start <= ts <= end]
+            began = time.monotonic()
+            ok = self._write_clip(filename, frames)
+            self.encode_ms = (time.monotonic() - began) * 1000.0
+            with self._cond:
+                self._jobs.popleft()
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self._cond.notify_all()
+            if self.on_done is not None:
+                try:
+                    self.on_done(event_id, ok)
+                except Exception as exc:
+                    print(f"ClipRecorder: on_done failed ({exc})")
+
+    def _write_clip(self, filename, frames):
+        if len(frames) < 2:
+            return False
+        path = os.path.join(self.clip_dir, filename)
+        stem, ext = os.path.splitext(path)
+        tmp = f"{stem}.part{ext}"
+        writer = None
+        size = None
+        done = False
+        try:
+            for jpeg in frames:
+                image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                if writer is None:
+                    size = (image.shape[1], image.shape[0])
+                    writer = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*CLIP_FORMATS[self.fmt]), self.fps, size)
+                    if not writer.isOpened():
+                        return False
+                elif (image.shape[1], image.shape[0]) != size:
+                    image = cv2.resize(image, size)
+                writer.write(image)
+            if writer is None:
+                return False
+            writer.release()
+            writer = None
+            os.replace(tmp, path)
+            done = True
+        except Exception:
+            return False
+        finally:
+            if writer is not None:
+                writer.release()
+            if not done:
+                # A failed encode must not leave an untracked .part file in clips/.
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        self.clips.add(filename)
+        return True
+
+    def flush(self, timeout=15.0):
+        """Wait until every requested clip has been written (or failed)."""
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._cond:
+            while self._jobs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def clear(self):
+        return self.clips.clear()
+
+    def stats(self):
+        with self._cond:
+            span = self._ring[-1][0] - self._ring[0][0] if len(self._ring) > 1 else 0.0
+            return {
+                "ringFrames": len(self._ring),
+                "ringBytes": self._ring_bytes,
+                "ringSec": round(span, 1),
+                "bufferMaxBytes": self.buffer_max_bytes,
+                "pending": len(self._jobs),
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "captureMs": round(self.capture_ms, 2),
+                "encodeMs": round(self.encode_ms, 1),
+            }
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            encoder = self._encoder
+        if encoder is not None:
+            encoder.join(timeout=timeout)
+        self._capture.join(timeout=1.0)
+        self.clips.close(timeout=timeout)
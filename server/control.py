@@ -1,4 +1,5 @@
 _door_controller = None
+_frame_source = None
 
 
 def set_door_controller(controller):
@@ -8,3 +9,13 @@ def set_door_controller(controller):
 
 def get_door_controller():
     return _door_controller
+
+
+def set_frame_source(runtime):
+    """Runtime whose ``latest_frame()`` feeds ``/live.mjpg`` and ``/snapshot.jpg``."""
+    global _frame_source
+    _frame_source = runtime
+
+
+def get_frame_source():
+    return _frame_source
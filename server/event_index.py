@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+class EventIndex:
+    """SQLite index of persisted events for filtered, paginated queries.
+
+    Rows are keyed by ``eventId`` and ordered by an insertion sequence, which
+    is the cursor used for ``before``/``after`` paging. ``type`` and
+    ``personName`` have composite indexes with that sequence and
+    ``timestamp`` has its own index for age retention, so a page costs the
+    same whatever the history size.
+    """
+
+    def __init__(self, db_path, retain_days=0, prune_every=200):
+        self.db_path = db_path
+        self.retain_days = max(0.0, float(retain_days or 0))
+        self.prune_every = max(1, int(prune_every))
+        self._lock = threading.Lock()
+        self._inserts = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id TEXT NOT NULL UNIQUE,
+                ts TEXT NOT NULL,
+                type TEXT NOT NULL,
+                person TEXT,
+                body TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+            CREATE INDEX IF NOT EXISTS idx_events_type ON events (type, seq);
+            CREATE INDEX IF NOT EXISTS idx_events_person ON events (person, seq);
+            """
+        )
+        self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def _row(self, event):
+        return (
+            event.get("eventId"),
+            event.get("timestamp") or "",
+            str(event.get("type") or ""),
+            event.get("personName"),
+            json.dumps(event, ensure_ascii=True),
+        )
+
+    def add(self, event):
+        if not event or not event.get("eventId"):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events (event_id, ts, type, person, body) VALUES (?, ?, ?, ?, ?)",
+                self._row(event),
+            )
+            self._conn.commit()
+            self._inserts += 1
+            if self.retain_days and self._inserts % self.prune_every == 0:
+                self._prune_locked()
+
+    def add_many(self, events):
+        """Bulk import, oldest first (used to seed the index from the log)."""
+        rows = [self._row(e) for e in events if e and e.get("eventId")]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO events (event_id, ts, type, person, body) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def update(self, event):
+        """Rewrite the stored body of an existing row, keeping its position."""
+        if not event or not event.get("eventId"):
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE events SET body = ? WHERE event_id = ?",
+                (json.dumps(event, ensure_ascii=True), event.get("eventId")),
+            )
+            self._conn.commit()
+
+    def _prune_locked(self):
+        cutoff = (datetime.now() - timedelta(days=self.retain_days)).strftime("%Y-%m-%d %H:%M:%S")
+        self._conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,))
+        self._conn.commit()
+
+    def _seq_of(self, event_id):
+        row = self._conn.execute("SELECT seq FROM events WHERE event_id = ?", (event_id,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, event_id):
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM events WHERE event_id = ?", (event_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def query(self, limit=50, before=None, after=None, event_type=None, person=None):
+        """Events newest first. ``before``/``after`` are eventId cursors.
+
+        With ``after`` the page holds the oldest ``limit`` events newer than
+        the cursor (still returned newest first), so a client can walk
+        forward without gaps.
+        """
+        limit = max(1, int(limit))
+        clauses = []
+        params = []
+        with self._lock:
+            if before:
+                seq = self._seq_of(before)
+                if seq is None:
+                    return []
+                clauses.append("seq < ?")
+                params.append(seq)
+            if after:
+                seq = self._seq_of(after)
+                if seq is None:
+                    return []
+                clauses.append("seq > ?")
+                params.append(seq)
+            if event_type:
+                clauses.append("type = ?")
+                params.append(str(event_type).upper())
+            if person:
+                clauses.append("person = ?")
+                params.append(person)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            order = "ASC" if after and not before else "DESC"
+            rows = self._conn.execute(
+                f"SELECT body FROM events {where} ORDER BY seq {order} LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        if order == "ASC":
+            rows.reverse()
+        events = []
+        for (body,) in rows:
+            try:
+                events.append(json.loads(body))
+            except Exception:
+                continue
+        return events
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM events")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
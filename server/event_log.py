@@ -0,0 +1,258 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+
+
+class SegmentedEventLog:
+    """Append-only JSONL event log split into fixed-size segments.
+
+    New records go to the active segment at ``path`` (``logs/events.jsonl``).
+    When it reaches ``segment_bytes`` it is sealed as ``events.000042.jsonl``
+    (gzipped to ``.jsonl.gz`` when ``gzip_sealed``) and a new active segment
+    starts, so an append is one buffered write no matter how much history is
+    kept. ``events.index.json`` lists the sealed segments with their record
+    counts; retention deletes whole segments from the oldest end once the
+    remaining ones still hold ``retain_items`` records, and ``tail(n)`` opens
+    only the newest segments needed for ``n`` records.
+    """
+
+    def __init__(self, path, segment_bytes=256 * 1024, retain_items=5000, gzip_sealed=False):
+        self.path = path
+        self.segment_bytes = max(4096, int(segment_bytes))
+        self.retain_items = max(0, int(retain_items or 0))
+        self.gzip_sealed = bool(gzip_sealed)
+        self.log_dir = os.path.dirname(path) or "."
+        base = os.path.basename(path)
+        self._stem, self._ext = os.path.splitext(base)
+        self._ext = self._ext or ".jsonl"
+        self.index_path = os.path.join(self.log_dir, f"{self._stem}.index.json")
+        self._segment_re = re.compile(
+            re.escape(self._stem) + r"\.(\d{6})" + re.escape(self._ext) + r"(\.gz)?$"
+        )
+        self._lock = threading.Lock()
+        self._segments = []
+        self._fh = None
+        self._active_count = 0
+        self._active_bytes = 0
+        self.sealed = 0
+        self.deleted_segments = 0
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._load_index()
+        self._open_active()
+
+    # ----- index -----
+    def _segment_name(self, seq, gz):
+        return f"{self._stem}.{seq:06d}{self._ext}" + (".gz" if gz else "")
+
+    def _load_index(self):
+        segments = None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            segments = [
+                seg for seg in data.get("segments", [])
+                if os.path.isfile(os.path.join(self.log_dir, seg["name"]))
+            ]
+        except Exception:
+            segments = None
+        rebuilt = segments is None
+        if rebuilt:
+            segments = self._rebuild_index()
+        self._segments = segments
+        if rebuilt:
+            self._write_index()
+
+    def _rebuild_index(self):
+        segments = []
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError:
+            names = []
+        for name in names:
+            match = self._segment_re.match(name)
+            if not match:
+                continue
+            full = os.path.join(self.log_dir, name)
+            segments.append({
+                "seq": int(match.group(1)),
+                "name": name,
+                "count": len(self._read_segment_lines(full)),
+                "bytes": os.path.getsize(full),
+            })
+        segments.sort(key=lambda seg: seg["seq"])
+        return segments
+
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"segments": self._segments}, f)
+            os.replace(tmp, self.index_path)
+        except Exception:
+            return
+
+    # ----- active segment -----
+    def _open_active(self):
+        count = 0
+        size = 0
+        if os.path.isfile(self.path):
+            size = os.path.getsize(self.path)
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        count += 1
+        self._active_count = count
+        self._active_bytes = size
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=True) + "\n"
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line)
+            self._fh.flush()
+            self._active_count += 1
+            self._active_bytes += len(line)
+            if self._active_bytes >= self.segment_bytes:
+                self._seal_locked()
+
+    def _seal_locked(self):
+        self._fh.close()
+        self._fh = None
+        seq = self._segments[-1]["seq"] + 1 if self._segments else 1
+        sealed = os.path.join(self.log_dir, self._segment_name(seq, False))
+        try:
+            os.replace(self.path, sealed)
+            name = os.path.basename(sealed)
+            if self.gzip_sealed:
+                gz_path = sealed + ".gz"
+                with open(sealed, "rb") as src, gzip.open(gz_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(sealed)
+                name = os.path.basename(gz_path)
+            self._segments.append({
+                "seq": seq,
+                "name": name,
+                "count": self._active_count,
+                "bytes": os.path.getsize(os.path.join(self.log_dir, name)),
+            })
+            self.sealed += 1
+            self._apply_retention_locked()
+            self._write_index()
+        finally:
+            self._active_count = 0
+            self._active_bytes = 0
+            self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _apply_retention_locked(self):
+        if not self.retain_items:
+            return
+        # Called right after sealing: the active segment is empty again.
+        total = sum(seg["count"] for seg in self._segments)
+        while self._segments and total - self._segments[0]["count"] >= self.retain_items:
+            seg = self._segments.pop(0)
+            total -= seg["count"]
+            try:
+                os.remove(os.path.join(self.log_dir, seg["name"]))
+            except OSError:
+                pass
+            self.deleted_segments += 1
+
+    # ----- reading -----
+    def _read_segment_lines(self, full):
+        opener = gzip.open if full.endswith(".gz") else open
+        try:
+            with opener(full, "rb") as f:
+                return [line for line in f.read().splitlines() if line.strip()]
+        except Exception:
+            return []
+
+    def _read_tail_lines(self, full, n, block_size=64 * 1024):
+        """Last ``n`` non-empty lines of a plain segment, read backwards in blocks."""
+        if full.endswith(".gz"):
+            return self._read_segment_lines(full)[-n:] if n else []
+        lines = []
+        try:
+            with open(full, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                pos = f.tell()
+                partial = b""
+                while pos > 0 and len(lines) < n:
+                    step = min(block_size, pos)
+                    pos -= step
+                    f.seek(pos)
+                    chunk = f.read(step) + partial
+                    parts = chunk.split(b"\n")
+                    # parts[0] may be cut mid-line unless we reached the start.
+                    partial = parts.pop(0) if pos > 0 else b""
+                    for part in reversed(parts):
+                        if part.strip():
+                            lines.append(part)
+                            if len(lines) >= n:
+                                break
+                if pos == 0 and partial.strip() and len(lines) < n:
+                    lines.append(partial)
+        except Exception:
+            return []
+        lines.reverse()
+        return lines
+
+    def tail(self, n):
+        """Newest ``n`` records, newest first. Opens only the segments needed."""
+        n = max(0, int(n))
+        if n == 0:
+            return []
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            segments = list(self._segments)
+            lines = list(reversed(self._read_tail_lines(self.path, n)))
+        for seg in reversed(segments):
+            if len(lines) >= n:
+                break
+            full = os.path.join(self.log_dir, seg["name"])
+            lines.extend(reversed(self._read_tail_lines(full, n - len(lines))))
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except Exception:
+                continue
+        return records
+
+    def clear(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+            for seg in self._segments:
+                try:
+                    os.remove(os.path.join(self.log_dir, seg["name"]))
+                except OSError:
+                    pass
+            self._segments = []
+            self._write_index()
+            self._fh = open(self.path, "w", encoding="utf-8")
+            self._active_count = 0
+            self._active_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "records": self._active_count + sum(seg["count"] for seg in self._segments),
+                "bytes": self._active_bytes + sum(seg["bytes"] for seg in self._segments),
+                "activeBytes": self._active_bytes,
+                "sealed": self.sealed,
+                "deletedSegments": self.deleted_segments,
+                "gzip": self.gzip_sealed,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
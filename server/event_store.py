@@ -1,29 +1,100 @@
-import json
+import atexit
 import os
 import threading
+import time
 import uuid
+from collections import deque
 from datetime import datetime
 
 import cv2
 
+from server.clip_recorder import ClipRecorder
+from server.event_index import EventIndex
+from server.event_log import SegmentedEventLog
+from server.image_hash import dhash, hamming
+from server.media_index import MediaIndex
+from server.media_variants import MediaVariants
+from utils.tracing import span
 from config import (
     PUBLIC_BASE_URL,
     EVENT_MEDIA_DIR,
     EVENT_MAX_ITEMS,
     EVENT_MEDIA_MAX_FILES,
+    EVENT_MEDIA_MAX_BYTES,
+    EVENT_MEDIA_MAX_AGE_SEC,
+    EVENT_VARIANT_CACHE_BYTES,
+    EVENT_VARIANT_THUMB_PX,
+    EVENT_VARIANT_PREVIEW_PX,
+    EVENT_VARIANT_FACE_PX,
+    EVENT_VARIANT_EAGER_THUMB,
+    EVENT_DEDUP_ENABLED,
+    EVENT_DEDUP_TYPES,
+    EVENT_DEDUP_MAX_DISTANCE,
+    EVENT_DEDUP_WINDOW_SEC,
+    EVENT_CLIP_ENABLED,
+    EVENT_CLIP_TYPES,
+    EVENT_CLIP_PRE_SEC,
+    EVENT_CLIP_POST_SEC,
+    EVENT_CLIP_FPS,
+    EVENT_CLIP_BUFFER_BYTES,
+    EVENT_CLIP_WIDTH,
+    EVENT_CLIP_JPEG_QUALITY,
+    EVENT_CLIP_FORMAT,
+    EVENT_CLIP_MAX_FILES,
     EVENT_LOG_ENABLED,
     EVENT_LOG_PATH,
+    EVENT_LOG_SEGMENT_BYTES,
+    EVENT_LOG_RETAIN_ITEMS,
+    EVENT_LOG_GZIP,
+    EVENT_INDEX_ENABLED,
+    EVENT_INDEX_PATH,
+    EVENT_INDEX_RETAIN_DAYS,
+    EVENT_WRITE_ASYNC,
+    EVENT_WRITE_QUEUE_SIZE,
+    EVENT_WRITE_OVERFLOW,
 )
 
+MEDIA_PENDING = "pending"
+MEDIA_READY = "ready"
+MEDIA_FAILED = "failed"
+MEDIA_DROPPED = "dropped"
+
+CLIP_PENDING = "pending"
+CLIP_READY = "ready"
+CLIP_FAILED = "failed"
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
 
 class EventStore:
+    """In-memory event list with write-behind persistence.
+
+    ``add_event`` records the event and returns it right away with
+    ``mediaState = "pending"``; a single writer thread encodes the JPEG,
+    prunes ``media/`` and appends the JSONL log in event order, then sets
+    ``mediaState`` to ``ready`` (or ``failed``). At most ``queue_size``
+    frames wait for the writer; when full, ``overflow`` decides which frame
+    is given up (``drop_oldest``/``drop_new``, the event is still logged with
+    ``mediaState = "dropped"``) or whether the caller waits (``block``).
+    """
+
     def __init__(
         self,
         media_dir,
         max_items=200,
         log_enabled=True,
         log_path="",
+        log_segment_bytes=256 * 1024,
+        log_retain_items=5000,
+        log_gzip=False,
+        index_path="",
+        index_retain_days=0,
         media_max_files=0,
+        media_max_bytes=0,
+        media_max_age_sec=0,
+        async_write=True,
+        queue_size=16,
+        overflow="drop_oldest",
     ):
         self.media_dir = media_dir
         self.max_items = max_items
@@ -31,87 +102,179 @@ class EventStore:
         self.log_enabled = bool(log_enabled)
         self.log_path = log_path
         self._lock = threading.Lock()
-        self._log_lock = threading.Lock()
+        self._log = None
+        if self.log_enabled and self.log_path:
+            try:
+                self._log = SegmentedEventLog(
+                    log_path,
+                    segment_bytes=log_segment_bytes,
+                    retain_items=log_retain_items,
+                    gzip_sealed=log_gzip,
+                )
+            except Exception as exc:
+                print(f"EventStore: log disabled ({exc})")
+                self._log = None
+        self._index = None
+        if index_path:
+            try:
+                self._index = EventIndex(index_path, retain_days=index_retain_days)
+            except Exception as exc:
+                print(f"EventStore: index disabled ({exc})")
+                self._index = None
         self._events = []
         self._last_image_url = ""
         self._ensure_media_dir()
+        self.media = MediaIndex(
+            media_dir,
+            max_files=media_max_files,
+            max_bytes=media_max_bytes,
+            max_age_sec=media_max_age_sec,
+        )
+        self.variants = MediaVariants(
+            media_dir,
+            cache_max_bytes=EVENT_VARIANT_CACHE_BYTES,
+            thumb_px=EVENT_VARIANT_THUMB_PX,
+            preview_px=EVENT_VARIANT_PREVIEW_PX,
+            face_px=EVENT_VARIANT_FACE_PX,
+        )
+        self.clips = None
+        if EVENT_CLIP_ENABLED:
+            self.clips = ClipRecorder(
+                os.path.join(media_dir, "clips"),
+                pre_sec=EVENT_CLIP_PRE_SEC,
+                post_sec=EVENT_CLIP_POST_SEC,
+                fps=EVENT_CLIP_FPS,
+                width=EVENT_CLIP_WIDTH,
+                quality=EVENT_CLIP_JPEG_QUALITY,
+                buffer_max_bytes=EVENT_CLIP_BUFFER_BYTES,
+                fmt=EVENT_CLIP_FORMAT,
+                max_files=EVENT_CLIP_MAX_FILES,
+                on_done=self._on_clip_done,
+            )
 
-    def _ensure_media_dir(self):
-        os.makedirs(self.media_dir, exist_ok=True)
+        self.async_write = bool(async_write)
+        self.queue_size = max(1, int(queue_size))
+        self.overflow = overflow if overflow in OVERFLOW_POLICIES else "drop_oldest"
+        self._jobs = deque()
+        self._queued_frames = 0
+        self._jobs_cond = threading.Condition()
+        self._writer_busy = False
+        self._closing = False
+        self._writer = None
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._write_ms_ewma = None
+        self._deduped = 0
+        # (type, personName) -> deque of (monotonic ts, dHash, event) for recent written images.
+        self._recent_hashes = {}
+        self._listeners = []
+        # Versions start from the boot time in ms so they keep increasing across restarts.
+        self._version = int(time.time() * 1000)
+        self._changes = deque(maxlen=1000)
+        self.restored = 0
+        self.restore_sec = 0.0
+        self._restore_from_log()
+        self._seed_index()
 
-    def _prune_media_files(self):
-        if not self.media_max_files or self.media_max_files <= 0:
+    def _restore_from_log(self):
+        """Warm restart: reload the newest ``max_items`` events from the log tail."""
+        if self._log is None or not self.max_items:
             return
+        start = time.monotonic()
         try:
-            files = []
-            for name in os.listdir(self.media_dir):
-                path = os.path.join(self.media_dir, name)
-                if not os.path.isfile(path):
-                    continue
-                lower = name.lower()
-                if not lower.endswith((".jpg", ".jpeg", ".png")):
-                    continue
-                try:
-                    mtime = os.path.getmtime(path)
-                except Exception:
-                    mtime = 0
-                files.append((mtime, path))
-            if len(files) <= self.media_max_files:
-                return
-            files.sort(key=lambda item: item[0])
-            remove_count = len(files) - int(self.media_max_files)
-            for _, path in files[:remove_count]:
+            events = [e for e in self._log.tail(self.max_items) if isinstance(e, dict) and e.get("eventId")]
+        except Exception as exc:
+            print(f"EventStore: restore failed ({exc})")
+            return
+        with self._lock:
+            self._events = events
+            self._last_image_url = next((e["imageUrl"] for e in events if e.get("imageUrl")), "")
+        self._settle_restored_clips(events)
+        self.restored = len(events)
+        self.restore_sec = time.monotonic() - start
+
+    def _settle_restored_clips(self, events):
+        """Clips still ``pending`` in the log either finished before shutdown or never will."""
+        clip_dir = os.path.join(self.media_dir, "clips")
+        for event in events:
+            if event.get("clipState") != CLIP_PENDING:
+                continue
+            name = os.path.basename((event.get("clipUrl") or "").split("?", 1)[0])
+            event["clipState"] = CLIP_READY if name and os.path.isfile(os.path.join(clip_dir, name)) else CLIP_FAILED
+            if self._index is not None:
                 try:
-                    os.remove(path)
+                    self._index.update(event)
                 except Exception:
                     pass
-        except Exception:
-            return
-
-    def _ensure_log_dir(self):
-        if not self.log_enabled or not self.log_path:
-            return
-        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
 
-    def _append_log(self, event):
-        if not self.log_enabled or not self.log_path:
+    def _seed_index(self):
+        """First run with an index: import what the log still retains."""
+        if self._index is None or self._log is None:
             return
-        self._ensure_log_dir()
         try:
-            with self._log_lock:
-                with open(self.log_path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(event, ensure_ascii=True) + "\n")
-                self._trim_log_locked()
-        except Exception:
-            return
-
-    def _trim_log_locked(self):
-        if not self.log_enabled or not self.log_path:
-            return
-        if not self.max_items or self.max_items <= 0:
-            return
-        try:
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            if len(lines) <= self.max_items:
+            if self._index.count() > 0:
                 return
-            keep = lines[-self.max_items :]
-            with open(self.log_path, "w", encoding="utf-8") as f:
-                f.writelines(keep)
-        except Exception:
-            return
+            records = self._log.tail(self._log.stats()["records"])
+            records.reverse()
+            self._index.add_many(records)
+        except Exception as exc:
+            print(f"EventStore: index seed failed ({exc})")
 
-    def add_event(self, event_type, image_bgr, person_name=None, source="gui", meta=None):
-        self._ensure_media_dir()
+    def rebase_image_urls(self, base_url):
+        """Point stored ``/media/`` URLs at a new public base (e.g. a fresh tunnel URL)."""
+        if not base_url:
+            return 0
+        base_url = base_url.rstrip("/")
+        changed = 0
+        with self._lock:
+            for event in self._events:
+                for key in ("imageUrl", "clipUrl"):
+                    url = event.get(key) or ""
+                    idx = url.find("/media/")
+                    if idx < 0 or url.startswith(base_url + "/media/"):
+                        continue
+                    event[key] = base_url + url[idx:]
+                    changed += 1
+            idx = self._last_image_url.find("/media/")
+            if idx >= 0:
+                self._last_image_url = base_url + self._last_image_url[idx:]
+        return changed
+
+    def _ensure_media_dir(self):
+        os.makedirs(self.media_dir, exist_ok=True)
+
+    def _persist(self, event):
+        """Append to the log and the query index (writer thread, or caller when sync)."""
+        if self._log is not None:
+            try:
+                self._log.append(event)
+            except Exception:
+                pass
+        if self._index is not None:
+            try:
+                self._index.add(event)
+            except Exception as exc:
+                print(f"EventStore: index write failed ({exc})")
+
+    def add_event(self, event_type, image_bgr, person_name=None, source="gui", meta=None, trace=None):
+        """Record an event and queue its image; ``image_bgr`` is owned by the store afterwards.
+
+        ``trace`` (``utils.tracing``) gets an ``event.add`` span and its ID is
+        stored as ``meta.traceId``.
+        """
+        if trace is not None:
+            meta = dict(meta or {}, traceId=trace.id)
+        with span(trace, "event.add", type=event_type) as info:
+            event = self._add_event(event_type, image_bgr, person_name, source, meta)
+            info["eventId"] = event.get("eventId") if event else None
+        return event
+
+    def _add_event(self, event_type, image_bgr, person_name, source, meta):
+        now = datetime.now()
         event_id = f"evt_{uuid.uuid4().hex[:8]}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        filename = f"{event_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-        path = os.path.join(self.media_dir, filename)
-        try:
-            cv2.imwrite(path, image_bgr)
-        except Exception:
-            return None
-        self._prune_media_files()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        filename = f"{event_id}_{now.strftime('%Y%m%d_%H%M%S')}.jpg"
 
         image_url = f"{PUBLIC_BASE_URL}/media/{filename}"
         event = {
@@ -119,18 +282,86 @@ class EventStore:
             "timestamp": timestamp,
             "type": event_type,
             "imageUrl": image_url,
+            "mediaState": MEDIA_PENDING,
             "personName": person_name,
             "source": source,
-            "meta": meta or {},
+            "meta": dict(meta or {}),
         }
+        image_hash = None
+        original = None
+        if EVENT_DEDUP_ENABLED and image_bgr is not None and str(event_type).upper() in EVENT_DEDUP_TYPES:
+            image_hash = dhash(image_bgr, event["meta"].get("bbox"))
+            original = self._find_duplicate(event_type, person_name, image_hash)
+        if original is not None:
+            # Same visitor, same picture: point at the stored image instead of writing another.
+            image_url = original["imageUrl"]
+            event["imageUrl"] = image_url
+            event["mediaState"] = MEDIA_READY
+            event["meta"]["dedupOf"] = original["eventId"]
+            self._deduped += 1
+            self._last_image_url = image_url
+            if self.async_write:
+                self._insert_event(event)
+                self._enqueue(event, None, None)
+            else:
+                self._persist(event)
+                self._insert_event(event)
+            return event
+        if image_hash is not None:
+            self._remember_hash(event_type, person_name, image_hash, event)
+
+        if self.clips is not None and str(event_type).upper() in EVENT_CLIP_TYPES:
+            clip_name = f"{event_id}_{now.strftime('%Y%m%d_%H%M%S')}{self.clips.extension}"
+            if self.clips.request(event_id, clip_name):
+                event["clipUrl"] = f"{PUBLIC_BASE_URL}/media/clips/{clip_name}"
+                event["clipState"] = CLIP_PENDING
+
+        if not self.async_write:
+            if not self._write_media(event, filename, image_bgr):
+                return None
+            self._persist(event)
+            self._insert_event(event)
+            self._last_image_url = image_url
+            return event
+
         self._last_image_url = image_url
-        self._append_log(event)
+        self._insert_event(event)
+        self._enqueue(event, filename, image_bgr)
+        return event
 
+    def _find_duplicate(self, event_type, person_name, image_hash):
+        """Recent event of the same identity whose stored image is within the Hamming threshold."""
+        if image_hash is None:
+            return None
+        horizon = time.monotonic() - EVENT_DEDUP_WINDOW_SEC
+        match = None
         with self._lock:
-            self._events.insert(0, event)
-            if self.max_items and len(self._events) > self.max_items:
-                self._events = self._events[: self.max_items]
-        return event
+            recent = self._recent_hashes.get((str(event_type).upper(), person_name))
+            while recent and recent[0][0] < horizon:
+                recent.popleft()
+            for _, known_hash, event in reversed(recent or ()):
+                if event.get("mediaState") != MEDIA_READY:
+                    continue
+                if hamming(known_hash, image_hash) <= EVENT_DEDUP_MAX_DISTANCE:
+                    match = event
+                    break
+            if match is None:
+                return None
+            name = os.path.basename((match.get("imageUrl") or "").split("?", 1)[0])
+            original = dict(match)
+        # The file may have been expired by retention since. touch() makes it the newest
+        # file, so it is kept as long as a fresh copy for this event would have been.
+        if not name or not self.media.touch(name):
+            return None
+        return original
+
+    def _remember_hash(self, event_type, person_name, image_hash, event):
+        key = (str(event_type).upper(), person_name)
+        with self._lock:
+            recent = self._recent_hashes.get(key)
+            if recent is None:
+                recent = self._recent_hashes[key] = deque(maxlen=8)
+            recent.append((time.monotonic(), image_hash, event))
 
     def log_action(self, action, ok, message="", source="api", request_event_id=None):
         event_id = f"act_{uuid.uuid4().hex[:8]}"
@@ -149,51 +380,336 @@ class EventStore:
                 "requestEventId": request_event_id,
             },
         }
-        self._append_log(event)
+        if self.async_write:
+            self._insert_event(event)
+            # Log-only job: keeps the JSONL in the same order as the events.
+            self._enqueue(event, None, None)
+        else:
+            self._persist(event)
+            self._insert_event(event)
+        return event
+
+    def _insert_event(self, event):
         with self._lock:
             self._events.insert(0, event)
             if self.max_items and len(self._events) > self.max_items:
                 self._events = self._events[: self.max_items]
-        return event
+            snapshot = dict(event)
+            self._bump_locked(event.get("eventId"))
+        self._notify("event", snapshot)
+
+    def _bump_locked(self, event_id):
+        self._version += 1
+        self._changes.append((self._version, event_id))
+        return self._version
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def changes_since(self, since):
+        """Delta for ``/events?since=``: events changed after ``since`` plus clear tombstones.
+
+        ``reset`` is true when ``since`` is older than the change history (or
+        from before a restart); the client should then replace its list with
+        ``events``.
+        """
+        with self._lock:
+            version = self._version
+            oldest = self._changes[0][0] if self._changes else version + 1
+            if since >= version:
+                return {"version": version, "reset": False, "events": [], "tombstones": []}
+            if since < oldest - 1:
+                return {
+                    "version": version,
+                    "reset": True,
+                    "events": [dict(e) for e in self._events],
+                    "tombstones": [],
+                }
+            changed = set()
+            tombstones = []
+            for change_version, event_id in self._changes:
+                if change_version <= since:
+                    continue
+                if event_id is None:
+                    changed.clear()
+                    tombstones.append({"version": change_version, "kind": "clear"})
+                else:
+                    changed.add(event_id)
+            events = [dict(e) for e in self._events if e.get("eventId") in changed]
+        return {"version": version, "reset": False, "events": events, "tombstones": tombstones}
+
+    def add_listener(self, callback):
+        """``callback(kind, event)`` for ``event`` (new), ``update`` (media landed) and ``clear``.
+
+        Called on the thread that changed the store; it must not block.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self, kind, event):
+        for callback in list(self._listeners):
+            try:
+                callback(kind, event)
+            except Exception as exc:
+                print(f"EventStore: listener failed ({exc})")
+
+    def _set_media_state(self, event, state):
+        with self._lock:
+            event["mediaState"] = state
+
+    def _on_clip_done(self, event_id, ok):
+        """Clip encoder callback: mark the event and push an ``update``."""
+        record = None
+        with self._lock:
+            for event in self._events:
+                if event.get("eventId") == event_id:
+                    event["clipState"] = CLIP_READY if ok else CLIP_FAILED
+                    record = dict(event)
+                    break
+        if record is None:
+            return
+        if self._index is not None:
+            try:
+                self._index.update(record)
+            except Exception as exc:
+                print(f"EventStore: index update failed ({exc})")
+        with self._lock:
+            self._bump_locked(event_id)
+        self._notify("update", record)
+
+    def _write_media(self, event, filename, image_bgr):
+        self._ensure_media_dir()
+        path = os.path.join(self.media_dir, filename)
+        try:
+            ok = bool(cv2.imwrite(path, image_bgr))
+        except Exception:
+            ok = False
+        if ok:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            self.media.add(filename, size=size)
+            if EVENT_VARIANT_EAGER_THUMB:
+                # The frame is already decoded here; a list-row thumbnail costs ~1 ms.
+                self.variants.write_eager(filename, image_bgr, "thumb")
+        self._set_media_state(event, MEDIA_READY if ok else MEDIA_FAILED)
+        return ok
+
+    def _enqueue(self, event, filename, image_bgr):
+        with self._jobs_cond:
+            closing = self._closing
+        if closing:
+            # Late events after close(): persist inline rather than lose them.
+            if image_bgr is not None:
+                self._write_media(event, filename, image_bgr)
+            self._persist(event)
+            return
+        with self._jobs_cond:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="event-writer", daemon=True)
+                self._writer.start()
+            if image_bgr is not None and self._queued_frames >= self.queue_size:
+                if self.overflow == "block":
+                    while self._queued_frames >= self.queue_size and not self._closing:
+                        self._jobs_cond.wait(0.5)
+                elif self.overflow == "drop_new":
+                    image_bgr = None
+                    self._drop_frame(event)
+                else:
+                    for job in self._jobs:
+                        if job[2] is not None:
+                            job[2] = None
+                            self._queued_frames -= 1
+                            self._drop_frame(job[0])
+                            break
+            if image_bgr is not None:
+                self._queued_frames += 1
+            self._jobs.append([event, filename, image_bgr])
+            self._jobs_cond.notify_all()
+
+    def _drop_frame(self, event):
+        self._dropped += 1
+        with self._lock:
+            url = event.get("imageUrl")
+            event["mediaState"] = MEDIA_DROPPED
+            event["imageUrl"] = ""
+            if url and self._last_image_url == url:
+                # UNLOCK/LOCK events reuse _last_image_url: fall back to the newest image on disk.
+                self._last_image_url = next(
+                    (e["imageUrl"] for e in self._events if e.get("imageUrl") and e.get("mediaState") == MEDIA_READY),
+                    "",
+                )
+
+    def _writer_loop(self):
+        while True:
+            with self._jobs_cond:
+                while not self._jobs and not self._closing:
+                    self._jobs_cond.wait()
+                if not self._jobs:
+                    return
+                event, filename, image_bgr = self._jobs.popleft()
+                if image_bgr is not None:
+                    self._queued_frames -= 1
+                self._writer_busy = True
+                self._jobs_cond.notify_all()
+            try:
+                if image_bgr is not None:
+                    start = time.monotonic()
+                    ok = self._write_media(event, filename, image_bgr)
+                    elapsed_ms = (time.monotonic() - start) * 1000.0
+                    with self._jobs_cond:
+                        if ok:
+                            self._written += 1
+                        else:
+                            self._failed += 1
+                        if self._write_ms_ewma is None:
+                            self._write_ms_ewma = elapsed_ms
+                        else:
+                            self._write_ms_ewma = 0.8 * self._write_ms_ewma + 0.2 * elapsed_ms
+                with self._lock:
+                    record = dict(event)
+                self._persist(record)
+                with self._lock:
+                    # The row is in the log/index now: invalidate cached /events pages.
+                    self._bump_locked(record.get("eventId"))
+                if "mediaState" in record:
+                    self._notify("update", record)
+            finally:
+                with self._jobs_cond:
+                    self._writer_busy = False
+                    self._jobs_cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued image and log line is on disk."""
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._jobs_cond:
+            while self._jobs or self._writer_busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._jobs_cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        self.flush(timeout=timeout)
+        with self._jobs_cond:
+            self._closing = True
+            self._jobs_cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout=1.0)
+        self.media.close(timeout=timeout)
+        self.variants.close(timeout=timeout)
+        if self.clips is not None:
+            self.clips.close(timeout=timeout)
+        if self._log is not None:
+            self._log.close()
+        if self._index is not None:
+            self._index.close()
+
+    def writer_stats(self):
+        with self._jobs_cond:
+            return {
+                "async": self.async_write,
+                "overflow": self.overflow,
+                "queued": len(self._jobs),
+                "queuedFrames": self._queued_frames,
+                "queueSize": self.queue_size,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "deduped": self._deduped,
+                "writeMs": None if self._write_ms_ewma is None else round(self._write_ms_ewma, 1),
+            }
+
+    def get_event(self, event_id):
+        with self._lock:
+            for event in self._events:
+                if event.get("eventId") == event_id:
+                    return dict(event)
+        if self._index is not None:
+            return self._index.get(event_id)
+        return None
+
+    def query_events(self, limit=50, before=None, after=None, event_type=None, person=None):
+        """Filtered page of events, newest first; ``before``/``after`` are eventId cursors.
+
+        The newest page (no cursor) is built from RAM, which holds the events
+        the writer has not indexed yet, topped up with older rows from the
+        index; it changes only together with ``version``. Cursor pages come
+        from the index when there is one.
+        """
+        limit = max(1, int(limit))
+        if self._index is not None and (before or after):
+            return self._index.query(
+                limit=limit,
+                before=before,
+                after=after,
+                event_type=event_type,
+                person=person,
+            )
+        with self._lock:
+            events = [dict(event) for event in self._events]
+        if before:
+            ids = [e.get("eventId") for e in events]
+            events = events[ids.index(before) + 1:] if before in ids else []
+        if after:
+            ids = [e.get("eventId") for e in events]
+            events = events[: ids.index(after)] if after in ids else []
+        if event_type:
+            events = [e for e in events if str(e.get("type")).upper() == str(event_type).upper()]
+        if person:
+            events = [e for e in events if e.get("personName") == person]
+        if after and not before:
+            return events[-limit:]
+        if self._index is not None and len(events) < limit:
+            seen = {e.get("eventId") for e in events}
+            older = self._index.query(limit=limit, event_type=event_type, person=person)
+            events += [e for e in older if e.get("eventId") not in seen]
+        return events[:limit]
 
     def list_events(self):
         with self._lock:
-            return list(self._events)
+            return [dict(event) for event in self._events]
 
     def clear_events(self, remove_media=True, remove_log=True):
         removed_media = 0
         removed_log = False
+        with self._jobs_cond:
+            while self._jobs:
+                event, _, image_bgr = self._jobs.popleft()
+                if image_bgr is not None:
+                    self._queued_frames -= 1
+            self._jobs_cond.notify_all()
+        self.flush(timeout=5.0)
         with self._lock:
             self._events.clear()
+            self._recent_hashes.clear()
             self._last_image_url = ""
 
         if remove_media:
-            try:
-                for name in os.listdir(self.media_dir):
-                    path = os.path.join(self.media_dir, name)
-                    if not os.path.isfile(path):
-                        continue
-                    lower = name.lower()
-                    if not lower.endswith((".jpg", ".jpeg", ".png")):
-                        continue
-                    try:
-                        os.remove(path)
-                        removed_media += 1
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+            # Files are unlinked by the media janitor, not on the request thread.
+            removed_media = self.media.clear()
+            self.variants.clear()
+            if self.clips is not None:
+                self.clips.clear()
+
+        if self._index is not None:
+            self._index.clear()
 
-        if remove_log and self.log_enabled and self.log_path:
-            self._ensure_log_dir()
+        if remove_log and self._log is not None:
             try:
-                with self._log_lock:
-                    with open(self.log_path, "w", encoding="utf-8") as f:
-                        f.write("")
+                self._log.clear()
                 removed_log = True
             except Exception:
                 removed_log = False
 
+        with self._lock:
+            self._bump_locked(None)
+        self._notify("clear", {"removedMedia": removed_media, "removedLog": removed_log})
         return {"removedMedia": removed_media, "removedLog": removed_log}
 
 
@@ -202,8 +718,19 @@ _event_store = EventStore(
     EVENT_MAX_ITEMS,
     log_enabled=EVENT_LOG_ENABLED,
     log_path=EVENT_LOG_PATH,
+    log_segment_bytes=EVENT_LOG_SEGMENT_BYTES,
+    log_retain_items=EVENT_LOG_RETAIN_ITEMS,
+    log_gzip=EVENT_LOG_GZIP,
+    index_path=EVENT_INDEX_PATH if EVENT_INDEX_ENABLED else "",
+    index_retain_days=EVENT_INDEX_RETAIN_DAYS,
     media_max_files=EVENT_MEDIA_MAX_FILES,
+    media_max_bytes=EVENT_MEDIA_MAX_BYTES,
+    media_max_age_sec=EVENT_MEDIA_MAX_AGE_SEC,
+    async_write=EVENT_WRITE_ASYNC,
+    queue_size=EVENT_WRITE_QUEUE_SIZE,
+    overflow=EVENT_WRITE_OVERFLOW,
 )
+atexit.register(_event_store.close)
 
 
 def get_event_store():
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_EVENT_STREAM_REPLAY = _get_cfg("EVENT_STREAM_REPLAY", 200)
+CONFIG_EVENT_STREAM_CLIENT_BUFFER = _get_cfg("EVENT_STREAM_CLIENT_BUFFER", 32)
+CONFIG_EVENT_STREAM_KEEPALIVE_SEC = _get_cfg("EVENT_STREAM_KEEPALIVE_SEC", 15.0)
+
+
+class _Client:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, message):
+        # Runs on the client's event loop.
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def offer(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Loop already closed: the client is gone.
+            pass
+
+
+class EventBroadcaster:
+    """Fans out EventStore changes to SSE/WebSocket clients.
+
+    ``publish`` is called from whichever thread changed the store (GUI,
+    ring button, event writer, API) and never blocks: each message gets a
+    monotonically increasing id, is kept in a replay ring of ``replay``
+    messages for ``Last-Event-ID`` resume, and is handed to every client's
+    bounded queue on that client's event loop (oldest dropped when full).
+    """
+
+    def __init__(self, replay=CONFIG_EVENT_STREAM_REPLAY, client_buffer=CONFIG_EVENT_STREAM_CLIENT_BUFFER):
+        self.client_buffer = max(1, int(client_buffer))
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._ring = deque(maxlen=max(1, int(replay)))
+        self._clients = set()
+        self.published = 0
+
+    def publish(self, kind, event):
+        with self._lock:
+            self._seq += 1
+            message = {"id": self._seq, "kind": kind, "event": event}
+            self._ring.append(message)
+            clients = list(self._clients)
+            self.published += 1
+        for client in clients:
+            client.offer(message)
+        return message["id"]
+
+    def subscribe(self, last_event_id=None):
+        """Register a client on the running loop; returns (client, backlog to replay)."""
+        client = _Client(asyncio.get_running_loop(), self.client_buffer)
+        with self._lock:
+            backlog = []
+            if last_event_id is not None:
+                backlog = [m for m in self._ring if m["id"] > last_event_id]
+            self._clients.add(client)
+        return client, backlog
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "published": self.published,
+                "lastId": self._seq,
+                "replay": len(self._ring),
+                "dropped": sum(c.dropped for c in self._clients),
+            }
+
+
+def parse_last_event_id(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_sse(message):
+    data = json.dumps(message["event"], ensure_ascii=True)
+    return f"id: {message['id']}\nevent: {message['kind']}\ndata: {data}\n\n"
+
+
+async def sse_messages(broadcaster, last_event_id=None, is_disconnected=None):
+    """Async generator of SSE frames for one client, with keep-alive comments."""
+    client, backlog = broadcaster.subscribe(last_event_id)
+    try:
+        yield "retry: 2000\n\n"
+        for message in backlog:
+            yield format_sse(message)
+        keepalive = max(1.0, float(CONFIG_EVENT_STREAM_KEEPALIVE_SEC))
+        while True:
+            try:
+                message = await asyncio.wait_for(client.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        broadcaster.unsubscribe(client)
+
+
+_broadcaster = EventBroadcaster()
+
+
+def get_event_broadcaster():
+    return _broadcaster
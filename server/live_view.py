@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+
+import cv2
+
+from server.control import get_frame_source
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_LIVE_VIEW_WIDTH = _get_cfg("LIVE_VIEW_WIDTH", 640)
+CONFIG_LIVE_VIEW_FPS = _get_cfg("LIVE_VIEW_FPS", 10.0)
+CONFIG_LIVE_VIEW_JPEG_QUALITY = _get_cfg("LIVE_VIEW_JPEG_QUALITY", 70)
+
+BOUNDARY = "frame"
+
+
+class _Viewer:
+    """One MJPEG client: a single-slot queue, newer frames replace unsent ones."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=1)
+        self.skipped = 0
+
+    def _put(self, part):
+        # Runs on the viewer's event loop.
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.skipped += 1
+        self.queue.put_nowait(part)
+
+    def offer(self, part):
+        try:
+            self.loop.call_soon_threadsafe(self._put, part)
+        except RuntimeError:
+            # Loop already closed: the viewer is gone.
+            pass
+
+
+class LiveView:
+    """Shared JPEG encoder for ``/live.mjpg`` and ``/snapshot.jpg``.
+
+    One encoder thread per process, started by the first viewer and exiting
+    with the last one, so nothing is encoded while nobody watches. It polls
+    the frame source at most ``fps`` times a second and only encodes when
+    the runtime's frame sequence moved; the resulting multipart chunk is one
+    ``bytes`` object handed to every viewer. A viewer that is still sending
+    the previous chunk gets it replaced (frame skipped) instead of queued.
+    Snapshots reuse the last chunk's JPEG when the frame has not changed.
+    """
+
+    def __init__(
+        self,
+        width=CONFIG_LIVE_VIEW_WIDTH,
+        fps=CONFIG_LIVE_VIEW_FPS,
+        quality=CONFIG_LIVE_VIEW_JPEG_QUALITY,
+        source=get_frame_source,
+    ):
+        self.width = max(64, int(width))
+        self.interval = 1.0 / max(0.5, float(fps))
+        self.quality = int(quality)
+        self._source = source
+        self._lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._viewers = set()
+        self._thread = None
+        self._seq = None
+        self._jpeg = None
+        self._part = None
+        self.encoded = 0
+        self.encode_ms = 0.0
+
+    # ----- encoding -----
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, max(1, int(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        return buf.tobytes() if ok else None
+
+    def _refresh(self):
+        """Encode the source's newest frame if it changed; True when a new JPEG was made."""
+        source = self._source()
+        if source is None:
+            return False
+        seq, frame = source.latest_frame()
+        if frame is None:
+            return False
+        with self._encode_lock:
+            if seq == self._seq:
+                return False
+            start = time.perf_counter()
+            jpeg = self._encode(frame)
+            if jpeg is None:
+                return False
+            header = (
+                f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+            ).encode("ascii")
+            self._part = header + jpeg + b"\r\n"
+            self._jpeg = jpeg
+            self._seq = seq
+            self.encoded += 1
+            self.encode_ms = (time.perf_counter() - start) * 1000.0
+            return True
+
+    def snapshot(self):
+        """JPEG bytes of the newest frame, or None when no frame is available."""
+        self._refresh()
+        return self._jpeg
+
+    # ----- viewers -----
+    def subscribe(self):
+        viewer = _Viewer(asyncio.get_running_loop())
+        with self._lock:
+            self._viewers.add(viewer)
+            part = self._part
+            self._wake.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-view", daemon=True)
+                self._thread.start()
+        if part is not None:
+            viewer.offer(part)
+        return viewer
+
+    def unsubscribe(self, viewer):
+        with self._lock:
+            self._viewers.discard(viewer)
+            if not self._viewers:
+                self._wake.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._viewers:
+                    self._thread = None
+                    return
+            start = time.monotonic()
+            try:
+                fresh = self._refresh()
+            except Exception:
+                fresh = False
+            if fresh:
+                with self._lock:
+                    viewers = list(self._viewers)
+                    part = self._part
+                for viewer in viewers:
+                    viewer.offer(part)
+            self._wake.wait(max(0.0, self.interval - (time.monotonic() - start)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "viewers": len(self._viewers),
+                "running": self._thread is not None,
+                "encoded": self.encoded,
+                "encodeMs": round(self.encode_ms, 2),
+                "skipped": sum(v.skipped for v in self._viewers),
+                "width": self.width,
+                "fps": round(1.0 / self.interval, 2),
+            }
+
+
+async def mjpeg_parts(live, is_disconnected=None, idle_check_sec=5.0):
+    """Async generator of multipart JPEG chunks for one viewer."""
+    viewer = live.subscribe()
+    try:
+        while True:
+            try:
+                part = await asyncio.wait_for(viewer.queue.get(), timeout=idle_check_sec)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                continue
+            yield part
+    finally:
+        live.unsubscribe(viewer)
+
+
+_live_view = LiveView()
+
+
+def get_live_view():
+    return _live_view
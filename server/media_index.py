@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+MEDIA_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class MediaIndex:
+    """Ordered in-memory index of ``media/`` with count/byte/age retention.
+
+    The directory is scanned once at construction; afterwards ``add()`` and
+    ``discard()`` keep the index current, so retention never lists or stats
+    the directory again. Files are ordered oldest first and expired from the
+    front; unlinking happens on a janitor thread, which also expires files by
+    age every ``sweep_interval_sec`` when no new media arrives.
+    """
+
+    def __init__(
+        self,
+        media_dir,
+        max_files=0,
+        max_bytes=0,
+        max_age_sec=0,
+        sweep_interval_sec=60.0,
+        extensions=MEDIA_EXTENSIONS,
+    ):
+        self.media_dir = media_dir
+        self.extensions = tuple(extensions)
+        self.max_files = max(0, int(max_files or 0))
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self.max_age_sec = max(0.0, float(max_age_sec or 0))
+        self.sweep_interval_sec = max(1.0, float(sweep_interval_sec))
+        self._lock = threading.Condition()
+        self._files = OrderedDict()
+        self._total_bytes = 0
+        self._trash = deque()
+        self._deleting = 0
+        self._closing = False
+        self.deleted = 0
+        self.delete_errors = 0
+        self.seed_sec = 0.0
+        self._seed()
+        self._janitor = threading.Thread(target=self._janitor_loop, name="media-janitor", daemon=True)
+        self._janitor.start()
+
+    def _seed(self):
+        start = time.monotonic()
+        entries = []
+        try:
+            with os.scandir(self.media_dir) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(self.extensions):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+        except OSError:
+            entries = []
+        entries.sort()
+        with self._lock:
+            for mtime, name, size in entries:
+                self._files[name] = (mtime, size)
+                self._total_bytes += size
+            self._enforce_locked(time.time())
+        self.seed_sec = time.monotonic() - start
+
+    def add(self, name, size=None, mtime=None):
+        """Index a file just written to ``media_dir`` and apply retention."""
+        if size is None:
+            try:
+                size = os.path.getsize(os.path.join(self.media_dir, name))
+            except OSError:
+                size = 0
+        now = time.time()
+        with self._lock:
+            old = self._files.pop(name, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._files[name] = (now if mtime is None else mtime, int(size))
+            self._total_bytes += int(size)
+            self._enforce_locked(now)
+
+    def touch(self, name):
+        """Mark a file as used now (LRU order for caches). Returns False if unknown.
+
+        The stored mtime moves with it, so the index stays in mtime order and
+        age retention restarts from now; the file's own mtime is updated too,
+        so the order survives a restart (``_seed`` sorts by mtime).
+        """
+        now = time.time()
+        with self._lock:
+            item = self._files.get(name)
+            if item is None:
+                return False
+            self._files[name] = (now, item[1])
+            self._files.move_to_end(name)
+        try:
+            os.utime(os.path.join(self.media_dir, name), (now, now))
+        except OSError:
+            pass
+        return True
+
+    def discard(self, name):
+        """Drop a file from the index and delete it in the background."""
+        with self._lock:
+            item = self._files.pop(name, None)
+            if item is None:
+                return False
+            self._total_bytes -= item[1]
+            self._trash.append(name)
+            self._lock.notify_all()
+            return True
+
+    def clear(self):
+        """Forget every indexed file; the janitor deletes them. Returns the count."""
+        with self._lock:
+            names = list(self._files.keys())
+            self._files.clear()
+            self._total_bytes = 0
+            self._trash.extend(names)
+            self._lock.notify_all()
+        return len(names)
+
+    def _over_limit_locked(self, now):
+        if not self._files:
+            return False
+        if self.max_files and len(self._files) > self.max_files:
+            return True
+        if self.max_bytes and self._total_bytes > self.max_bytes:
+            return True
+        if self.max_age_sec:
+            oldest_mtime = next(iter(self._files.values()))[0]
+            if now - oldest_mtime > self.max_age_sec:
+                return True
+        return False
+
+    def _enforce_locked(self, now):
+        expired = 0
+        while self._over_limit_locked(now):
+            name, (_, size) = self._files.popitem(last=False)
+            self._total_bytes -= size
+            self._trash.append(name)
+            expired += 1
+        if expired:
+            self._lock.notify_all()
+        return expired
+
+    def _janitor_loop(self):
+        while True:
+            with self._lock:
+                if not self._trash and not self._closing:
+                    self._lock.wait(self.sweep_interval_sec)
+                    self._enforce_locked(time.time())
+                if not self._trash:
+                    if self._closing:
+                        return
+                    continue
+                batch = []
+                while self._trash and len(batch) < 256:
+                    batch.append(self._trash.popleft())
+                self._deleting = len(batch)
+            for name in batch:
+                try:
+                    os.remove(os.path.join(self.media_dir, name))
+                    removed = True
+                except FileNotFoundError:
+                    removed = False
+                except OSError:
+                    removed = False
+                    with self._lock:
+                        self.delete_errors += 1
+                if removed:
+                    with self._lock:
+                        self.deleted += 1
+            with self._lock:
+                self._deleting = 0
+
+    def flush(self, timeout=5.0):
+        """Wait until queued deletions are done."""
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._trash and not self._deleting:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "pendingDelete": len(self._trash) + self._deleting,
+                "deleted": self.deleted,
+                "deleteErrors": self.delete_errors,
+                "maxFiles": self.max_files,
+                "maxBytes": self.max_bytes,
+                "maxAgeSec": self.max_age_sec,
+                "seedMs": round(self.seed_sec * 1000.0, 1),
+            }
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            self._closing = True
+            self._lock.notify_all()
+        self._janitor.join(timeout=timeout)
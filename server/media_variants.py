@@ -0,0 +1,135 @@
+import os
+import threading
+
+import cv2
+
+from server.media_index import MediaIndex
+
+VARIANTS = ("thumb", "preview", "face")
+
+
+class MediaVariants:
+    """Downscaled derivatives of event images with an LRU disk cache.
+
+    ``thumb`` and ``preview`` fit the image into a square of the configured
+    size; ``face`` crops ``meta.bbox`` with a margin. Variants are written to
+    ``media/.variants/`` on first request (``thumb`` also at capture time via
+    ``write_eager``) and evicted least-recently-used once the cache exceeds
+    ``cache_max_bytes``. File names never change, so responses can be
+    cached as immutable.
+    """
+
+    def __init__(
+        self,
+        media_dir,
+        cache_max_bytes=64 * 1024 * 1024,
+        thumb_px=160,
+        preview_px=640,
+        face_px=256,
+        quality=80,
+    ):
+        self.media_dir = media_dir
+        self.cache_dir = os.path.join(media_dir, ".variants")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.sizes = {"thumb": int(thumb_px), "preview": int(preview_px), "face": int(face_px)}
+        self.quality = int(quality)
+        self._cache = MediaIndex(self.cache_dir, max_bytes=cache_max_bytes)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def variant_name(self, filename, variant):
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return f"{stem}.{variant}.jpg"
+
+    def _fit(self, image, max_side):
+        h, w = image.shape[:2]
+        scale = float(max_side) / float(max(h, w))
+        if scale >= 1.0:
+            return image
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def _face_crop(self, image, bbox):
+        h, w = image.shape[:2]
+        try:
+            x1, y1, x2, y2 = [int(v) for v in bbox]
+        except Exception:
+            return None
+        if x2 <= x1 or y2 <= y1:
+            return None
+        mx = int((x2 - x1) * 0.25)
+        my = int((y2 - y1) * 0.25)
+        x1, y1 = max(0, x1 - mx), max(0, y1 - my)
+        x2, y2 = min(w, x2 + mx), min(h, y2 + my)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return image[y1:y2, x1:x2]
+
+    def render(self, image, variant, bbox=None):
+        if variant == "face":
+            crop = self._face_crop(image, bbox) if bbox else None
+            image = crop if crop is not None else image
+        return self._fit(image, self.sizes[variant])
+
+    def _store(self, name, image):
+        ok, buf = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        if not ok:
+            return None
+        path = os.path.join(self.cache_dir, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.tobytes())
+        os.replace(tmp, path)
+        self._cache.add(name, size=len(buf))
+        return path
+
+    def write_eager(self, filename, image_bgr, variant="thumb"):
+        """Build a variant from a frame already in memory (event writer thread)."""
+        try:
+            return self._store(self.variant_name(filename, variant), self.render(image_bgr, variant))
+        except Exception:
+            return None
+
+    def _key_lock(self, name):
+        with self._locks_guard:
+            lock = self._locks.get(name)
+            if lock is None:
+                if len(self._locks) > 256:
+                    self._locks.clear()
+                lock = self._locks[name] = threading.Lock()
+            return lock
+
+    def get(self, filename, variant, bbox=None):
+        """Path of the cached variant, generating it on a miss; None if the original is gone."""
+        if variant not in VARIANTS:
+            raise ValueError(f"unknown variant: {variant}")
+        source = os.path.join(self.media_dir, os.path.basename(filename))
+        if not os.path.isfile(source):
+            return None
+        name = self.variant_name(filename, variant)
+        path = os.path.join(self.cache_dir, name)
+        if self._cache.touch(name) and os.path.isfile(path):
+            self.hits += 1
+            return path
+        with self._key_lock(name):
+            if self._cache.touch(name) and os.path.isfile(path):
+                self.hits += 1
+                return path
+            image = cv2.imread(source)
+            if image is None:
+                return None
+            self.misses += 1
+            return self._store(name, self.render(image, variant, bbox))
+
+    def clear(self):
+        return self._cache.clear()
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats.update({"hits": self.hits, "misses": self.misses})
+        return stats
+
+    def close(self, timeout=5.0):
+        self._cache.close(timeout=timeout)
@@ -0,0 +1,557 @@
+import os
+import shlex
+import shutil
+import subprocess
+import time
+from collections import deque
+
+from gui.alert import KnownPersonAlert
+from gui.door_commands import CLOSE, OPEN
+from gui.door_control import DoorController
+from gui.doorbell_button import DoorbellRingButton
+from service.result_bus import ResultBus
+from utils.audio_service import PRIORITY_PROMPT, get_audio_service
+from utils.lcd_i2c import get_lcd_display
+from utils.tracing import get_tracer, span
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_EVENT_CAPTURE_ENABLED = _get_cfg("EVENT_CAPTURE_ENABLED", False)
+CONFIG_EVENT_CAPTURE_INTERVAL_SEC = _get_cfg("EVENT_CAPTURE_INTERVAL_SEC", 5.0)
+CONFIG_FACE_DISTANCE_PROMPT_ENABLED = _get_cfg("FACE_DISTANCE_PROMPT_ENABLED", True)
+CONFIG_FACE_DISTANCE_PROMPT_COOLDOWN_SEC = _get_cfg("FACE_DISTANCE_PROMPT_COOLDOWN_SEC", 3.0)
+CONFIG_FACE_DISTANCE_PROMPT_CMD = _get_cfg("FACE_DISTANCE_PROMPT_CMD", "")
+CONFIG_FACE_DISTANCE_PROMPT_NEAR_MP3 = _get_cfg("FACE_DISTANCE_PROMPT_NEAR_MP3", "")
+CONFIG_FACE_DISTANCE_PROMPT_FAR_MP3 = _get_cfg("FACE_DISTANCE_PROMPT_FAR_MP3", "")
+CONFIG_FACE_DISTANCE_PROMPT_PLAYER = _get_cfg("FACE_DISTANCE_PROMPT_PLAYER", "")
+CONFIG_RESULT_BUS_ENABLED = _get_cfg("RESULT_BUS_ENABLED", True)
+CONFIG_RESULT_BUS_QUEUE_SIZE = _get_cfg("RESULT_BUS_QUEUE_SIZE", 8)
+CONFIG_RING_RESULT_MAX_AGE_SEC = _get_cfg("RING_RESULT_MAX_AGE_SEC", 1.0)
+CONFIG_RING_INFER_TIMEOUT_SEC = _get_cfg("RING_INFER_TIMEOUT_SEC", 1.5)
+
+_SIZE_STATUSES = ("too_small", "too_large")
+
+
+def result_person(result):
+    """Map an inference result to the (event type, person name) used by events and the LCD."""
+    if not result or not result.get("has_face"):
+        return None, None
+    rid = result.get("id")
+    name = result.get("name")
+    score = result.get("score")
+    if rid and name and score is not None:
+        return "KNOWN", name
+    return "UNKNOWN", None
+
+
+class InferenceResultMessage:
+    def __init__(self, result, frame=None):
+        self.result = result
+        self.frame = frame
+
+
+class StaticSceneMessage:
+    def __init__(self, last_result=None):
+        self.last_result = last_result
+
+
+class DoorStateMessage:
+    def __init__(self, result, frame, door_open_before, door_open_after):
+        self.result = result
+        self.frame = frame
+        self.door_open_before = door_open_before
+        self.door_open_after = door_open_after
+
+
+class LcdMessage:
+    def __init__(self, result=None):
+        self.result = result
+
+
+class DoorbellController:
+    """Door policy, alerts, distance prompts, event capture, ring events and LCD.
+
+    Holds no Qt objects so the Live tab and the headless daemon share the
+    same control logic. ``frame_provider`` and ``result_provider`` return the
+    owner's latest camera frame and inference result; ``on_event`` is called
+    with every stored event (from the ring button thread for ring events).
+
+    With the result bus on, ``handle_result`` only publishes a message; door
+    policy, alert, distance prompt, event capture and LCD each run on their
+    own bus consumer thread, so I2C, JPEG/disk and subprocess spawns never
+    block the caller and a slow LCD or disk cannot delay the door.
+    """
+
+    def __init__(
+        self,
+        runtime,
+        frame_provider=None,
+        result_provider=None,
+        on_event=None,
+        ring_button=True,
+        use_bus=CONFIG_RESULT_BUS_ENABLED,
+    ):
+        self.runtime = runtime
+        self._frame_provider = frame_provider
+        self._result_provider = result_provider
+        self._on_event = on_event
+        # Opens the shared output and starts decoding sounds/ before the first play.
+        self.audio = get_audio_service()
+        self._tracer = get_tracer()
+        self.alert = KnownPersonAlert()
+        self.door = DoorController()
+        self.lcd = get_lcd_display()
+        self.ring_button = DoorbellRingButton(on_press=self.on_ring_pressed) if ring_button else None
+
+        self.event_capture_enabled = bool(CONFIG_EVENT_CAPTURE_ENABLED)
+        self.event_interval = float(CONFIG_EVENT_CAPTURE_INTERVAL_SEC)
+        self.last_event = None
+        self._last_event_ts = 0.0
+        self._known_event_id = None
+        self._known_event_active = False
+        self._door_open_state = False
+        self._lcd_door_open = None
+        self.ring_result_max_age_sec = max(0.0, float(CONFIG_RING_RESULT_MAX_AGE_SEC))
+        self.ring_infer_timeout_sec = max(0.1, float(CONFIG_RING_INFER_TIMEOUT_SEC))
+        self._ring_latency = deque(maxlen=50)
+        self._ring_sources = {}
+
+        self._prompt_enabled = bool(CONFIG_FACE_DISTANCE_PROMPT_ENABLED)
+        try:
+            self._prompt_cooldown_sec = max(0.5, float(CONFIG_FACE_DISTANCE_PROMPT_COOLDOWN_SEC))
+        except (TypeError, ValueError):
+            self._prompt_cooldown_sec = 3.0
+        self._prompt_last_ts = 0.0
+        self._prompt_cmd = str(CONFIG_FACE_DISTANCE_PROMPT_CMD).strip()
+        self._prompt_near_mp3 = str(CONFIG_FACE_DISTANCE_PROMPT_NEAR_MP3).strip()
+        self._prompt_far_mp3 = str(CONFIG_FACE_DISTANCE_PROMPT_FAR_MP3).strip()
+        self._prompt_player = str(CONFIG_FACE_DISTANCE_PROMPT_PLAYER).strip()
+
+        self._handlers = [
+            ("door", (InferenceResultMessage, StaticSceneMessage), self._on_result_door, "fifo"),
+            ("alert", InferenceResultMessage, self._on_result_alert, "fifo"),
+            ("prompt", InferenceResultMessage, self._on_result_prompt, "latest"),
+            ("events", DoorStateMessage, self._on_door_state, "fifo"),
+            ("lcd", LcdMessage, self._on_lcd, "latest"),
+        ]
+        self.bus = None
+        if use_bus:
+            self.bus = ResultBus()
+            for name, types, handler, policy in self._handlers:
+                self.bus.subscribe(name, types, handler, policy=policy, maxsize=CONFIG_RESULT_BUS_QUEUE_SIZE)
+
+    @property
+    def door_open(self):
+        return bool(self.door and getattr(self.door, "_is_open", False))
+
+    def current_frame(self):
+        frame = self._frame_provider() if self._frame_provider is not None else None
+        if frame is not None:
+            return frame.copy()
+        if getattr(self.runtime, "last_frame", None) is not None:
+            return self.runtime.last_frame.copy()
+        try:
+            return self.runtime.read_frame()
+        except Exception:
+            return None
+
+    def _play_prompt_mp3(self, path):
+        if not self._prompt_enabled or not path:
+            return False
+        if not os.path.isfile(path):
+            return False
+        now = time.time()
+        if now - self._prompt_last_ts < self._prompt_cooldown_sec:
+            return False
+
+        audio = get_audio_service()
+        if audio is not None and audio.play(path, priority=PRIORITY_PROMPT, key="prompt"):
+            self._prompt_last_ts = now
+            return True
+
+        cmd = self._prompt_player
+        args = None
+        if cmd:
+            try:
+                args = shlex.split(cmd.format(path=path))
+            except Exception:
+                args = shlex.split(cmd) + [path]
+        else:
+            if shutil.which("mpg123"):
+                args = ["mpg123", "-q", path]
+            elif shutil.which("ffplay"):
+                args = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", path]
+            elif shutil.which("omxplayer"):
+                args = ["omxplayer", "-o", "local", path]
+            elif shutil.which("mpv"):
+                args = ["mpv", "--no-video", "--really-quiet", path]
+            elif shutil.which("cvlc"):
+                args = ["cvlc", "--play-and-exit", "--quiet", path]
+
+        if not args:
+            return False
+
+        try:
+            subprocess.Popen(
+                args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self._prompt_last_ts = now
+            return True
+        except Exception:
+            return False
+
+    def _speak_prompt(self, text):
+        if not self._prompt_enabled or not text:
+            return False
+        now = time.time()
+        if now - self._prompt_last_ts < self._prompt_cooldown_sec:
+            return False
+
+        cmd = self._prompt_cmd
+        if not cmd:
+            # espeak output is rendered once per text and replayed from memory.
+            audio = get_audio_service()
+            if audio is not None and audio.speak(text, priority=PRIORITY_PROMPT, key="prompt"):
+                self._prompt_last_ts = now
+                return True
+        if cmd:
+            try:
+                args = shlex.split(cmd.format(text=text))
+            except Exception:
+                args = shlex.split(cmd) + [text]
+        else:
+            args = None
+            if shutil.which("espeak-ng"):
+                args = ["espeak-ng", "-v", "vi", text]
+            elif shutil.which("espeak"):
+                args = ["espeak", "-v", "vi", text]
+
+        if not args:
+            return False
+
+        try:
+            subprocess.Popen(
+                args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self._prompt_last_ts = now
+            return True
+        except Exception:
+            return False
+
+    def maybe_prompt_distance(self, size_status):
+        if size_status == "too_small":
+            if self._play_prompt_mp3(self._prompt_near_mp3):
+                return True
+            return self._speak_prompt("dua khuon mat gan hon")
+        if size_status == "too_large":
+            if self._play_prompt_mp3(self._prompt_far_mp3):
+                return True
+            return self._speak_prompt("dua khuon mat ra xa")
+        return False
+
+    def _publish(self, message):
+        if self.bus is not None:
+            self.bus.publish(message)
+            return
+        for _, types, handler, _ in self._handlers:
+            if isinstance(message, types):
+                handler(message)
+
+    def handle_result(self, result, frame=None):
+        """Apply one inference result: prompts, alert, door policy, event capture, LCD."""
+        if frame is None and self._frame_provider is not None:
+            frame = self._frame_provider()
+        self._publish(InferenceResultMessage(result, frame))
+
+    def handle_static(self, last_result):
+        """Motion gate skipped inference: the open door still needs its close timeout."""
+        self._publish(StaticSceneMessage(last_result))
+
+    def _on_result_door(self, message):
+        door = self.door
+        if isinstance(message, StaticSceneMessage):
+            if door is not None and self.door_open:
+                door.commands.face(message.last_result or {"has_face": False})
+            return
+        result = message.result
+        if not result or result.get("size_status") in _SIZE_STATUSES:
+            self._publish(LcdMessage(result))
+            return
+        door_open_before = self.door_open
+        if door is not None:
+            db_empty = True
+            face = getattr(self.runtime, "face", None)
+            if face is not None:
+                try:
+                    db_empty = len(getattr(face, "DB", {}) or {}) == 0
+                except Exception:
+                    db_empty = True
+            with span(result.get("trace"), "result.door"):
+                door.commands.face(result, require_known=True if db_empty else None)
+        self._publish(DoorStateMessage(result, message.frame, door_open_before, self.door_open))
+        self._publish(LcdMessage(result))
+
+    def _on_result_alert(self, message):
+        result = message.result
+        if not result or result.get("size_status") in _SIZE_STATUSES:
+            return
+        if self.alert is not None:
+            self.alert.handle_result(result)
+
+    def _on_result_prompt(self, message):
+        result = message.result
+        if result and result.get("size_status") in _SIZE_STATUSES:
+            self.maybe_prompt_distance(result.get("size_status"))
+
+    def _on_door_state(self, message):
+        door_open_after = message.door_open_after
+        force_event = bool(door_open_after and not message.door_open_before)
+        self.maybe_capture_event(
+            message.result,
+            door_open=door_open_after,
+            force=force_event,
+            frame=message.frame,
+        )
+        if self._door_open_state and not door_open_after:
+            self._known_event_active = False
+            self._known_event_id = None
+        self._door_open_state = door_open_after
+
+    def _on_lcd(self, message):
+        self.update_lcd(message.result)
+
+    def _store_event(self, event_type, frame, person_name, source, meta, trace=None):
+        try:
+            from server.event_store import get_event_store
+            store = get_event_store()
+            event = store.add_event(
+                event_type,
+                frame,
+                person_name=person_name,
+                source=source,
+                meta=meta,
+                trace=trace,
+            )
+        except Exception:
+            return None
+        if not event:
+            return None
+        self.last_event = event
+        if self._on_event is not None:
+            try:
+                self._on_event(event)
+            except Exception:
+                pass
+        return event
+
+    def maybe_capture_event(self, result, door_open=None, force=False, frame=None):
+        event_type, person_name = result_person(result)
+        if event_type != "KNOWN":
+            return None
+        if result.get("size_status") in ("too_small", "too_large"):
+            return None
+        rid = result.get("id")
+
+        if door_open is None:
+            door_open = self.door_open
+
+        if not door_open:
+            self._known_event_active = False
+            self._known_event_id = None
+            if not force:
+                return None
+
+        if door_open and self._known_event_active and not force:
+            return None
+
+        if not force and not self.event_capture_enabled:
+            return None
+
+        now = time.time()
+        if not force and now - self._last_event_ts < self.event_interval:
+            return None
+        frame = frame.copy() if frame is not None else self.current_frame()
+        if frame is None:
+            return None
+        meta = {
+            "id": rid,
+            "name": result.get("name"),
+            "score": result.get("score"),
+            "is_real": result.get("is_real"),
+            "bbox": result.get("bbox"),
+        }
+        event = self._store_event(event_type, frame, person_name, "gui", meta, trace=result.get("trace"))
+        if event:
+            self._last_event_ts = now
+            self._known_event_active = True
+            self._known_event_id = rid
+        return event
+
+    def _ring_result(self, frame, start, trace=None):
+        """Result for a ring press and where it came from: cache, infer or fallback."""
+        fresh_result = getattr(self.runtime, "fresh_result", None)
+        if fresh_result is not None:
+            cached, _ = fresh_result(self.ring_result_max_age_sec)
+            if cached is not None:
+                return cached, "cache"
+        try:
+            result = self.runtime.infer_frame(
+                frame,
+                deadline=start + self.ring_infer_timeout_sec,
+                priority=True,
+                trace=trace,
+            )
+        except Exception:
+            result = None
+        if result and not result.get("cancelled") and (result.get("has_face") or not result.get("error")):
+            return result, "infer"
+        # Timed out, or inference runs elsewhere (process engine): use what the live view shows.
+        result = self._result_provider() if self._result_provider is not None else None
+        if result is None:
+            result = getattr(self.runtime, "last_result", None)
+        return result or {}, "fallback"
+
+    def on_ring_pressed(self, result=None):
+        """Store the ring event without waiting behind the live inference loop.
+
+        A result finished less than ``RING_RESULT_MAX_AGE_SEC`` ago is reused;
+        otherwise one priority inference runs (auto inference waits for it),
+        cut short after ``RING_INFER_TIMEOUT_SEC``.
+        """
+        start = time.monotonic()
+        trace = self._tracer.start("ring", start)
+        frame = self.current_frame()
+        if frame is None:
+            return None
+
+        source = "caller"
+        if result is None:
+            result, source = self._ring_result(frame, start, trace)
+        if trace is not None:
+            trace.record("ring.result", start, source=source)
+
+        event_type, person_name = result_person(result)
+        event_type = event_type or "RING"
+        latency_ms = round((time.monotonic() - start) * 1000.0, 1)
+        self._ring_latency.append(latency_ms)
+        self._ring_sources[source] = self._ring_sources.get(source, 0) + 1
+        meta = {"type": "doorbell", "resultSource": source, "ringLatencyMs": latency_ms}
+        if result and result.get("has_face"):
+            meta.update({
+                "id": result.get("id"),
+                "name": result.get("name"),
+                "score": result.get("score"),
+                "is_real": result.get("is_real"),
+                "bbox": result.get("bbox"),
+            })
+        return self._store_event(event_type, frame, person_name, "button", meta, trace=trace)
+
+    def update_lcd(self, result):
+        if self.lcd is None:
+            return
+        person_type = "NONE"
+        person_name = ""
+        if result and result.get("has_face"):
+            size_status = result.get("size_status")
+            if size_status == "too_small":
+                person_type = "MOVE_CLOSE"
+            elif size_status == "too_large":
+                person_type = "MOVE_FAR"
+            elif result.get("is_real") is False:
+                person_type = "SPOOF"
+            else:
+                person_type, name = result_person(result)
+                person_name = str(name) if name else ""
+        door_open = self.door_open
+        self._lcd_door_open = door_open
+        try:
+            self.lcd.set_status(door_open=door_open, person_type=person_type, person_name=person_name)
+        except Exception:
+            return
+
+    def post_lcd(self, result):
+        if self.lcd is not None:
+            self._publish(LcdMessage(result))
+
+    def refresh_lcd_door(self):
+        """Door state only, when it changed; ``set_status`` just hands the text to the LCD writer.
+
+        Called on every GUI/headless tick, so it must not go through the
+        ``lcd`` mailbox, where it would replace a pending person update.
+        """
+        if self.lcd is None:
+            return
+        door_open = self.door_open
+        if door_open == self._lcd_door_open:
+            return
+        self._lcd_door_open = door_open
+        try:
+            self.lcd.set_status(door_open=door_open)
+        except Exception:
+            pass
+
+    def bus_stats(self):
+        return self.bus.stats() if self.bus is not None else None
+
+    def ring_stats(self):
+        """Press-to-event latency (ms) of recent ring presses, by result source."""
+        samples = list(self._ring_latency)
+        if not samples:
+            return {"count": 0, "sources": dict(self._ring_sources)}
+        ordered = sorted(samples)
+        return {
+            "count": len(samples),
+            "lastMs": samples[-1],
+            "p50Ms": ordered[len(ordered) // 2],
+            "maxMs": ordered[-1],
+            "sources": dict(self._ring_sources),
+        }
+
+    def describe_bus(self):
+        return self.bus.describe() if self.bus is not None else "Off (inline)"
+
+    def open_door(self, on_done=None):
+        """Queue open (auto-close) and light on without waiting for the servo.
+
+        ``on_done(outcome)`` is called from the door command thread once the
+        command ran (``ok``, ``message``, ``lightOk``). Returns False when door
+        control is unavailable.
+        """
+        return self._submit_door(OPEN, on_done)
+
+    def close_door(self, on_done=None):
+        """Queue close and light off; same contract as ``open_door``."""
+        return self._submit_door(CLOSE, on_done)
+
+    def _submit_door(self, kind, on_done):
+        door = self.door
+        if door is None or not getattr(door, "available", False):
+            return False
+        command = door.commands.submit(kind, source="gui")
+        if on_done is not None:
+            command.add_done_callback(on_done)
+        return True
+
+    def shutdown(self):
+        if self.bus is not None:
+            self.bus.close(timeout=2.0)
+        if self.alert is not None:
+            self.alert.close()
+        if self.door is not None:
+            self.door.shutdown()
+        if self.ring_button is not None:
+            self.ring_button.close()
@@ -0,0 +1,211 @@
+import queue
+import threading
+import time
+
+from pipeline.inference_service import InferenceService
+from pipeline.motion_gate import MotionGate
+from pipeline.pipelined import PipelinedInferenceService
+from pipeline.process_engine import ProcessInferenceEngine
+from pipeline.scheduler import InferenceScheduler
+from runtime import DoorbellRuntime
+from service.controller import DoorbellController
+from utils.tracing import get_tracer
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_HEADLESS_FRAME_INTERVAL_SEC = _get_cfg("HEADLESS_FRAME_INTERVAL_SEC", 0.1)
+CONFIG_GUI_ENABLE_FACE = _get_cfg("GUI_ENABLE_FACE", True)
+CONFIG_GUI_ENABLE_LIVENESS = _get_cfg("GUI_ENABLE_LIVENESS", False)
+CONFIG_GUI_INFER_TIMEOUT_SEC = _get_cfg("GUI_INFER_TIMEOUT_SEC", 8.0)
+CONFIG_GUI_INFER_WORKERS = _get_cfg("GUI_INFER_WORKERS", 1)
+CONFIG_GUI_INFER_PROCESS = _get_cfg("GUI_INFER_PROCESS", False)
+CONFIG_GUI_INFER_PIPELINED = _get_cfg("GUI_INFER_PIPELINED", False)
+CONFIG_N_DETECTION_FRAMES = _get_cfg("N_DETECTION_FRAMES", 3)
+CONFIG_TRACE_EXPORT_PATH = _get_cfg("TRACE_EXPORT_PATH", "")
+
+
+class HeadlessDoorbell:
+    """The Live tab's control loop without Qt.
+
+    One loop thread reads the camera every ``frame_interval_sec``, runs the
+    motion gate and scheduler, submits frames to the inference engine and
+    hands results to ``DoorbellController``. Results arrive from the
+    engine's worker on a queue that the loop drains (token bookkeeping and
+    scheduler stay on the loop thread); ``handle_result`` then publishes them
+    on the controller's result bus, whose consumer threads run door policy,
+    alert, event capture and LCD, as in the Live tab.
+    """
+
+    def __init__(self, runtime=None, frame_interval_sec=CONFIG_HEADLESS_FRAME_INTERVAL_SEC):
+        if runtime is None:
+            runtime = DoorbellRuntime(
+                enable_liveness=CONFIG_GUI_ENABLE_LIVENESS,
+                enable_face=CONFIG_GUI_ENABLE_FACE,
+            )
+        self.runtime = runtime
+        self.frame_interval_sec = max(0.01, float(frame_interval_sec))
+        self.latest_frame = None
+        self.latest_result = None
+
+        self.controller = DoorbellController(
+            runtime,
+            frame_provider=lambda: self.latest_frame,
+            result_provider=lambda: self.latest_result,
+            on_event=self._on_event,
+        )
+        self.door = self.controller.door
+        self._gate = MotionGate()
+        self._results = queue.SimpleQueue()
+        pipelined = bool(CONFIG_GUI_INFER_PIPELINED) and not CONFIG_GUI_INFER_PROCESS
+        self._max_in_flight = 2 if pipelined else 1
+        self._scheduler = InferenceScheduler(max_in_flight=self._max_in_flight)
+        if CONFIG_GUI_INFER_PROCESS:
+            self._engine = ProcessInferenceEngine(runtime, on_result=self._results.put)
+        elif pipelined:
+            self._engine = PipelinedInferenceService(runtime, on_result=self._results.put)
+        else:
+            self._engine = InferenceService(
+                runtime,
+                on_result=self._results.put,
+                workers=CONFIG_GUI_INFER_WORKERS,
+            )
+        self._infer_timeout_sec = max(2.0, float(CONFIG_GUI_INFER_TIMEOUT_SEC))
+        self._outstanding = {}
+        self._token = 0
+        self._frame_counter = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.frames = 0
+        self.inferences = 0
+        self.timeouts = 0
+
+    def _on_event(self, event):
+        print(f"[headless] event {event.get('type')} {event.get('eventId')} source={event.get('source')}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="headless-loop", daemon=True)
+        self._thread.start()
+
+    def _can_start(self):
+        if len(self._outstanding) >= self._max_in_flight:
+            return False
+        if self._outstanding and hasattr(self._engine, "accepting"):
+            return self._engine.accepting()
+        return not self._outstanding
+
+    def _submit(self, frame, reason):
+        self._token += 1
+        token = self._token
+        self._scheduler.on_start(reason)
+        self._outstanding[token] = time.time()
+        job = self._engine.submit(frame.copy(), token, timeout_sec=self._infer_timeout_sec)
+        if job is None:
+            self._outstanding.pop(token, None)
+            self._scheduler.on_cancel("rejected")
+
+    def _drain_results(self):
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            token = result.get("_token")
+            if token not in self._outstanding:
+                continue
+            self._outstanding.pop(token, None)
+            if result.get("cancelled"):
+                self._scheduler.on_cancel("dropped" if result.get("dropped") else "timeout")
+                if not result.get("dropped"):
+                    self.timeouts += 1
+                continue
+            self._scheduler.on_result(result)
+            self.inferences += 1
+            self.latest_result = result
+            self.controller.handle_result(result)
+
+    def _check_timeouts(self, now):
+        for token, start_ts in list(self._outstanding.items()):
+            if now - start_ts > self._infer_timeout_sec:
+                self._engine.cancel(token)
+                self._outstanding.pop(token, None)
+                self._scheduler.on_cancel("timeout")
+                self.timeouts += 1
+
+    def _tick(self):
+        self._drain_results()
+        frame = self.runtime.read_frame()
+        if frame is None:
+            self.controller.refresh_lcd_door()
+            return
+        self.latest_frame = frame
+        self.frames += 1
+
+        if self._can_start():
+            if self._scheduler.enabled:
+                due = self._scheduler.due()
+            else:
+                due = self._frame_counter % max(1, int(CONFIG_N_DETECTION_FRAMES)) == 0
+            if due:
+                face_present = bool(self.latest_result and self.latest_result.get("has_face"))
+                allowed, reason = self._gate.evaluate(frame, face_present=face_present)
+                if allowed:
+                    self._submit(frame, reason)
+                else:
+                    self._scheduler.on_skip(reason)
+                    self.controller.handle_static(self.latest_result)
+        self._frame_counter += 1
+        self._check_timeouts(time.time())
+
+    def _loop(self):
+        next_ts = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self._tick()
+            except Exception as exc:
+                print(f"[headless] loop error: {exc}")
+            next_ts += self.frame_interval_sec
+            delay = next_ts - time.monotonic()
+            if delay < 0:
+                next_ts = time.monotonic()
+                delay = 0.0
+            self._stop_event.wait(delay)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "timeouts": self.timeouts,
+            "motionGate": self._gate.describe(),
+            "scheduler": self._scheduler.describe(),
+            "engine": self._engine.stats(),
+        }
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self._engine.stop(timeout=timeout)
+        self._gate.close()
+        self.controller.shutdown()
+        if CONFIG_TRACE_EXPORT_PATH:
+            try:
+                count = get_tracer().export_chrome(CONFIG_TRACE_EXPORT_PATH)
+                print(f"[headless] wrote {count} trace spans to {CONFIG_TRACE_EXPORT_PATH}")
+            except Exception as exc:
+                print(f"[headless] trace export failed: {exc}")
+        self.runtime.close()
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+
+POLICIES = ("latest", "fifo", "drop_new")
+
+
+class _Subscription:
+    """One consumer: its own thread, bounded mailbox and lag counters."""
+
+    def __init__(self, name, message_types, handler, policy="fifo", maxsize=8):
+        self.name = name
+        self.message_types = tuple(message_types)
+        self.handler = handler
+        self.policy = policy if policy in POLICIES else "fifo"
+        self.maxsize = 1 if self.policy == "latest" else max(1, int(maxsize))
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._closing = False
+
+        self.delivered = 0
+        self.dropped = 0
+        self.handled = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._lag_ewma_ms = None
+        self.busy_sec = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+        self._thread.start()
+
+    def accepts(self, message):
+        return isinstance(message, self.message_types)
+
+    def offer(self, message, published_ts):
+        with self._cond:
+            if self._closing:
+                return False
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == "drop_new":
+                    return False
+                self._queue.popleft()
+            self._queue.append((published_ts, message))
+            self.delivered += 1
+            self._cond.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                published_ts, message = self._queue.popleft()
+            start = time.monotonic()
+            lag_ms = (start - published_ts) * 1000.0
+            try:
+                self.handler(message)
+                error = None
+            except Exception as exc:
+                error = exc
+            end = time.monotonic()
+            with self._cond:
+                self.handled += 1
+                self.busy_sec += end - start
+                self.last_lag_ms = lag_ms
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                if self._lag_ewma_ms is None:
+                    self._lag_ewma_ms = lag_ms
+                else:
+                    self._lag_ewma_ms = 0.8 * self._lag_ewma_ms + 0.2 * lag_ms
+                if error is not None:
+                    self.errors += 1
+                    self.last_error = str(error)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "depth": len(self._queue),
+                "maxsize": self.maxsize,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "handled": self.handled,
+                "errors": self.errors,
+                "lastError": self.last_error,
+                "lagMs": None if self._lag_ewma_ms is None else round(self._lag_ewma_ms, 1),
+                "lastLagMs": round(self.last_lag_ms, 1),
+                "maxLagMs": round(self.max_lag_ms, 1),
+                "busySec": round(self.busy_sec, 3),
+            }
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+
+class ResultBus:
+    """Typed publish/subscribe with one executor per consumer.
+
+    Consumers subscribe to message classes. ``publish()`` never blocks: each
+    subscription has a bounded mailbox with its own back-pressure policy
+    (``latest`` keeps only the newest message, ``fifo`` drops the oldest when
+    full, ``drop_new`` rejects the incoming one), so a slow consumer only
+    lags itself. Lag is the time a message waited before its handler ran.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self.published = 0
+
+    def subscribe(self, name, message_types, handler, policy="fifo", maxsize=8):
+        if isinstance(message_types, type):
+            message_types = (message_types,)
+        sub = _Subscription(name, message_types, handler, policy=policy, maxsize=maxsize)
+        with self._lock:
+            self._subscriptions.append(sub)
+        return sub
+
+    def publish(self, message):
+        now = time.monotonic()
+        with self._lock:
+            subs = list(self._subscriptions)
+            self.published += 1
+        delivered = 0
+        for sub in subs:
+            if sub.accepts(message) and sub.offer(message, now):
+                delivered += 1
+        return delivered
+
+    def stats(self):
+        with self._lock:
+            subs = list(self._subscriptions)
+            published = self.published
+        return {
+            "published": published,
+            "consumers": {sub.name: sub.stats() for sub in subs},
+        }
+
+    def describe(self):
+        with self._lock:
+            subs = list(self._subscriptions)
+        parts = []
+        for sub in subs:
+            stats = sub.stats()
+            lag = stats["lagMs"]
+            text = f"{sub.name} {0 if lag is None else lag:.0f}ms"
+            if stats["dropped"]:
+                text += f" ({stats['dropped']} dropped)"
+            parts.append(text)
+        return ", ".join(parts) if parts else "Off"
+
+    def close(self, timeout=2.0):
+        with self._lock:
+            subs = list(self._subscriptions)
+            self._subscriptions = []
+        end = time.monotonic() + max(0.0, float(timeout))
+        for sub in subs:
+            sub.close(timeout=max(0.0, end - time.monotonic()))
@@ -0,0 +1 @@
+"""Simulated doorbell hardware (``DOORBELL_HW_SIM=1``) and the latency harness."""
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from sim.devices import Timeline
+
+# Solid blocks the sim face backend (sim/face.py) recognizes as a face.
+KNOWN_MARKER_BGR = (0, 255, 0)
+UNKNOWN_MARKER_BGR = (255, 0, 255)
+
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ReplayCamera:
+    """Camera stand-in with the ``get_frame()`` interface of ``OpenCVCamera``.
+
+    ``source`` is a video file, a folder of images or one image, replayed in
+    a loop; empty means a synthetic porch where ``show_face()`` puts a face
+    marker in front of the camera. ``get_frame()`` blocks until the next
+    frame is due at ``fps``, like a real sensor, and returns BGR. The
+    ``timeline`` records ``(face, known)`` whenever the synthetic scene
+    changes, so harnesses know when a face first reached the sensor.
+    """
+
+    def __init__(self, source="", width=1280, height=960, fps=15.0):
+        self.source = str(source or "").strip()
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = max(1.0, float(fps))
+        self.timeline = Timeline()
+        self._lock = threading.Lock()
+        self._next_ts = None
+        self._face = None
+        self._cap = None
+        self._images = []
+        self._index = 0
+        self.frames = 0
+        if self.source and os.path.isdir(self.source):
+            self._images = sorted(
+                os.path.join(self.source, name)
+                for name in os.listdir(self.source)
+                if name.lower().endswith(_IMAGE_EXTENSIONS)
+            )
+        elif self.source.lower().endswith(_IMAGE_EXTENSIONS):
+            self._images = [self.source]
+        elif self.source:
+            self._cap = cv2.VideoCapture(self.source)
+        self._background = self._render_background()
+        self._scenes = {}
+
+    def _render_background(self):
+        # Static porch: gradient plus a door frame, so the motion gate sees a still scene.
+        ramp = np.linspace(60, 140, self.width, dtype=np.uint8)
+        frame = np.repeat(np.repeat(ramp[None, :, None], self.height, axis=0), 3, axis=2)
+        cv2.rectangle(frame, (self.width // 5, self.height // 10), (self.width * 4 // 5, self.height), (40, 60, 90), 12)
+        return frame
+
+    def _synthetic(self, face):
+        scene = self._scenes.get(face)
+        if scene is None:
+            scene = self._background.copy()
+            if face is not None:
+                color = KNOWN_MARKER_BGR if face == "known" else UNKNOWN_MARKER_BGR
+                w, h = int(self.width * 0.36), int(self.height * 0.45)
+                x, y = (self.width - w) // 2, int(self.height * 0.2)
+                cv2.rectangle(scene, (x, y), (x + w, y + h), color, -1)
+            self._scenes[face] = scene
+        return scene.copy()
+
+    def show_face(self, visible=True, known=True):
+        """Synthetic scene: put a (known/unknown) face in front of the camera or remove it."""
+        face = ("known" if known else "unknown") if visible else None
+        with self._lock:
+            if face == self._face:
+                return None
+            self._face = face
+        return self.timeline.record(face)
+
+    @property
+    def face(self):
+        return self._face
+
+    def _next_file_frame(self):
+        if self._cap is not None:
+            ok, frame = self._cap.read()
+            if not ok:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self._cap.read()
+            return frame if ok else None
+        path = self._images[self._index % len(self._images)]
+        self._index += 1
+        return cv2.imread(path, cv2.IMREAD_COLOR)
+
+    def get_frame(self):
+        now = time.monotonic()
+        if self._next_ts is None or self._next_ts < now - 1.0:
+            self._next_ts = now
+        if self._next_ts > now:
+            time.sleep(self._next_ts - now)
+        self._next_ts += 1.0 / self.fps
+        if self._cap is not None or self._images:
+            frame = self._next_file_frame()
+            if frame is not None and (frame.shape[1], frame.shape[0]) != (self.width, self.height):
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        else:
+            frame = self._synthetic(self._face)
+        self.frames += 1
+        return frame
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
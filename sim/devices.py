@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_HW_SIM = _get_cfg("HW_SIM", False)
+CONFIG_SIM_HISTORY = _get_cfg("SIM_HISTORY", 10000)
+
+_DEVICES = {}
+_DEVICES_LOCK = threading.Lock()
+
+
+def sim_enabled():
+    """True when ``DOORBELL_HW_SIM=1``: actuators, button, LCD and camera are simulated."""
+    return bool(CONFIG_HW_SIM)
+
+
+def register(name, device):
+    with _DEVICES_LOCK:
+        _DEVICES[name] = device
+    return device
+
+
+def get_device(name):
+    with _DEVICES_LOCK:
+        return _DEVICES.get(name)
+
+
+def devices():
+    with _DEVICES_LOCK:
+        return dict(_DEVICES)
+
+
+class Timeline:
+    """``(monotonic ts, value)`` samples of one simulated device."""
+
+    def __init__(self, maxlen=CONFIG_SIM_HISTORY):
+        self._samples = deque(maxlen=max(16, int(maxlen)))
+        self._cond = threading.Condition()
+
+    def record(self, value):
+        ts = time.monotonic()
+        with self._cond:
+            self._samples.append((ts, value))
+            self._cond.notify_all()
+        return ts
+
+    def samples(self, since=None):
+        with self._cond:
+            return [s for s in self._samples if since is None or s[0] >= since]
+
+    def wait_for(self, predicate, since, timeout):
+        """Timestamp of the first sample at/after ``since`` matching ``predicate``; None on timeout."""
+        deadline = time.monotonic() + float(timeout)
+        with self._cond:
+            while True:
+                for ts, value in self._samples:
+                    if ts >= since and predicate(value):
+                        return ts
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+class SimServo:
+    """``gpiozero.AngularServo`` stand-in; ``timeline`` holds ``("angle", deg)`` / ``("detach", None)``."""
+
+    def __init__(self, pin, min_angle=0, max_angle=180, **_):
+        self.pin = pin
+        self.min_angle = float(min_angle)
+        self.max_angle = float(max_angle)
+        self._angle = None
+        self.timeline = Timeline()
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, value):
+        if value is None:
+            self.detach()
+            return
+        self._angle = max(self.min_angle, min(self.max_angle, float(value)))
+        self.timeline.record(("angle", self._angle))
+
+    def detach(self):
+        self._angle = None
+        self.timeline.record(("detach", None))
+
+    def close(self):
+        self._angle = None
+
+
+class SimLED:
+    """``gpiozero.LED`` stand-in; ``timeline`` holds the on/off states."""
+
+    def __init__(self, pin, active_high=True, **_):
+        self.pin = pin
+        self.is_lit = False
+        self.timeline = Timeline()
+
+    def on(self):
+        self.is_lit = True
+        self.timeline.record(True)
+
+    def off(self):
+        self.is_lit = False
+        self.timeline.record(False)
+
+    def close(self):
+        self.is_lit = False
+
+
+class SimButton:
+    """``gpiozero.Button`` stand-in; ``press()`` runs ``when_pressed`` on its own thread like gpiozero."""
+
+    def __init__(self, pin, script="", **_):
+        self.pin = pin
+        self.when_pressed = None
+        self.timeline = Timeline()
+        self._closed = threading.Event()
+        times = []
+        for item in str(script or "").split(","):
+            try:
+                times.append(float(item))
+            except ValueError:
+                continue
+        if times:
+            threading.Thread(target=self._run_script, args=(sorted(times),), name="sim-button-script", daemon=True).start()
+
+    def press(self):
+        ts = self.timeline.record("press")
+        callback = self.when_pressed
+        if callback is not None:
+            threading.Thread(target=callback, name="sim-button", daemon=True).start()
+        return ts
+
+    def _run_script(self, times):
+        start = time.monotonic()
+        for offset in times:
+            if self._closed.wait(max(0.0, start + offset - time.monotonic())):
+                return
+            self.press()
+
+    def close(self):
+        self._closed.set()
@@ -0,0 +1,128 @@
+import numpy as np
+
+from sim.camera import KNOWN_MARKER_BGR, UNKNOWN_MARKER_BGR
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+CONFIG_SIM_FACE_NAME = getattr(_config, "SIM_FACE_NAME", "Sim Person") if _config else "Sim Person"
+
+SIM_PERSON_ID = "sim-1"
+_EMBEDDING_SIZE = 16
+
+
+class _RelativeBBox:
+    def __init__(self, xmin, ymin, width, height):
+        self.xmin = float(xmin)
+        self.ymin = float(ymin)
+        self.width = float(width)
+        self.height = float(height)
+
+
+class _RelativeKeypoint:
+    def __init__(self, x, y):
+        self.x = float(x)
+        self.y = float(y)
+
+
+class _LocationData:
+    def __init__(self, bbox, keypoints):
+        self.relative_bounding_box = bbox
+        self.relative_keypoints = keypoints
+
+
+class _Detection:
+    def __init__(self, location_data, marker):
+        self.location_data = location_data
+        self.marker = marker
+
+
+class _Detections:
+    def __init__(self, detections):
+        self.detections = detections
+
+
+def _unit(index):
+    vec = np.zeros(_EMBEDDING_SIZE, dtype=np.float32)
+    vec[index] = 1.0
+    return vec
+
+
+class SimFaceRecognition:
+    """Face backend for ``DOORBELL_HW_SIM``: "detects" the marker blocks drawn by ``ReplayCamera``.
+
+    The known marker embeds to the enrolled ``SIM_FACE_NAME``, the unknown
+    marker to an orthogonal vector. Same interface as
+    ``InsightFaceRecognition``, without models, so the whole
+    camera -> inference -> door path runs on any Linux box.
+    """
+
+    def __init__(self, name=CONFIG_SIM_FACE_NAME):
+        self.DB = {SIM_PERSON_ID: [name, _unit(0)]}
+        self._markers = ((KNOWN_MARKER_BGR, _unit(0)), (UNKNOWN_MARKER_BGR, _unit(1)))
+        self.last_face = None
+        self.last_embedding = None
+        self.last_bbox = None
+
+    def reload_db(self):
+        pass
+
+    def detect_faces(self, frame):
+        if frame is None or frame.ndim != 3:
+            return _Detections([])
+        h, w = frame.shape[:2]
+        small = frame[::8, ::8]
+        for index, (color, _) in enumerate(self._markers):
+            mask = np.all(small == color, axis=2)
+            if mask.sum() < 16:
+                continue
+            ys, xs = np.nonzero(mask)
+            x1, x2 = xs.min() * 8, (xs.max() + 1) * 8
+            y1, y2 = ys.min() * 8, (ys.max() + 1) * 8
+            box = _RelativeBBox(x1 / w, y1 / h, (x2 - x1) / w, (y2 - y1) / h)
+            cx = box.xmin + box.width / 2
+            eye_y = box.ymin + box.height * 0.35
+            keypoints = [
+                _RelativeKeypoint(box.xmin + box.width * 0.3, eye_y),
+                _RelativeKeypoint(box.xmin + box.width * 0.7, eye_y),
+                _RelativeKeypoint(cx, box.ymin + box.height * 0.55),
+            ]
+            return _Detections([_Detection(_LocationData(box, keypoints), index)])
+        return _Detections([])
+
+    def update_last_face(self, frame, detection):
+        bbox = detection.location_data.relative_bounding_box
+        h, w = frame.shape[:2]
+        x1 = max(0, int(bbox.xmin * w))
+        y1 = max(0, int(bbox.ymin * h))
+        x2 = min(w, x1 + int(bbox.width * w))
+        y2 = min(h, y1 + int(bbox.height * h))
+        self.last_face = frame[y1:y2, x1:x2].copy()
+        self.last_embedding = self._markers[detection.marker][1].copy()
+        self.last_bbox = (x1, y1, x2, y2)
+        return self.last_face, self.last_embedding, self.last_bbox
+
+    def extract_embedding(self, face_crop):
+        detections = self.detect_faces(face_crop)
+        if not detections.detections:
+            return None
+        return self._markers[detections.detections[0].marker][1].copy()
+
+    def recognize_embedding(self, embedding):
+        if embedding is None:
+            return None, None, -1
+        best_id, best_name, best_score = None, None, -1.0
+        for pid, (name, stored) in self.DB.items():
+            score = float(np.dot(np.asarray(embedding, dtype=np.float32), stored))
+            if score > best_score:
+                best_id, best_name, best_score = pid, name, score
+        if best_score >= 0.5:
+            return best_id, best_name, best_score
+        return None, None, best_score
+
+    def add_new_person(self, name, embedding, id_detected=None):
+        pid = id_detected or f"sim-{len(self.DB) + 1}"
+        self.DB[pid] = [name, np.asarray(embedding, dtype=np.float32)]
+        return (pid, name, "updated" if id_detected else "new")
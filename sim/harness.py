@@ -0,0 +1,197 @@
+"""End-to-end latency harness on simulated hardware.
+
+    python -m sim.harness [--runs 10]
+
+Builds the real ``HeadlessDoorbell`` (camera loop, motion gate, inference
+engine, result bus, door command queue, LCD writer) on ``DOORBELL_HW_SIM``
+devices and measures, from the device timelines:
+
+- ring -> door open: button press until the servo reaches the open angle,
+  with a stand-in phone app that unlocks each RING event through
+  ``door.commands.open`` as soon as the event store announces it;
+- face -> door open: known face in front of the camera until the servo
+  reaches the open angle (hold-open on a recognized face).
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+
+os.environ.setdefault("DOORBELL_HW_SIM", "1")
+os.environ.setdefault("DOORBELL_AUDIO_SINK", "null")
+os.environ.setdefault("DOORBELL_FIREBASE_ENABLE", "0")
+os.environ.setdefault("DOORBELL_AUDIO_PRELOAD_DIR", "")
+
+from sim.devices import get_device  # noqa: E402
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _summary(name, samples_ms, misses):
+    if not samples_ms:
+        return f"{name}: no samples ({misses} missed)"
+    return (
+        f"{name}: n={len(samples_ms)} p50={_percentile(samples_ms, 0.5):.1f}ms "
+        f"p95={_percentile(samples_ms, 0.95):.1f}ms max={max(samples_ms):.1f}ms missed={misses}"
+    )
+
+
+class SimApp:
+    """Phone app stand-in: unlocks every RING event as soon as it is stored."""
+
+    def __init__(self, door, store):
+        self.door = door
+        self._events = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._loop, name="sim-app", daemon=True)
+        self._thread.start()
+        store.add_listener(self._on_store)
+
+    def _on_store(self, kind, event):
+        # Store listeners must not block; the unlock runs on the app thread.
+        if kind == "event" and event.get("source") == "button":
+            self._events.put(event.get("eventId"))
+
+    def _loop(self):
+        while True:
+            event_id = self._events.get()
+            if event_id is None:
+                return
+            self.door.commands.open(event_id=event_id, source="sim-app")
+
+    def close(self):
+        self._events.put(None)
+
+
+class Harness:
+    def __init__(self, timeout_sec=5.0):
+        from server.event_store import get_event_store
+        from service.headless import HeadlessDoorbell
+
+        self.timeout_sec = float(timeout_sec)
+        self.doorbell = HeadlessDoorbell()
+        self.door = self.doorbell.door
+        self.servo = get_device("servo")
+        self.button = get_device("button")
+        self.camera = get_device("camera")
+        self.lcd_bus = get_device("lcd")
+        missing = [name for name, dev in (("servo", self.servo), ("button", self.button), ("camera", self.camera)) if dev is None]
+        if missing:
+            raise RuntimeError(f"simulated devices missing: {', '.join(missing)} (is DOORBELL_HW_SIM=1?)")
+        self.open_angle = float(self.door.open_angle)
+        self.app = SimApp(self.door, get_event_store())
+
+    def _is_open_sample(self, value):
+        return value[0] == "angle" and abs(value[1] - self.open_angle) < 0.5
+
+    def _wait_open(self, since):
+        return self.servo.timeline.wait_for(self._is_open_sample, since, self.timeout_sec)
+
+    def _wait_closed(self):
+        deadline = time.monotonic() + self.timeout_sec + float(self.door.close_delay_sec)
+        while self.doorbell.controller.door_open and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def start(self):
+        self.doorbell.start()
+        # Let the camera loop, motion gate background and first inference settle.
+        time.sleep(1.5)
+
+    def ring_runs(self, runs, cooldown_sec):
+        samples, misses = [], 0
+        self.camera.show_face(False)
+        for _ in range(runs):
+            self._wait_closed()
+            time.sleep(cooldown_sec)
+            pressed = self.button.press()
+            opened = self._wait_open(pressed)
+            if opened is None:
+                misses += 1
+            else:
+                samples.append((opened - pressed) * 1000.0)
+            self.door.commands.close(source="sim-harness")
+        return samples, misses
+
+    def face_runs(self, runs, gap_sec):
+        samples, misses = [], 0
+        for _ in range(runs):
+            self.camera.show_face(False)
+            self._wait_closed()
+            time.sleep(gap_sec)
+            shown = self.camera.show_face(True, known=True)
+            opened = self._wait_open(shown)
+            if opened is None:
+                misses += 1
+            else:
+                samples.append((opened - shown) * 1000.0)
+        self.camera.show_face(False)
+        self._wait_closed()
+        return samples, misses
+
+    def report(self, started):
+        lines = []
+        servo = self.servo.timeline.samples(started)
+        lines.append(f"servo: {sum(1 for _, v in servo if v[0] == 'angle')} moves, {sum(1 for _, v in servo if v[0] == 'detach')} detaches")
+        for name, device in sorted(_leds().items()):
+            lit = sum(1 for _, value in device.timeline.samples(started) if value)
+            lines.append(f"{name}: on {lit}x")
+        if self.lcd_bus is not None:
+            log = [entry for entry in (self.lcd_bus.log or ()) if entry[0] >= started]
+            lines.append(
+                f"lcd: {len(log)} transactions, {sum(n for _, n in log)} bytes, now {self.lcd_bus.lines()}"
+            )
+        lines.append(f"door commands: {self.door.commands.stats()}")
+        lines.append(f"camera: {self.camera.frames} frames, inferences {self.doorbell.inferences}")
+        return lines
+
+    def close(self):
+        self.app.close()
+        self.doorbell.stop()
+
+
+def _leds():
+    from sim.devices import devices
+
+    return {name: device for name, device in devices().items() if name.startswith("led:")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ring/face -> door open latency on simulated hardware")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--scenario", choices=("all", "ring", "face"), default="all")
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--trace", default="", help="write door-opening traces as Chrome trace-event JSON")
+    args = parser.parse_args(argv)
+
+    import config
+
+    harness = Harness(timeout_sec=args.timeout)
+    started = time.monotonic()
+    harness.start()
+    try:
+        if args.scenario in ("all", "ring"):
+            samples, misses = harness.ring_runs(args.runs, float(config.RING_COOLDOWN_SEC) + 0.1)
+            print(_summary("ring -> door open", samples, misses))
+        if args.scenario in ("all", "face"):
+            samples, misses = harness.face_runs(args.runs, 0.5)
+            print(_summary("face -> door open", samples, misses))
+        for line in harness.report(started):
+            print(line)
+    finally:
+        harness.close()
+    if args.trace:
+        from utils.tracing import get_tracer
+
+        count = get_tracer().export_chrome(args.trace, contains="door.open_hold")
+        print(f"trace: {count} spans -> {args.trace}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,464 @@
+import io
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+
+import numpy as np
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_AUDIO_ENABLED = _get_cfg("AUDIO_ENABLED", True)
+CONFIG_AUDIO_SINK = _get_cfg("AUDIO_SINK", "auto")
+CONFIG_AUDIO_DEVICE = _get_cfg("AUDIO_DEVICE", "")
+CONFIG_AUDIO_SAMPLE_RATE = _get_cfg("AUDIO_SAMPLE_RATE", 22050)
+CONFIG_AUDIO_CHANNELS = _get_cfg("AUDIO_CHANNELS", 1)
+CONFIG_AUDIO_BLOCK_MS = _get_cfg("AUDIO_BLOCK_MS", 20)
+CONFIG_AUDIO_MAX_VOICES = _get_cfg("AUDIO_MAX_VOICES", 4)
+CONFIG_AUDIO_DUCK_GAIN = _get_cfg("AUDIO_DUCK_GAIN", 0.3)
+CONFIG_AUDIO_PRELOAD_DIR = _get_cfg("AUDIO_PRELOAD_DIR", "")
+
+PRIORITY_PROMPT = 1
+PRIORITY_ALERT = 2
+PRIORITY_RING = 3
+
+SOUND_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+
+# ----- decoding -----
+def _resample(pcm, src_rate, rate):
+    if src_rate == rate or len(pcm) == 0:
+        return pcm
+    n = max(1, int(round(len(pcm) * rate / float(src_rate))))
+    src_x = np.arange(len(pcm), dtype=np.float64)
+    dst_x = np.linspace(0, len(pcm) - 1, n)
+    out = np.empty((n, pcm.shape[1]), dtype=np.float64)
+    for ch in range(pcm.shape[1]):
+        out[:, ch] = np.interp(dst_x, src_x, pcm[:, ch])
+    return out
+
+
+def _fit_channels(pcm, channels):
+    if pcm.shape[1] == channels:
+        return pcm
+    if channels == 1:
+        return pcm.mean(axis=1, keepdims=True)
+    return np.repeat(pcm[:, :1], channels, axis=1)
+
+
+def _from_wav(source, rate, channels):
+    with wave.open(source, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError("only 16-bit WAV is supported")
+        src_rate = wf.getframerate()
+        src_channels = wf.getnchannels()
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    pcm = data.reshape(-1, src_channels).astype(np.float64)
+    pcm = _resample(_fit_channels(pcm, channels), src_rate, rate)
+    return np.clip(pcm, -32768, 32767).astype(np.int16)
+
+
+def decode_file(path, rate, channels):
+    """Decode ``path`` to int16 PCM of shape ``(frames, channels)`` at ``rate``.
+
+    WAV is read directly; MP3/OGG go through ``miniaudio`` when installed,
+    otherwise one ``ffmpeg`` or ``mpg123`` run (at load time, never per play).
+    """
+    if path.lower().endswith(".wav"):
+        return _from_wav(path, rate, channels)
+    try:
+        import miniaudio
+
+        decoded = miniaudio.decode_file(
+            path,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=channels,
+            sample_rate=rate,
+        )
+        return np.frombuffer(decoded.samples, dtype=np.int16).reshape(-1, channels).copy()
+    except ImportError:
+        pass
+    if shutil.which("ffmpeg"):
+        args = ["ffmpeg", "-v", "quiet", "-i", path, "-f", "s16le", "-ac", str(channels), "-ar", str(rate), "-"]
+    elif shutil.which("mpg123"):
+        args = ["mpg123", "-q", "-s", "-e", "s16", "-r", str(rate), "-m" if channels == 1 else "--stereo", path]
+    else:
+        raise RuntimeError("no MP3 decoder (install miniaudio, ffmpeg or mpg123)")
+    raw = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+    return np.frombuffer(raw, dtype="<i2").reshape(-1, channels).copy()
+
+
+def render_speech(text, rate, channels, voice="vi"):
+    """TTS prompt rendered once with espeak(-ng) ``--stdout``; None when espeak is missing."""
+    exe = shutil.which("espeak-ng") or shutil.which("espeak")
+    if not exe:
+        return None
+    raw = subprocess.run(
+        [exe, "-v", voice, "--stdout", text],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    ).stdout
+    return _from_wav(io.BytesIO(raw), rate, channels)
+
+
+# ----- sinks -----
+class NullSink:
+    """Discards audio at real-time pace; stands in for a sound card in tests."""
+
+    name = "null"
+
+    def __init__(self, rate, channels):
+        self.rate = rate
+        self.channels = channels
+        self._next = None
+
+    def write(self, data):
+        frames = len(data) // (2 * self.channels)
+        now = time.monotonic()
+        if self._next is None or self._next < now:
+            self._next = now
+        self._next += frames / float(self.rate)
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+
+class FileSink(NullSink):
+    """Real-time paced like ``NullSink`` and also records everything to a WAV file."""
+
+    name = "file"
+
+    def __init__(self, rate, channels, path):
+        super().__init__(rate, channels)
+        self.path = path
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+
+    def write(self, data):
+        self._wav.writeframesraw(data)
+        super().write(data)
+
+    def close(self):
+        try:
+            self._wav.close()
+        except Exception:
+            pass
+
+
+class AplaySink:
+    """One long-lived ``aplay`` reading raw PCM from a pipe (ALSA, always on Raspberry Pi OS)."""
+
+    name = "aplay"
+
+    def __init__(self, rate, channels, device="", buffer_ms=80):
+        args = ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", str(rate), "-c", str(channels)]
+        args += ["--buffer-time", str(int(buffer_ms * 1000))]
+        if device:
+            args += ["-D", device]
+        self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def write(self, data):
+        # Blocks while the ALSA buffer is full, which paces the mixer.
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+
+    def close(self):
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=1.0)
+        except Exception:
+            self._proc.kill()
+
+
+class SoundDeviceSink:
+    """PortAudio output via the optional ``sounddevice`` package."""
+
+    name = "sounddevice"
+
+    def __init__(self, rate, channels, device="", block_frames=441):
+        import sounddevice
+
+        self._stream = sounddevice.RawOutputStream(
+            samplerate=rate,
+            channels=channels,
+            dtype="int16",
+            blocksize=block_frames,
+            device=device or None,
+            latency="low",
+        )
+        self._stream.start()
+
+    def write(self, data):
+        self._stream.write(data)
+
+    def close(self):
+        try:
+            self._stream.stop()
+            self._stream.close()
+        except Exception:
+            pass
+
+
+def open_sink(spec, rate, channels, device="", block_frames=441):
+    """``auto`` | ``sounddevice`` | ``aplay`` | ``null`` | ``file:<path.wav>``; None if unavailable."""
+    spec = str(spec or "auto").strip()
+    if spec == "null":
+        return NullSink(rate, channels)
+    if spec.startswith("file:"):
+        return FileSink(rate, channels, spec[5:])
+    if spec in ("auto", "sounddevice"):
+        try:
+            return SoundDeviceSink(rate, channels, device=device, block_frames=block_frames)
+        except Exception:
+            if spec == "sounddevice":
+                return None
+    if spec in ("auto", "aplay") and shutil.which("aplay"):
+        try:
+            return AplaySink(rate, channels, device=device)
+        except Exception:
+            return None
+    return None
+
+
+# ----- mixer -----
+class _Voice:
+    def __init__(self, pcm, priority, key):
+        self.pcm = pcm
+        self.pos = 0
+        self.priority = priority
+        self.key = key
+        self.play_ts = time.monotonic()
+
+
+class AudioService:
+    """Pre-decoded sounds mixed into one long-lived output stream.
+
+    ``play()`` only appends a voice to the mixer, so a sound starts within
+    one block (``block_ms``) plus the sink's buffer instead of after a
+    player process has started. The ``audio-mixer`` thread sums the active
+    voices block by block; while a higher-priority sound plays (ring >
+    alert/door > prompt) lower ones are ducked to ``duck_gain``. Playing a
+    ``key`` that is already sounding restarts it instead of stacking, and
+    past ``max_voices`` the lowest-priority voice is dropped. Silence keeps
+    the stream open between sounds.
+    """
+
+    def __init__(self, sink, rate=22050, channels=1, block_ms=20, max_voices=4, duck_gain=0.3):
+        self.sink = sink
+        self.rate = int(rate)
+        self.channels = int(channels)
+        self.block_frames = max(32, int(self.rate * block_ms / 1000.0))
+        self.max_voices = max(1, int(max_voices))
+        self.duck_gain = float(duck_gain)
+        self._sounds = {}
+        self._failed = set()
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._voices = []
+        self._stop = threading.Event()
+        self.available = True
+        self.error = None
+        self.played = 0
+        self.dropped = 0
+        self.latency_ms = None
+        self.max_latency_ms = 0.0
+        self._thread = threading.Thread(target=self._loop, name="audio-mixer", daemon=True)
+        self._thread.start()
+
+    # ----- sounds -----
+    def load(self, path):
+        """PCM for ``path``, decoded on first use and cached; None on failure."""
+        key = os.path.abspath(path)
+        pcm = self._sounds.get(key)
+        if pcm is not None or key in self._failed:
+            return pcm
+        with self._load_lock:
+            pcm = self._sounds.get(key)
+            if pcm is None and key not in self._failed:
+                try:
+                    pcm = decode_file(key, self.rate, self.channels)
+                except Exception as exc:
+                    # Not retried: the caller falls back to its player command.
+                    self._failed.add(key)
+                    print(f"AudioService: cannot decode {path} ({exc})")
+                    return None
+                self._sounds[key] = pcm
+        return pcm
+
+    def preload(self, paths):
+        """Decode ``paths`` (files or directories) on a background thread."""
+        files = []
+        for path in paths:
+            if not path:
+                continue
+            if os.path.isdir(path):
+                files.extend(
+                    os.path.join(path, name)
+                    for name in sorted(os.listdir(path))
+                    if name.lower().endswith(SOUND_EXTENSIONS)
+                )
+            elif os.path.isfile(path):
+                files.append(path)
+
+        def _run():
+            for path in files:
+                self.load(path)
+
+        thread = threading.Thread(target=_run, name="audio-preload", daemon=True)
+        thread.start()
+        return thread
+
+    # ----- playback -----
+    def _start(self, pcm, priority, key):
+        with self._lock:
+            if not self.available:
+                return False
+            if key is not None:
+                self._voices = [v for v in self._voices if v.key != key]
+            if len(self._voices) >= self.max_voices:
+                victim = min(self._voices, key=lambda v: (v.priority, -v.play_ts))
+                if victim.priority > priority:
+                    self.dropped += 1
+                    return False
+                self._voices.remove(victim)
+                self.dropped += 1
+            self._voices.append(_Voice(pcm, int(priority), key))
+            self.played += 1
+        return True
+
+    def play(self, path, priority=PRIORITY_ALERT, key=None):
+        if not self.available or not path:
+            return False
+        pcm = self.load(path)
+        if pcm is None or len(pcm) == 0:
+            return False
+        return self._start(pcm, priority, key if key is not None else os.path.abspath(path))
+
+    def speak(self, text, priority=PRIORITY_PROMPT, key="speech"):
+        if not self.available or not text:
+            return False
+        cache_key = f"tts:{text}"
+        pcm = self._sounds.get(cache_key)
+        if pcm is None:
+            try:
+                pcm = render_speech(text, self.rate, self.channels)
+            except Exception:
+                pcm = None
+            if pcm is None:
+                return False
+            self._sounds[cache_key] = pcm
+        return self._start(pcm, priority, key)
+
+    def stop(self, key=None):
+        with self._lock:
+            self._voices = [] if key is None else [v for v in self._voices if v.key != key]
+
+    def _mix(self):
+        n = self.block_frames
+        with self._lock:
+            voices = list(self._voices)
+            if not voices:
+                return np.zeros((n, self.channels), dtype=np.int16), []
+            top = max(v.priority for v in voices)
+            acc = np.zeros((n, self.channels), dtype=np.float32)
+            started = []
+            for voice in voices:
+                if voice.pos == 0:
+                    started.append(voice)
+                chunk = voice.pcm[voice.pos:voice.pos + n]
+                gain = 1.0 if voice.priority >= top else self.duck_gain
+                acc[: len(chunk)] += chunk * gain
+                voice.pos += len(chunk)
+            self._voices = [v for v in voices if v.pos < len(v.pcm)]
+        return np.clip(acc, -32768, 32767).astype(np.int16), started
+
+    def _loop(self):
+        while not self._stop.is_set():
+            block, started = self._mix()
+            handed = time.monotonic()
+            try:
+                self.sink.write(block.tobytes())
+            except Exception as exc:
+                # Device gone (aplay exited, USB speaker unplugged): callers fall back.
+                with self._lock:
+                    self.available = False
+                    self.error = str(exc)
+                    self._voices = []
+                return
+            for voice in started:
+                # play() -> first samples handed to the sink (device buffer excluded).
+                latency = (handed - voice.play_ts) * 1000.0
+                self.latency_ms = latency
+                self.max_latency_ms = max(self.max_latency_ms, latency)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sink": getattr(self.sink, "name", type(self.sink).__name__),
+                "available": self.available,
+                "voices": len(self._voices),
+                "played": self.played,
+                "dropped": self.dropped,
+                "sounds": len(self._sounds),
+                "undecodable": len(self._failed),
+                "pcmBytes": int(sum(p.nbytes for p in self._sounds.values())),
+                "latencyMs": None if self.latency_ms is None else round(self.latency_ms, 1),
+                "maxLatencyMs": round(self.max_latency_ms, 1),
+                "error": self.error,
+            }
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        try:
+            self.sink.close()
+        except Exception:
+            pass
+
+
+_AUDIO_INSTANCE = None
+_AUDIO_LOCK = threading.Lock()
+
+
+def get_audio_service():
+    """Shared ``AudioService`` or None (disabled / no output), created on first call."""
+    global _AUDIO_INSTANCE
+    if not CONFIG_AUDIO_ENABLED:
+        return None
+    with _AUDIO_LOCK:
+        if _AUDIO_INSTANCE is None:
+            rate = int(CONFIG_AUDIO_SAMPLE_RATE)
+            channels = int(CONFIG_AUDIO_CHANNELS)
+            block_frames = max(32, int(rate * CONFIG_AUDIO_BLOCK_MS / 1000.0))
+            sink = open_sink(CONFIG_AUDIO_SINK, rate, channels, device=CONFIG_AUDIO_DEVICE, block_frames=block_frames)
+            if sink is None:
+                return None
+            _AUDIO_INSTANCE = AudioService(
+                sink,
+                rate=rate,
+                channels=channels,
+                block_ms=CONFIG_AUDIO_BLOCK_MS,
+                max_voices=CONFIG_AUDIO_MAX_VOICES,
+                duck_gain=CONFIG_AUDIO_DUCK_GAIN,
+            )
+            _AUDIO_INSTANCE.preload([CONFIG_AUDIO_PRELOAD_DIR])
+        service = _AUDIO_INSTANCE
+    return service if service.available else None
@@ -1,6 +1,9 @@
 import os
 import threading
 import time
+from collections import deque
+
+from sim.devices import CONFIG_SIM_HISTORY, register, sim_enabled
 
 try:
     import config as _config
@@ -48,10 +51,46 @@ CONFIG_LCD_COLS = _get_cfg("LCD_COLS", 16)
 CONFIG_LCD_ROWS = _get_cfg("LCD_ROWS", 2)
 CONFIG_LCD_BACKLIGHT = _get_cfg("LCD_BACKLIGHT", True)
 CONFIG_LCD_UPDATE_MIN_INTERVAL_SEC = _get_cfg("LCD_UPDATE_MIN_INTERVAL_SEC", 0.2)
+CONFIG_LCD_I2C_BLOCK_WRITES = _get_cfg("LCD_I2C_BLOCK_WRITES", True)
 
 
 class _BaseDriver:
-    def display_lines(self, line1, line2):
+    """Keeps a shadow of the LCD contents and only sends characters that changed."""
+
+    cols = 16
+    rows = 2
+
+    def _init_shadow(self, fill=None):
+        self._shadow = [[fill] * self.cols for _ in range(self.rows)]
+
+    def invalidate(self):
+        # Unknown contents (after an I/O error): the next update rewrites everything.
+        self._init_shadow()
+
+    def display_lines(self, *lines):
+        """Write ``lines`` (one per row); returns the number of characters sent."""
+        sent = 0
+        for row, text in enumerate(lines[: self.rows]):
+            text = (text or "")[: self.cols].ljust(self.cols)
+            shadow = self._shadow[row]
+            col = 0
+            while col < self.cols:
+                if text[col] == shadow[col]:
+                    col += 1
+                    continue
+                end = col + 1
+                # Rewriting one unchanged character costs no more than a cursor move.
+                while end < self.cols and (
+                    text[end] != shadow[end] or (end + 1 < self.cols and text[end + 1] != shadow[end + 1])
+                ):
+                    end += 1
+                self._write_at(col, row, text[col:end])
+                shadow[col:end] = list(text[col:end])
+                sent += end - col
+                col = end
+        return sent
+
+    def _write_at(self, col, row, text):
         raise NotImplementedError
 
     def clear(self):
@@ -64,22 +103,18 @@ class _BaseDriver:
 class _RplcdDriver(_BaseDriver):
     def __init__(self, lcd):
         self.lcd = lcd
+        self.cols = lcd.cols
+        self.rows = lcd.rows
+        self.transactions = 0
+        self._init_shadow()
 
-    def display_lines(self, line1, line2):
-        try:
-            self.lcd.cursor_pos = (0, 0)
-            self.lcd.write_string(line1)
-            if self.lcd.rows > 1:
-                self.lcd.cursor_pos = (1, 0)
-                self.lcd.write_string(line2)
-        except Exception:
-            return
+    def _write_at(self, col, row, text):
+        self.lcd.cursor_pos = (row, col)
+        self.lcd.write_string(text)
 
     def clear(self):
-        try:
-            self.lcd.clear()
-        except Exception:
-            return
+        self.lcd.clear()
+        self._init_shadow(" ")
 
     def close(self):
         try:
@@ -95,18 +130,26 @@ class _PCF8574Driver(_BaseDriver):
     RW = 0x02
     EN = 0x04
     BACKLIGHT = 0x08
+    ROW_OFFSETS = (0x00, 0x40, 0x14, 0x54)
+    # smbus block writes carry a command byte plus up to 32 data bytes.
+    BLOCK_BYTES = 33
 
-    def __init__(self, bus, address, cols, rows, backlight=True):
+    def __init__(self, bus, address, cols, rows, backlight=True, block_writes=True):
         self.bus = bus
         self.address = address
         self.cols = cols
         self.rows = rows
         self.backlight = bool(backlight)
         self._backlight_mask = self.BACKLIGHT if self.backlight else 0x00
+        self.block_writes = bool(block_writes) and hasattr(bus, "write_i2c_block_data")
+        self.transactions = 0
+        self._cursor = None
+        self._init_shadow()
         self._init_lcd()
 
     def _write_byte(self, data):
         self.bus.write_byte(self.address, data | self._backlight_mask)
+        self.transactions += 1
 
     def _pulse_enable(self, data):
         self._write_byte(data | self.EN)
@@ -122,11 +165,6 @@ class _PCF8574Driver(_BaseDriver):
         self._write4bits(cmd & 0xF0)
         self._write4bits((cmd << 4) & 0xF0)
 
-    def _write_char(self, char):
-        val = ord(char)
-        self._write4bits((val & 0xF0) | self.RS)
-        self._write4bits(((val << 4) & 0xF0) | self.RS)
-
     def _init_lcd(self):
         time.sleep(0.05)
         self._write4bits(0x30)
@@ -142,24 +180,48 @@ class _PCF8574Driver(_BaseDriver):
         self._command(0x06)  # entry mode
         self.clear()
 
-    def _set_cursor(self, col, row):
-        row_offsets = [0x00, 0x40, 0x14, 0x54]
-        row = max(0, min(row, len(row_offsets) - 1))
-        col = max(0, min(col, self.cols - 1))
-        self._command(0x80 | (col + row_offsets[row]))
-
-    def display_lines(self, line1, line2):
-        self._set_cursor(0, 0)
-        for ch in line1:
-            self._write_char(ch)
-        if self.rows > 1:
-            self._set_cursor(0, 1)
-            for ch in line2:
-                self._write_char(ch)
+    # ----- streamed writes -----
+    def _encode(self, value, flags, out):
+        # Each nibble is set up, latched on EN high and released: 3 expander bytes.
+        # At 100 kHz one byte takes ~90 us, longer than the EN pulse and the 37 us
+        # execution time the HD44780 needs, so no sleeps are required in between.
+        for nibble in (value & 0xF0, (value << 4) & 0xF0):
+            data = nibble | flags | self._backlight_mask
+            out.extend((data, data | self.EN, data))
+
+    def _send(self, payload):
+        if self.block_writes:
+            for i in range(0, len(payload), self.BLOCK_BYTES):
+                chunk = payload[i:i + self.BLOCK_BYTES]
+                self.bus.write_i2c_block_data(self.address, chunk[0], list(chunk[1:]))
+                self.transactions += 1
+        else:
+            for data in payload:
+                self.bus.write_byte(self.address, data)
+                self.transactions += 1
+
+    def invalidate(self):
+        # A write that failed partway may have moved the HD44780 address: always re-send the cursor.
+        super().invalidate()
+        self._cursor = None
+
+    def _write_at(self, col, row, text):
+        payload = bytearray()
+        if self._cursor != (col, row):
+            row_offset = self.ROW_OFFSETS[max(0, min(row, len(self.ROW_OFFSETS) - 1))]
+            self._encode(0x80 | (col + row_offset), 0, payload)
+        for ch in text:
+            val = ord(ch)
+            self._encode(val if val < 0x100 else ord("?"), self.RS, payload)
+        self._send(payload)
+        # Entry mode increments the address after every character.
+        self._cursor = (col + len(text), row)
 
     def clear(self):
         self._command(0x01)
         time.sleep(0.002)
+        self._cursor = (0, 0)
+        self._init_shadow(" ")
 
     def close(self):
         try:
@@ -168,14 +230,102 @@ class _PCF8574Driver(_BaseDriver):
             return
 
 
+class FakeSMBus:
+    """``smbus.SMBus`` stand-in that decodes a PCF8574/HD44780 byte stream.
+
+    Counts transactions and bytes, optionally sleeps ``transaction_sec`` +
+    ``byte_sec`` per byte to model bus time, and keeps the resulting
+    character memory so ``lines()`` shows what a real display would show.
+    With ``record=True`` every transaction is logged as ``(monotonic ts,
+    bytes)`` in ``log`` (the ``DOORBELL_HW_SIM`` LCD).
+    """
+
+    def __init__(self, cols=16, rows=2, transaction_sec=0.0, byte_sec=0.0, record=False):
+        self.cols = cols
+        self.rows = rows
+        self.transaction_sec = float(transaction_sec)
+        self.byte_sec = float(byte_sec)
+        self.transactions = 0
+        self.bytes = 0
+        self.log = deque(maxlen=CONFIG_SIM_HISTORY) if record else None
+        self._prev = 0
+        self._four_bit = False
+        self._high = None
+        self._addr = 0
+        self._ddram = [" "] * 0x80
+
+    def _bus_time(self, count):
+        self.transactions += 1
+        self.bytes += count
+        if self.log is not None:
+            self.log.append((time.monotonic(), count))
+        delay = self.transaction_sec + self.byte_sec * count
+        if delay > 0:
+            time.sleep(delay)
+
+    def write_byte(self, address, value):
+        self._bus_time(1)
+        self._latch(value)
+
+    def write_i2c_block_data(self, address, cmd, data):
+        self._bus_time(1 + len(data))
+        for value in [cmd] + list(data):
+            self._latch(value)
+
+    def _latch(self, value):
+        falling = self._prev & _PCF8574Driver.EN and not value & _PCF8574Driver.EN
+        self._prev = value
+        if not falling:
+            return
+        nibble = value & 0xF0
+        rs = bool(value & _PCF8574Driver.RS)
+        if not self._four_bit:
+            # 8-bit mode during init: each nibble is a full command.
+            if nibble == 0x20:
+                self._four_bit = True
+            return
+        if self._high is None:
+            self._high = nibble
+            return
+        byte = self._high | (nibble >> 4)
+        self._high = None
+        if rs:
+            self._ddram[self._addr & 0x7F] = chr(byte)
+            self._addr += 1
+        elif byte == 0x01:
+            self._ddram = [" "] * 0x80
+            self._addr = 0
+        elif byte & 0x80:
+            self._addr = byte & 0x7F
+
+    def lines(self):
+        return [
+            "".join(self._ddram[offset:offset + self.cols])
+            for offset in _PCF8574Driver.ROW_OFFSETS[: self.rows]
+        ]
+
+    def close(self):
+        pass
+
+
 class LCDDisplay:
-    def __init__(self):
+    """Door/person status on a character LCD, written by a background thread.
+
+    ``set_status()`` only updates the wanted state and returns; the
+    ``lcd-writer`` thread renders the latest state at most once per
+    ``min_interval`` (intermediate states are coalesced, the final one is
+    never dropped) and the driver sends only the characters that changed,
+    so slow I2C never blocks the door, GUI or result-bus threads.
+    """
+
+    def __init__(self, bus=None):
         self.enabled = _env_bool("DOORBELL_LCD_ENABLED", CONFIG_LCD_ENABLED)
         self.bus = _env_int("DOORBELL_LCD_I2C_BUS", CONFIG_LCD_I2C_BUS)
         self.address = _env_int("DOORBELL_LCD_I2C_ADDRESS", CONFIG_LCD_I2C_ADDRESS)
         self.cols = _env_int("DOORBELL_LCD_COLS", CONFIG_LCD_COLS)
         self.rows = _env_int("DOORBELL_LCD_ROWS", CONFIG_LCD_ROWS)
         self.backlight = _env_bool("DOORBELL_LCD_BACKLIGHT", CONFIG_LCD_BACKLIGHT)
+        self.block_writes = _env_bool("DOORBELL_LCD_I2C_BLOCK_WRITES", CONFIG_LCD_I2C_BLOCK_WRITES)
         self.min_interval = _env_float(
             "DOORBELL_LCD_UPDATE_MIN_INTERVAL_SEC",
             CONFIG_LCD_UPDATE_MIN_INTERVAL_SEC,
@@ -184,13 +334,28 @@ class LCDDisplay:
         self.available = False
         self._driver = None
         self._lock = threading.Lock()
-        self._last_lines = ("", "")
+        self._cond = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._writer = None
+        self._closing = False
+        self._last_lines = None
+        self._wanted_lines = None
         self._last_update_ts = 0.0
         self._door_open = False
         self._person_type = "NONE"
         self._person_name = ""
-
-        if self.enabled:
+        self.updates = 0
+        self.writes = 0
+        self.chars_written = 0
+        self.errors = 0
+        self.last_write_ms = 0.0
+        self.max_write_ms = 0.0
+
+        if bus is None and self.enabled and sim_enabled():
+            bus = register("lcd", FakeSMBus(self.cols, self.rows, record=True))
+        if bus is not None:
+            self._init_pcf8574(bus)
+        elif self.enabled:
             self._init_driver()
 
     def _init_driver(self):
@@ -231,7 +396,9 @@ class LCDDisplay:
         if bus is None:
             self.available = False
             return
+        self._init_pcf8574(bus)
 
+    def _init_pcf8574(self, bus):
         try:
             self._driver = _PCF8574Driver(
                 bus,
@@ -239,6 +406,7 @@ class LCDDisplay:
                 cols=self.cols,
                 rows=self.rows,
                 backlight=self.backlight,
+                block_writes=self.block_writes,
             )
             self.available = True
         except Exception:
@@ -273,9 +441,10 @@ class LCDDisplay:
         return self._format_line(line1), self._format_line(line2)
 
     def set_status(self, door_open=None, person_type=None, person_name=None):
+        """Update the wanted status; True when it changes what the LCD will show."""
         if not self.available or self._driver is None:
             return False
-        with self._lock:
+        with self._cond:
             if door_open is not None:
                 self._door_open = bool(door_open)
             if person_type is not None:
@@ -283,38 +452,105 @@ class LCDDisplay:
             if person_name is not None:
                 self._person_name = str(person_name)
 
-            now = time.time()
-            if self.min_interval and now - self._last_update_ts < self.min_interval:
-                return False
-
-            line1, line2 = self._compose_lines()
-            if (line1, line2) == self._last_lines:
+            lines = self._compose_lines()
+            if lines == self._wanted_lines or self._closing:
                 return False
+            self._wanted_lines = lines
+            self.updates += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="lcd-writer", daemon=True)
+                self._writer.start()
+            self._cond.notify_all()
+            return True
 
-            try:
-                self._driver.display_lines(line1, line2)
-                self._last_lines = (line1, line2)
-                self._last_update_ts = now
-                return True
-            except Exception:
-                return False
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while not self._closing and self._wanted_lines == self._last_lines:
+                    self._cond.wait()
+                if self._closing:
+                    return
+                wait = self.min_interval - (time.monotonic() - self._last_update_ts)
+                if wait > 0:
+                    # Later set_status() calls during the wait replace the state.
+                    self._cond.wait(wait)
+                    continue
+                lines = self._wanted_lines
+            start = time.monotonic()
+            with self._io_lock:
+                try:
+                    sent = self._driver.display_lines(*lines)
+                    ok = True
+                except Exception:
+                    self._driver.invalidate()
+                    ok = False
+            elapsed = (time.monotonic() - start) * 1000.0
+            with self._cond:
+                self._last_update_ts = time.monotonic()
+                if ok:
+                    self._last_lines = lines
+                    self.writes += 1
+                    self.chars_written += sent
+                    self.last_write_ms = elapsed
+                    self.max_write_ms = max(self.max_write_ms, elapsed)
+                else:
+                    # I2C error (loose wire, bus busy): back off, then rewrite everything.
+                    self.errors += 1
+                    self._last_update_ts += 1.0
+                self._cond.notify_all()
+
+    def flush(self, timeout=2.0):
+        """Wait until the wanted status is on the display."""
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._cond:
+            while self._writer is not None and self._wanted_lines != self._last_lines:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                "available": self.available,
+                "updates": self.updates,
+                "writes": self.writes,
+                "coalesced": max(0, self.updates - self.writes),
+                "charsWritten": self.chars_written,
+                "transactions": getattr(self._driver, "transactions", None),
+                "errors": self.errors,
+                "lastWriteMs": round(self.last_write_ms, 2),
+                "maxWriteMs": round(self.max_write_ms, 2),
+            }
 
     def clear(self):
         if not self.available or self._driver is None:
             return False
-        try:
-            self._driver.clear()
-            self._last_lines = ("", "")
-            return True
-        except Exception:
-            return False
+        with self._io_lock:
+            try:
+                self._driver.clear()
+            except Exception:
+                self._driver.invalidate()
+                return False
+        with self._cond:
+            self._last_lines = None
+            self._wanted_lines = None
+        return True
 
     def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout=1.0)
         if self._driver is not None:
-            try:
-                self._driver.close()
-            except Exception:
-                return
+            with self._io_lock:
+                try:
+                    self._driver.close()
+                except Exception:
+                    return
 
 
 _LCD_INSTANCE = None
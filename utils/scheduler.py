@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class TimerHandle:
+    """A scheduled callback; ``cancel()`` is cheap and safe from any thread."""
+
+    __slots__ = ("when", "callback", "args", "name", "cancelled", "fired", "_seq")
+
+    def __init__(self, when, seq, callback, args, name):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.cancelled = False
+        self.fired = False
+        self._seq = seq
+
+    def __lt__(self, other):
+        return (self.when, self._seq) < (other.when, other._seq)
+
+    @property
+    def active(self):
+        return not self.cancelled and not self.fired
+
+    def cancel(self):
+        """Returns True when the callback had not started yet."""
+        was_active = self.active
+        self.cancelled = True
+        return was_active
+
+
+class FakeClock:
+    """Manual clock for tests: time only moves through ``Scheduler.advance()``."""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def __call__(self):
+        return self._now
+
+    def set(self, value):
+        self._now = max(self._now, float(value))
+
+
+class Scheduler:
+    """One heap of deadlines served by one thread, shared by all actuators.
+
+    Replaces a ``threading.Timer`` (one new thread) per auto-close, detach
+    or LED-off: ``call_later()`` pushes a ``TimerHandle`` and wakes the
+    ``actuator-timers`` thread, which sleeps until the earliest deadline on
+    the monotonic clock. Cancelled handles are dropped lazily. Callbacks run
+    on the scheduler thread and must be short (servo/LED/sound calls are).
+
+    With a ``FakeClock`` no thread is started; ``advance(sec)`` runs the due
+    callbacks in deadline order on the caller's thread, so actuator timing
+    can be tested deterministically.
+    """
+
+    def __init__(self, clock=None, name="actuator-timers"):
+        self.clock = clock if clock is not None else time.monotonic
+        self.name = name
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.last_late_ms = 0.0
+        self.max_late_ms = 0.0
+        self._thread = None
+        if not isinstance(self.clock, FakeClock):
+            self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+            self._thread.start()
+
+    def now(self):
+        return self.clock()
+
+    def call_later(self, delay, callback, *args, name=None):
+        return self.call_at(self.clock() + max(0.0, float(delay)), callback, *args, name=name)
+
+    def call_at(self, when, callback, *args, name=None):
+        handle = TimerHandle(float(when), next(self._seq), callback, args, name)
+        with self._cond:
+            heapq.heappush(self._heap, handle)
+            self.scheduled += 1
+            if self._heap[0] is handle:
+                self._cond.notify()
+        return handle
+
+    def _pop_due_locked(self, now):
+        while self._heap:
+            head = self._heap[0]
+            if head.cancelled:
+                heapq.heappop(self._heap)
+                self.cancelled += 1
+                continue
+            if head.when > now:
+                return None
+            heapq.heappop(self._heap)
+            head.fired = True
+            return head
+        return None
+
+    def _run(self, handle, now):
+        late = max(0.0, (now - handle.when) * 1000.0)
+        self.last_late_ms = late
+        self.max_late_ms = max(self.max_late_ms, late)
+        self.fired += 1
+        try:
+            handle.callback(*handle.args)
+        except Exception as exc:
+            self.failed += 1
+            print(f"Scheduler: {handle.name or handle.callback} failed ({exc})")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closing:
+                        return
+                    now = self.clock()
+                    handle = self._pop_due_locked(now)
+                    if handle is not None:
+                        break
+                    timeout = self._heap[0].when - now if self._heap else None
+                    self._cond.wait(timeout)
+            self._run(handle, self.clock())
+
+    def advance(self, sec):
+        """Fake clock only: move time forward, running callbacks as their deadlines pass."""
+        if not isinstance(self.clock, FakeClock):
+            raise RuntimeError("advance() needs a FakeClock")
+        target = self.clock() + max(0.0, float(sec))
+        while True:
+            with self._cond:
+                handle = self._pop_due_locked(target)
+            if handle is None:
+                break
+            self.clock.set(handle.when)
+            self._run(handle, handle.when)
+        self.clock.set(target)
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for handle in self._heap if not handle.cancelled)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": sum(1 for handle in self._heap if not handle.cancelled),
+                "scheduled": self.scheduled,
+                "fired": self.fired,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "lastLateMs": round(self.last_late_ms, 2),
+                "maxLateMs": round(self.max_late_ms, 2),
+            }
+
+    def close(self, timeout=1.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide actuator scheduler (created on first use)."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = Scheduler()
+        return _SCHEDULER
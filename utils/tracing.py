@@ -0,0 +1,248 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+try:
+    import config as _config
+except Exception:
+    _config = None
+
+
+def _get_cfg(name, default):
+    if _config is None:
+        return default
+    return getattr(_config, name, default)
+
+
+CONFIG_TRACE_ENABLED = _get_cfg("TRACE_ENABLED", True)
+CONFIG_TRACE_BUFFER_SIZE = _get_cfg("TRACE_BUFFER_SIZE", 4096)
+
+
+class Span:
+    __slots__ = ("trace_id", "name", "start", "end", "thread", "args", "root")
+
+    def __init__(self, trace_id, name, start, end, thread, args, root=False):
+        self.trace_id = trace_id
+        self.name = name
+        self.start = start
+        self.end = end
+        self.thread = thread
+        self.args = args
+        self.root = root
+
+
+class Trace:
+    """Trace context of one frame (or ring press), carried in ``result["trace"]``.
+
+    ``id`` is the trace ID and ``start`` the monotonic capture time. The
+    root span (e.g. ``capture``) is only written to the buffer once the
+    first child span is recorded, so frames that never reach inference cost
+    nothing.
+    """
+
+    __slots__ = ("tracer", "id", "name", "start", "end", "thread", "args", "_recorded")
+
+    def __init__(self, tracer, trace_id, name, start, end, thread, args):
+        self.tracer = tracer
+        self.id = trace_id
+        self.name = name
+        self.start = start
+        self.end = end
+        self.thread = thread
+        self.args = args
+        self._recorded = False
+
+    def record(self, name, start, end=None, thread=None, **args):
+        """Add a span measured by the caller (monotonic ``start``/``end``)."""
+        end = time.monotonic() if end is None else end
+        thread = thread or threading.current_thread().name
+        self.tracer._record(self, Span(self.id, name, start, end, thread, args))
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time the ``with`` block; the yielded dict becomes the span's args."""
+        start = time.monotonic()
+        try:
+            yield args
+        finally:
+            self.record(name, start, **args)
+
+    def elapsed_ms(self, ts=None):
+        ts = time.monotonic() if ts is None else ts
+        return round((ts - self.start) * 1000.0, 2)
+
+
+def span(trace, name, **args):
+    """``trace.span(name)``, or a no-op when ``trace`` is None (tracing off / untraced caller)."""
+    if trace is None:
+        return nullcontext(args)
+    return trace.span(name, **args)
+
+
+class Tracer:
+    """In-memory ring buffer of spans, grouped by trace ID.
+
+    ``start()`` opens a trace (``capture`` of a camera frame, ``ring`` of a
+    button press); pipeline stages add spans to it, so one face-to-door
+    path is ``capture -> infer.queue -> infer_frame (detect, recognize,
+    smooth) -> door.queue -> door.handle_result -> door.open_hold`` plus
+    ``event.add``. ``traces()`` serves the API, ``chrome_trace()`` /
+    ``export_chrome()`` the Chrome trace-event format (chrome://tracing,
+    Perfetto), where each trace's spans are linked by a flow arrow across
+    threads.
+    """
+
+    def __init__(self, capacity=CONFIG_TRACE_BUFFER_SIZE, enabled=CONFIG_TRACE_ENABLED):
+        self.enabled = bool(enabled)
+        self._spans = deque(maxlen=max(64, int(capacity)))
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Monotonic -> wall clock, for API timestamps.
+        self._epoch = time.time() - time.monotonic()
+        self.traces_started = 0
+        self.spans_recorded = 0
+
+    def start(self, name, start=None, end=None, **args):
+        """New trace whose root span ``name`` ran from ``start`` to ``end`` (now); None when disabled."""
+        if not self.enabled:
+            return None
+        end = time.monotonic() if end is None else end
+        start = end if start is None else start
+        trace_id = f"{next(self._ids):08x}"
+        self.traces_started += 1
+        return Trace(self, trace_id, name, start, end, threading.current_thread().name, args)
+
+    def _record(self, trace, item):
+        with self._lock:
+            if not trace._recorded:
+                trace._recorded = True
+                self._spans.append(Span(trace.id, trace.name, trace.start, trace.end, trace.thread, trace.args, root=True))
+                self.spans_recorded += 1
+            self._spans.append(item)
+            self.spans_recorded += 1
+
+    def spans(self, trace_id=None):
+        with self._lock:
+            items = list(self._spans)
+        if trace_id is not None:
+            items = [item for item in items if item.trace_id == trace_id]
+        return items
+
+    def _grouped(self, trace_id=None):
+        groups = {}
+        for item in self.spans(trace_id):
+            groups.setdefault(item.trace_id, []).append(item)
+        for items in groups.values():
+            items.sort(key=lambda item: (item.start, not item.root, -item.end))
+        return groups
+
+    def traces(self, limit=50, trace_id=None, contains=None):
+        """Newest traces first, each with its spans relative to the trace start (ms).
+
+        ``contains`` keeps only traces with a span of that name, e.g.
+        ``door.open_hold`` for the critical path of each door opening.
+        """
+        groups = self._grouped(trace_id)
+        if contains:
+            groups = {key: items for key, items in groups.items() if any(item.name == contains for item in items)}
+        ordered = sorted(groups.items(), key=lambda pair: pair[1][0].start, reverse=True)
+        out = []
+        for key, items in ordered[: max(1, int(limit))]:
+            origin = items[0].start
+            out.append({
+                "traceId": key,
+                "name": items[0].name,
+                "startTs": round(self._epoch + origin, 6),
+                "durationMs": round((max(item.end for item in items) - origin) * 1000.0, 2),
+                "spans": [
+                    {
+                        "name": item.name,
+                        "thread": item.thread,
+                        "startMs": round((item.start - origin) * 1000.0, 2),
+                        "durationMs": round((item.end - item.start) * 1000.0, 2),
+                        "args": item.args,
+                    }
+                    for item in items
+                ],
+            })
+        return out
+
+    def chrome_trace(self, trace_id=None, contains=None):
+        """Spans as a Chrome trace-event JSON object (``X`` slices plus flow events per trace)."""
+        groups = self._grouped(trace_id)
+        if contains:
+            groups = {key: items for key, items in groups.items() if any(item.name == contains for item in items)}
+        pid = os.getpid()
+        tids = {}
+        events = [{"ph": "M", "pid": pid, "name": "process_name", "args": {"name": "doorbell"}}]
+
+        def tid_of(thread):
+            if thread not in tids:
+                tids[thread] = len(tids) + 1
+                events.append({"ph": "M", "pid": pid, "tid": tids[thread], "name": "thread_name", "args": {"name": thread}})
+            return tids[thread]
+
+        for key, items in groups.items():
+            flow_id = int(key, 16)
+            for index, item in enumerate(items):
+                tid = tid_of(item.thread)
+                ts = round(item.start * 1e6, 1)
+                events.append({
+                    "ph": "X",
+                    "name": item.name,
+                    "cat": "doorbell",
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": ts,
+                    "dur": round(max(0.0, item.end - item.start) * 1e6, 1),
+                    "args": dict(item.args, traceId=key),
+                })
+                if len(items) > 1:
+                    phase = "s" if index == 0 else ("f" if index == len(items) - 1 else "t")
+                    flow = {"ph": phase, "name": "trace", "cat": "flow", "id": flow_id, "pid": pid, "tid": tid, "ts": ts}
+                    if phase == "f":
+                        flow["bp"] = "e"
+                    events.append(flow)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path, trace_id=None, contains=None):
+        """Write ``chrome_trace()`` to ``path`` (atomically); returns the number of slices."""
+        data = self.chrome_trace(trace_id=trace_id, contains=contains)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, default=str)
+        os.replace(tmp_path, path)
+        return sum(1 for event in data["traceEvents"] if event["ph"] == "X")
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "capacity": self._spans.maxlen,
+                "buffered": len(self._spans),
+                "tracesStarted": self.traces_started,
+                "spansRecorded": self.spans_recorded,
+            }
+
+
+_TRACER = None
+_TRACER_LOCK = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer (created on first use)."""
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = Tracer()
+        return _TRACER